@@ -4,15 +4,26 @@ from dotenv import load_dotenv
 import logging
 import re
 import random
-from google import genai
+import time
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from google.genai import types
-from openai import OpenAI
+from utils.cache import TieredCache, hash_key
+from utils.provider_clients import get_http_session, get_openai_client, get_gemini_client, get_request_timeout, http_timeout, openai_timeout, gemini_http_options
+from utils.metrics import timed, observe_stage, record_provider_call
+from utils.context_selector import select_context, estimate_tokens
+from utils.rate_limiter import ProviderLimits, ProviderOverloaded
 
 load_dotenv()
 
-AI_SERVICE = os.getenv("AI_SERVICE", "gemini") 
+# the provider used when a caller does not name one; read once, never written at runtime
+AI_SERVICE = os.getenv("AI_SERVICE", "gemini")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
 
 
 
@@ -20,27 +31,72 @@ OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "sk-or-v1-")
 OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "anthropic/claude-3.5-sonnet")
 OPENROUTER_SITE_URL = os.getenv("OPENROUTER_SITE_URL", "https://questiondifficulty.app")
 OPENROUTER_SITE_NAME = os.getenv("OPENROUTER_SITE_NAME", "Question Difficulty Analyzer")
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama3-8b-8192")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
 
 HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
 HUGGINGFACE_MODEL = os.getenv("HUGGINGFACE_MODEL", "meta-llama/Llama-2-7b-chat-hf")
+HUGGINGFACE_BASE_URL = os.getenv("HUGGINGFACE_BASE_URL", "https://api-inference.huggingface.co/models")
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "")
+
+ANALYSIS_CHUNKED = os.getenv("ANALYSIS_CHUNKED", "false").lower() == "true"
+ANALYSIS_BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", "5"))
+ANALYSIS_MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", "4"))
+
+# syllabus tokens sent per analysis prompt; generation prompts get GENERATION_CONTEXT_SCALE times more.
+# 1000 (about 4000 characters, 6000 for generation) is the old fixed cap; no provider defaults above it,
+# and the small-context models get less.
+SYLLABUS_TOKEN_BUDGETS = {
+    "openai": int(os.getenv("OPENAI_SYLLABUS_TOKENS", "1000")),
+    "openrouter": int(os.getenv("OPENROUTER_SYLLABUS_TOKENS", "1000")),
+    "groq": int(os.getenv("GROQ_SYLLABUS_TOKENS", "800")),
+    "huggingface": int(os.getenv("HUGGINGFACE_SYLLABUS_TOKENS", "600")),
+    "gemini": int(os.getenv("GEMINI_SYLLABUS_TOKENS", "1000")),
+}
+DEFAULT_SYLLABUS_TOKENS = int(os.getenv("DEFAULT_SYLLABUS_TOKENS", "1000"))
+GENERATION_CONTEXT_SCALE = 1.5
+
+PROVIDER_PARAMS = {
+    "openai": {"max_tokens": 2000},
+    "openrouter": {"max_tokens": 2000},
+    "groq": {"max_tokens": 2000},
+    "huggingface": {"max_new_tokens": 2000, "temperature": 0.7},
+    "gemini": {"thinking_budget": 0},
+}
+
 logger = logging.getLogger(__name__)
 
+# per-provider concurrency and rate limits (see utils/rate_limiter.py for the settings)
+provider_limits = ProviderLimits()
+
+llm_cache = TieredCache(
+    "llm",
+    max_size=LLM_CACHE_SIZE,
+    ttl=LLM_CACHE_TTL,
+    directory=LLM_CACHE_DIR or None
+)
+
+@timed("smart_truncate")
 def smart_truncate(text, max_chars, priority_keywords=None):
     if len(text) <= max_chars:
         return text
     
+    lowered = text.lower()
     if priority_keywords:
         important_sections = []
         for keyword in priority_keywords:
-            if keyword.lower() in text.lower():
-                start = text.lower().find(keyword.lower())
+            start = lowered.find(keyword.lower())
+            if start != -1:
                 context_start = max(0, start - 100)
                 context_end = min(len(text), start + len(keyword) + 200)
                 important_sections.append(text[context_start:context_end])
@@ -50,7 +106,7 @@ def smart_truncate(text, max_chars, priority_keywords=None):
             if len(combined) <= max_chars:
                 return combined
     
-    if any(marker in text.lower() for marker in ['question', 'q1', 'q2', 'q3', 'part a', 'part b']):
+    if any(marker in lowered for marker in ['question', 'q1', 'q2', 'q3', 'part a', 'part b']):
         return text[:max_chars] + "... [truncated - more questions may exist]"
     
     if max_chars > 200:
@@ -60,6 +116,7 @@ def smart_truncate(text, max_chars, priority_keywords=None):
     
     return text[:max_chars] + "... [truncated]"
 
+@timed("extract_key_topics")
 def extract_key_topics(syllabus_text):
     keywords = []
     lines = syllabus_text.split('\n')
@@ -192,9 +249,8 @@ def generate_question_difficulty_metrics(difficulty_level, score, ai_service):
     
     return metrics
 
+@timed("parse_response")
 def parse_multiple_question_analysis(analysis_result, ai_service):
-    import re
-    
     question_pattern = r'\*\*Question[:\s]*([^*]+)\*\*'
     questions = re.split(question_pattern, analysis_result)
     
@@ -216,102 +272,228 @@ def parse_multiple_question_analysis(analysis_result, ai_service):
     
     return all_metrics
 
-def extract_question_metrics(question_id, content, ai_service):
-    import re
-    
-    metrics = {
-        'question_id': question_id,
-        'ai_model_used': ai_service
-    }
-    
-    difficulty_patterns = [
+QUESTION_HEADER_PATTERN = re.compile(r'\*\*Question[:\s]*([^*]+)\*\*')
+
+class IncrementalQuestionParser:
+    # emits the same metrics as parse_multiple_question_analysis, one question
+    # at a time, as soon as the next **Question: X** header closes the block
+    def __init__(self, ai_service):
+        self.ai_service = ai_service
+        self.parts = []
+        self.metrics = []
+        self.buffer = ""
+        self.current_id = None
+        self.seen_header = False
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    def _emit(self, question_id, content):
+        metrics = extract_question_metrics(question_id, content.strip(), self.ai_service)
+        self.metrics.append(metrics)
+        return metrics
+
+    def feed(self, chunk):
+        self.parts.append(chunk)
+        self.buffer += chunk
+        completed = []
+        
+        # the buffer only ever holds the open block, so each feed rescans one question at most
+        while True:
+            match = QUESTION_HEADER_PATTERN.search(self.buffer)
+            if not match:
+                break
+            if self.current_id is not None:
+                completed.append(self._emit(self.current_id, self.buffer[:match.start()]))
+            self.current_id = match.group(1).strip()
+            self.seen_header = True
+            self.buffer = self.buffer[match.end():]
+        
+        return completed
+
+    def finish(self):
+        if self.current_id is not None:
+            metrics = self._emit(self.current_id, self.buffer)
+            self.current_id = None
+            self.buffer = ""
+            return [metrics]
+        if not self.seen_header:
+            return [self._emit("Q1", self.text)]
+        return []
+
+BULLET_METRIC_PATTERN = re.compile(r'[ \t]*\*[ \t]*\*\*([^*]+)\*\*[:\s]*(.*)')
+LINE_BREAK_PATTERN = re.compile(r'[\n\r]')
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+INTEGER_PATTERN = re.compile(r'\d+')
+
+COGNITIVE_LEVELS = {'Remember', 'Understand', 'Apply', 'Analyze', 'Evaluate', 'Create'}
+
+BULLET_METRIC_KEYS = {
+    'difficulty label': 'difficulty_label',
+    'difficulty score': 'difficulty_score',
+    'syllabus alignment score': 'syllabus_alignment_score',
+    'bloom taxonomy level': 'cognitive_level',
+    'application depth': 'application_depth',
+    'estimated time to solve': 'estimated_time_to_solve',
+    'brief explanation': 'explanation',
+}
+
+METRIC_ORDER = [
+    'difficulty_label',
+    'difficulty_score',
+    'syllabus_alignment_score',
+    'cognitive_level',
+    'application_depth',
+    'estimated_time_to_solve',
+    'explanation',
+]
+
+# the original search cascade, precompiled; only consulted for metrics the bullet walk could not resolve
+METRIC_FALLBACK_PATTERNS = {
+    'difficulty_label': [
         r'\*\s*\*\*difficulty\s+label\*\*[:\s]*([^\n\r]+)',
         r'difficulty\s+label[:\s]*([^\n\r]+)',
         r'difficulty[:\s]+(easy|moderate|tough|hard|difficult)',
         r'(easy|moderate|tough|hard|difficult)\s+difficulty'
-    ]
-    for pattern in difficulty_patterns:
-        match = re.search(pattern, content, re.IGNORECASE)
-        if match:
-            difficulty = match.group(1).strip()
-            difficulty = re.sub(r'\*+', '', difficulty)
-            metrics['difficulty_label'] = difficulty.title()
-            break
-    
-    score_patterns = [
+    ],
+    'difficulty_score': [
         r'\*\s*\*\*difficulty\s+score\*\*[:\s]*(\d+(?:\.\d+)?)',
         r'difficulty\s+score[:\s]*(\d+(?:\.\d+)?)',
         r'score[:\s]*(\d+(?:\.\d+)?)'
-    ]
-    for pattern in score_patterns:
-        match = re.search(pattern, content, re.IGNORECASE)
-        if match:
-            metrics['difficulty_score'] = float(match.group(1))
-            break
-    
-    alignment_patterns = [
+    ],
+    'syllabus_alignment_score': [
         r'\*\s*\*\*syllabus\s+alignment\s+score\*\*[:\s]*(\d+(?:\.\d+)?)',
         r'syllabus\s+alignment\s+score[:\s]*(\d+(?:\.\d+)?)',
         r'alignment[:\s]*(\d+(?:\.\d+)?)'
-    ]
-    for pattern in alignment_patterns:
-        match = re.search(pattern, content, re.IGNORECASE)
-        if match:
-            metrics['syllabus_alignment_score'] = float(match.group(1))
-            break
-    
-    cognitive_patterns = [
+    ],
+    'cognitive_level': [
         r'\*\s*\*\*bloom[\'s]*\s+taxonomy\s+level\*\*[:\s]*([^\n\r]+)',
         r'bloom[\'s]*\s+taxonomy\s+level[:\s]*([^\n\r]+)',
         r'cognitive\s+level[:\s]*([^\n\r]+)',
         r'(remember|understand|apply|analyze|evaluate|create)'
-    ]
-    for pattern in cognitive_patterns:
-        match = re.search(pattern, content, re.IGNORECASE)
-        if match:
-            level = match.group(1).strip()
-            level = re.sub(r'\*+', '', level).title()
-            if level in ['Remember', 'Understand', 'Apply', 'Analyze', 'Evaluate', 'Create']:
-                metrics['cognitive_level'] = level
-                break
-    
-    depth_patterns = [
+    ],
+    'application_depth': [
         r'\*\s*\*\*application\s+depth\*\*[:\s]*(\d+)',
         r'application\s+depth[:\s]*(\d+)',
         r'depth[:\s]*(\d+)'
-    ]
-    for pattern in depth_patterns:
-        match = re.search(pattern, content, re.IGNORECASE)
-        if match:
-            metrics['application_depth'] = int(match.group(1))
-            break
-    
-    time_patterns = [
+    ],
+    'estimated_time_to_solve': [
         r'\*\s*\*\*estimated\s+time\s+to\s+solve\*\*[:\s]*([^\n\r]+)',
         r'estimated\s+time[:\s]*([^\n\r]+)',
         r'time\s+to\s+solve[:\s]*([^\n\r]+)',
         r'(\d+)\s*minutes?'
-    ]
-    for pattern in time_patterns:
-        match = re.search(pattern, content, re.IGNORECASE)
-        if match:
-            time_str = match.group(1).strip()
-            time_str = re.sub(r'\*+', '', time_str)
-            metrics['estimated_time_to_solve'] = time_str if 'minute' in time_str else f"{time_str} minutes"
-            break
-    
-    explanation_patterns = [
+    ],
+    'explanation': [
         r'\*\s*\*\*brief\s+explanation\*\*[:\s]*([^\n\r*]+)',
         r'brief\s+explanation[:\s]*([^\n\r*]+)',
         r'explanation[:\s]*([^\n\r*]+)'
-    ]
-    for pattern in explanation_patterns:
-        match = re.search(pattern, content, re.IGNORECASE)
-        if match:
-            explanation = match.group(1).strip()
-            explanation = re.sub(r'\*+', '', explanation)
-            metrics['explanation'] = explanation
-            break
+    ],
+}
+METRIC_FALLBACK_PATTERNS = {
+    name: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+    for name, patterns in METRIC_FALLBACK_PATTERNS.items()
+}
+
+@lru_cache(maxsize=512)
+def metric_name_for_key(key):
+    if key != key.strip():
+        return None
+    key = " ".join(key.lower().split())
+    if key.startswith("bloom"):
+        # mirrors bloom['s]* in the original patterns
+        key = "bloom" + key[5:].lstrip("'s")
+    return BULLET_METRIC_KEYS.get(key)
+
+# each converter returns None when the value would not have satisfied the original pattern
+def number_metric_value(raw):
+    match = NUMBER_PATTERN.match(raw)
+    return float(match.group(0)) if match else None
+
+def integer_metric_value(raw):
+    match = INTEGER_PATTERN.match(raw)
+    return int(match.group(0)) if match else None
+
+def label_metric_value(raw):
+    return raw.strip().replace('*', '').title() if raw else None
+
+def cognitive_metric_value(raw):
+    value = label_metric_value(raw)
+    return value if value in COGNITIVE_LEVELS else None
+
+def time_metric_value(raw):
+    if not raw:
+        return None
+    value = raw.strip().replace('*', '')
+    return value if 'minute' in value else f"{value} minutes"
+
+def explanation_metric_value(raw):
+    raw = raw.split('*', 1)[0]
+    return raw.strip() if raw else None
+
+METRIC_CONVERTERS = {
+    'difficulty_label': label_metric_value,
+    'difficulty_score': number_metric_value,
+    'syllabus_alignment_score': number_metric_value,
+    'cognitive_level': cognitive_metric_value,
+    'application_depth': integer_metric_value,
+    'estimated_time_to_solve': time_metric_value,
+    'explanation': explanation_metric_value,
+}
+
+def fallback_metric_value(name, content):
+    for pattern in METRIC_FALLBACK_PATTERNS[name]:
+        match = pattern.search(content)
+        if not match:
+            continue
+        
+        if name in ('difficulty_score', 'syllabus_alignment_score'):
+            return float(match.group(1))
+        if name == 'application_depth':
+            return int(match.group(1))
+        
+        value = match.group(1).strip().replace('*', '')
+        if name == 'difficulty_label':
+            return value.title()
+        if name == 'cognitive_level':
+            value = value.title()
+            if value in COGNITIVE_LEVELS:
+                return value
+            continue
+        if name == 'estimated_time_to_solve':
+            return value if 'minute' in value else f"{value} minutes"
+        return value
+    return None
+
+def extract_question_metrics(question_id, content, ai_service):
+    metrics = {
+        'question_id': question_id,
+        'ai_model_used': ai_service
+    }
+    
+    # single pass over the "*   **Metric**: value" bullet lines the prompt asks for
+    found = {}
+    unresolved = set()
+    lines = LINE_BREAK_PATTERN.split(content) if '\r' in content else content.split('\n')
+    for line in lines:
+        if '**' not in line:
+            continue
+        match = BULLET_METRIC_PATTERN.match(line)
+        if match is None:
+            continue
+        name = metric_name_for_key(match.group(1))
+        if name is None or name in found or name in unresolved:
+            continue
+        value = METRIC_CONVERTERS[name](match.group(2))
+        if value is None:
+            unresolved.add(name)
+        else:
+            found[name] = value
+    
+    for name in METRIC_ORDER:
+        value = found[name] if name in found else fallback_metric_value(name, content)
+        if value is not None:
+            metrics[name] = value
     
     difficulty_score = metrics.get('difficulty_score', 5)
     application_depth = metrics.get('application_depth', 3)
@@ -329,20 +511,9 @@ def extract_question_metrics(question_id, content, ai_service):
     
     return metrics
 
-def analyze_question_paper(syllabus_text, objectives, question_text):
-    ai_service = os.getenv("AI_SERVICE", "gemini")
-    logger.info(f"Starting analysis with {ai_service} service")
-    
-    key_topics = extract_key_topics(syllabus_text)
-    logger.info(f"Key topics extracted: {len(key_topics)} topics")
-    
-    truncated_syllabus = smart_truncate(syllabus_text, 4000, key_topics)
-    truncated_objectives = smart_truncate(objectives, 1000)
-    truncated_question = smart_truncate(question_text, 8000)
-    
-    logger.info(f"Text lengths after smart truncation - Syllabus: {len(truncated_syllabus)}, Objectives: {len(truncated_objectives)}, Question: {len(truncated_question)}")
-    
-    prompt = f"""You are an expert in educational assessment and curriculum design.
+@timed("build_prompt")
+def build_analysis_prompt(truncated_syllabus, truncated_objectives, truncated_question):
+    return f"""You are an expert in educational assessment and curriculum design.
 
 IMPORTANT: Analyze EVERY SINGLE QUESTION in the question paper. Do not stop until you have analyzed all questions.
 
@@ -381,84 +552,206 @@ Focus purely on question content and syllabus-objective alignment.
 Do not infer or assume any student background or performance.
 Provide specific numeric scores and clear reasoning for EVERY question."""
 
+QUESTION_ID_PATTERN = re.compile(r'^[ \t]*(?:Q(?:uestion)?\.?[ \t]*\d+)', re.IGNORECASE | re.MULTILINE)
+NUMBERED_QUESTION_PATTERN = re.compile(r'^[ \t]*\d+[ \t]*[\.\)]', re.MULTILINE)
+
+def split_questions(question_text):
+    starts = [m.start() for m in QUESTION_ID_PATTERN.finditer(question_text)]
+    if len(starts) < 2:
+        starts = [m.start() for m in NUMBERED_QUESTION_PATTERN.finditer(question_text)]
+    if len(starts) < 2:
+        return [question_text]
+    
+    # instructions before the first question stay attached to it
+    starts[0] = 0
+    starts.append(len(question_text))
+    return [question_text[starts[i]:starts[i + 1]].strip() for i in range(len(starts) - 1)]
+
+def analyze_in_batches(config, truncated_syllabus, truncated_objectives, question_text):
+    questions = split_questions(question_text)
+    groups = [questions[i:i + ANALYSIS_BATCH_SIZE] for i in range(0, len(questions), ANALYSIS_BATCH_SIZE)]
+    batches = ["\n\n".join(group) for group in groups]
+    logger.info(f"Chunked analysis: {len(questions)} questions in {len(batches)} batches, {ANALYSIS_MAX_WORKERS} workers")
+    
+    def analyze_batch(batch_text):
+        prompt = build_analysis_prompt(truncated_syllabus, truncated_objectives, smart_truncate(batch_text, 8000))
+        return call_ai_service(config, prompt)
+    
+    # each worker runs in a copy of the caller's context so its logs keep the request ID
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=max(1, min(ANALYSIS_MAX_WORKERS, len(batches)))) as executor:
+        batch_results = list(executor.map(lambda batch: context.copy().run(analyze_batch, batch), batches))
+    
+    # failed batches are reported on their own; their error text never joins the analysis
+    all_question_metrics = []
+    analyses = []
+    failed_batches = []
+    for index, batch_result in enumerate(batch_results):
+        if is_provider_error(batch_result):
+            logger.error(f"Batch {index + 1}/{len(batches)} failed: {str(batch_result)[:200]}")
+            failed_batches.append({
+                "batch": index + 1,
+                "questions": len(groups[index]),
+                "error": str(batch_result)[:200]
+            })
+            continue
+        analyses.append(batch_result)
+        all_question_metrics.extend(parse_multiple_question_analysis(batch_result, config.provider))
+    
+    if not analyses:
+        return str(batch_results[0]), [], failed_batches
+    
+    return "\n\n".join(analyses), all_question_metrics, failed_batches
+
+def syllabus_token_budget(ai_service, scale=1.0):
+    return int(SYLLABUS_TOKEN_BUDGETS.get(ai_service, DEFAULT_SYLLABUS_TOKENS) * scale)
+
+@timed("select_context")
+def select_syllabus_context(syllabus_text, query, ai_service, scale=1.0):
+    # BM25-ranked syllabus sections packed into the provider's token budget
+    budget = syllabus_token_budget(ai_service, scale)
+    selected = select_context(syllabus_text, query, budget)
+    logger.info(f"Syllabus context: {estimate_tokens(selected)}/{estimate_tokens(syllabus_text)} tokens (budget {budget})")
+    return selected
+
+def prepare_analysis_context(syllabus_text, objectives, question_text, ai_service=None):
+    truncated_syllabus = select_syllabus_context(syllabus_text, f"{objectives}\n{question_text}", ai_service)
+    truncated_objectives = smart_truncate(objectives, 1000)
+    
+    logger.info(f"Text lengths after smart truncation - Syllabus: {len(truncated_syllabus)}, Objectives: {len(truncated_objectives)}, Question: {len(question_text)}")
+    return truncated_syllabus, truncated_objectives
+
+def build_analysis_result(analysis_result, all_question_metrics, ai_service):
+    if all_question_metrics:
+        primary_metrics = all_question_metrics[0]
+        
+        result_with_metrics = {
+            'analysis': analysis_result,
+            'metrics': primary_metrics,
+            'all_questions_metrics': all_question_metrics,
+            'ai_model': ai_service,
+            'total_questions_analyzed': len(all_question_metrics)
+        }
+    else:
+        difficulty_match = None
+        score_match = None
+        
+        difficulty_patterns = [
+            r'difficulty[:\s]+(easy|moderate|tough|hard|difficult)',
+            r'(easy|moderate|tough|hard|difficult)\s+difficulty',
+            r'level[:\s]+(easy|moderate|tough|hard|difficult)',
+            r'\b(easy|moderate|tough|hard|difficult)\b'
+        ]
+        
+        for pattern in difficulty_patterns:
+            match = re.search(pattern, analysis_result.lower())
+            if match:
+                difficulty_match = match.group(1)
+                break
+        
+        score_patterns = [
+            r'score[:\s]+(\d+(?:\.\d+)?)',
+            r'alignment[:\s]+(\d+(?:\.\d+)?)',
+            r'(\d+(?:\.\d+)?)\s*\/\s*10',
+            r'(\d+(?:\.\d+)?)\s*out\s*of\s*10',
+            r'rating[:\s]+(\d+(?:\.\d+)?)'
+        ]
+        
+        for pattern in score_patterns:
+            match = re.search(pattern, analysis_result.lower())
+            if match:
+                score_match = match.group(1)
+                break
+        
+        metrics = generate_question_difficulty_metrics(
+            difficulty_match or 'moderate',
+            score_match,
+            ai_service
+        )
+        
+        result_with_metrics = {
+            'analysis': analysis_result,
+            'metrics': metrics,
+            'ai_model': ai_service
+        }
+    
+    return result_with_metrics
+
+def analyze_question_paper(syllabus_text, objectives, question_text, chunked=None, ai_service=None, config=None):
+    config = config or provider_config(ai_service)
+    ai_service = config.provider
+    if chunked is None:
+        chunked = ANALYSIS_CHUNKED
+    logger.info(f"Starting analysis with {ai_service} service")
+    
+    truncated_syllabus, truncated_objectives = prepare_analysis_context(syllabus_text, objectives, question_text, ai_service)
+    
     try:
-        if ai_service == "openai":
-            analysis_result = analyze_with_openai(prompt)
-        elif ai_service == "openrouter":
-            analysis_result = analyze_with_openrouter(prompt)
-        elif ai_service == "groq":
-            analysis_result = analyze_with_groq(prompt)
-        elif ai_service == "huggingface":
-            analysis_result = analyze_with_huggingface(prompt)
-        elif ai_service == "gemini":
-            analysis_result = analyze_with_gemini(prompt)
-        else:
+        if ai_service not in AI_PROVIDERS:
             logger.error(f"Unsupported AI service: {ai_service}")
             return "Error: Unsupported AI service configured."
         
-        all_question_metrics = parse_multiple_question_analysis(analysis_result, ai_service)
-        
-        if all_question_metrics:
-            primary_metrics = all_question_metrics[0]
-            
-            result_with_metrics = {
-                'analysis': analysis_result,
-                'metrics': primary_metrics,
-                'all_questions_metrics': all_question_metrics,
-                'ai_model': ai_service,
-                'total_questions_analyzed': len(all_question_metrics)
-            }
-        else:
-            difficulty_match = None
-            score_match = None
-            
-            difficulty_patterns = [
-                r'difficulty[:\s]+(easy|moderate|tough|hard|difficult)',
-                r'(easy|moderate|tough|hard|difficult)\s+difficulty',
-                r'level[:\s]+(easy|moderate|tough|hard|difficult)',
-                r'\b(easy|moderate|tough|hard|difficult)\b'
-            ]
-            
-            for pattern in difficulty_patterns:
-                match = re.search(pattern, analysis_result.lower())
-                if match:
-                    difficulty_match = match.group(1)
-                    break
-            
-            score_patterns = [
-                r'score[:\s]+(\d+(?:\.\d+)?)',
-                r'alignment[:\s]+(\d+(?:\.\d+)?)',
-                r'(\d+(?:\.\d+)?)\s*\/\s*10',
-                r'(\d+(?:\.\d+)?)\s*out\s*of\s*10',
-                r'rating[:\s]+(\d+(?:\.\d+)?)'
-            ]
-            
-            for pattern in score_patterns:
-                match = re.search(pattern, analysis_result.lower())
-                if match:
-                    score_match = match.group(1)
-                    break
-            
-            metrics = generate_question_difficulty_metrics(
-                difficulty_match or 'moderate',
-                score_match,
-                ai_service
+        if chunked:
+            analysis_result, all_question_metrics, failed_batches = analyze_in_batches(
+                config, truncated_syllabus, truncated_objectives, question_text
             )
-            
-            result_with_metrics = {
-                'analysis': analysis_result,
-                'metrics': metrics,
-                'ai_model': ai_service
-            }
+            if is_provider_error(analysis_result):
+                return analysis_result
+        else:
+            truncated_question = smart_truncate(question_text, 8000)
+            prompt = build_analysis_prompt(truncated_syllabus, truncated_objectives, truncated_question)
+            analysis_result = call_ai_service(config, prompt)
+            # a provider error (e.g. a 429 body) is not an analysis; do not invent metrics for it
+            if is_provider_error(analysis_result):
+                logger.error(f"Analysis failed with {ai_service}: {str(analysis_result)[:200]}")
+                return analysis_result
+            all_question_metrics = parse_multiple_question_analysis(analysis_result, ai_service)
+            failed_batches = []
+        
+        result_with_metrics = build_analysis_result(analysis_result, all_question_metrics, ai_service)
+        if failed_batches:
+            result_with_metrics['partial'] = True
+            result_with_metrics['failed_batches'] = failed_batches
         
         logger.info(f"Analysis completed with {ai_service}, metrics generated")
         return result_with_metrics
     
+    except ProviderOverloaded:
+        raise
     except Exception as e:
         logger.error(f"Error during analysis: {str(e)}")
         return f"Error during analysis: {str(e)}"
 
-def analyze_with_openai(prompt):
+def analyze_question_paper_stream(syllabus_text, objectives, question_text, ai_service=None, config=None):
+    config = config or provider_config(ai_service)
+    ai_service = config.provider
+    logger.info(f"Starting streamed analysis with {ai_service} service")
+    
+    if ai_service not in AI_PROVIDERS:
+        logger.error(f"Unsupported AI service: {ai_service}")
+        yield ("error", "Error: Unsupported AI service configured.")
+        return
+    
+    truncated_syllabus, truncated_objectives = prepare_analysis_context(syllabus_text, objectives, question_text, ai_service)
+    prompt = build_analysis_prompt(truncated_syllabus, truncated_objectives, smart_truncate(question_text, 8000))
+    
+    parser = IncrementalQuestionParser(ai_service)
+    for chunk in stream_ai_service(config, prompt):
+        yield ("token", chunk)
+        for metrics in parser.feed(chunk):
+            yield ("question", metrics)
+    
+    if is_provider_error(parser.text):
+        yield ("error", parser.text)
+        return
+    
+    for metrics in parser.finish():
+        yield ("question", metrics)
+    
+    logger.info(f"Streamed analysis completed with {ai_service}, {len(parser.metrics)} questions")
+    yield ("result", build_analysis_result(parser.text, parser.metrics, ai_service))
+
+def analyze_with_openai(prompt, config):
     logger.info("Using OpenAI API...")
     
     if not OPENAI_API_KEY:
@@ -471,16 +764,16 @@ def analyze_with_openai(prompt):
     }
     
     data = {
-        "model": OPENAI_MODEL,
+        "model": config.model,
         "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": 2000
+        **config.params
     }
     
-    response = requests.post(
-        "https://api.openai.com/v1/chat/completions",
+    response = get_http_session().post(
+        f"{OPENAI_BASE_URL}/chat/completions",
         headers=headers,
         json=data,
-        timeout=60
+        timeout=http_timeout(config.timeout)
     )
     
     if response.status_code == 200:
@@ -490,7 +783,7 @@ def analyze_with_openai(prompt):
         logger.error(f"OpenAI API error: {response.status_code} - {response.text}")
         return f"Error from OpenAI: {response.status_code} - {response.text}"
 
-def analyze_with_openrouter(prompt):
+def analyze_with_openrouter(prompt, config):
     logger.info("Using OpenRouter API...")
     
     if not OPENROUTER_API_KEY:
@@ -498,24 +791,22 @@ def analyze_with_openrouter(prompt):
         return "Error: OpenRouter API key not configured."
     
     try:
-        client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=OPENROUTER_API_KEY,
-        )
+        client = get_openai_client(OPENROUTER_BASE_URL, OPENROUTER_API_KEY)
         
         completion = client.chat.completions.create(
             extra_headers={
                 "HTTP-Referer": OPENROUTER_SITE_URL,
                 "X-Title": OPENROUTER_SITE_NAME,
             },
-            model=OPENROUTER_MODEL,
+            model=config.model,
             messages=[
                 {
                     "role": "user",
                     "content": prompt
                 }
             ],
-            max_tokens=2000
+            timeout=openai_timeout(config.timeout),
+            **config.params
         )
         
         logger.info("Successfully received response from OpenRouter")
@@ -525,7 +816,7 @@ def analyze_with_openrouter(prompt):
         logger.error(f"OpenRouter API error: {str(e)}")
         return f"Error from OpenRouter: {str(e)}"
 
-def analyze_with_groq(prompt):
+def analyze_with_groq(prompt, config):
     logger.info("Using Groq API...")
     
     if not GROQ_API_KEY:
@@ -538,17 +829,17 @@ def analyze_with_groq(prompt):
     }
     
     data = {
-        "model": GROQ_MODEL,
+        "model": config.model,
         "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": 2000
+        **config.params
     }
     
     try:
-        response = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
+        response = get_http_session().post(
+            f"{GROQ_BASE_URL}/chat/completions",
             headers=headers,
             json=data,
-            timeout=60
+            timeout=http_timeout(config.timeout)
         )
         
         if response.status_code == 200:
@@ -562,7 +853,7 @@ def analyze_with_groq(prompt):
         logger.error(f"Request error with Groq: {str(e)}")
         return f"Error connecting to Groq: {str(e)}"
 
-def analyze_with_huggingface(prompt):
+def analyze_with_huggingface(prompt, config):
     logger.info("Using Hugging Face API...")
     
     if not HUGGINGFACE_API_KEY:
@@ -576,17 +867,14 @@ def analyze_with_huggingface(prompt):
     
     data = {
         "inputs": prompt,
-        "parameters": {
-            "max_new_tokens": 2000,
-            "temperature": 0.7
-        }
+        "parameters": config.params
     }
     
-    response = requests.post(
-        f"https://api-inference.huggingface.co/models/{HUGGINGFACE_MODEL}",
+    response = get_http_session().post(
+        f"{HUGGINGFACE_BASE_URL}/{config.model}",
         headers=headers,
         json=data,
-        timeout=60
+        timeout=http_timeout(config.timeout)
     )
     
     if response.status_code == 200:
@@ -599,7 +887,7 @@ def analyze_with_huggingface(prompt):
         logger.error(f"Hugging Face API error: {response.status_code} - {response.text}")
         return f"Error from Hugging Face: {response.status_code} - {response.text}"
 
-def analyze_with_gemini(prompt):
+def analyze_with_gemini(prompt, config):
     logger.info("Using Gemini API...")
     
     if not GEMINI_API_KEY:
@@ -607,14 +895,12 @@ def analyze_with_gemini(prompt):
         return "Error: Gemini API key not configured."
     
     try:
-        client = genai.Client(api_key=GEMINI_API_KEY)
+        client = get_gemini_client(GEMINI_API_KEY)
         
         response = client.models.generate_content(
-            model=GEMINI_MODEL,
+            model=config.model,
             contents=prompt,
-            config=types.GenerateContentConfig(
-                thinking_config=types.ThinkingConfig(thinking_budget=0)
-            )
+            config=gemini_generation_config(config)
         )
         
         logger.info("Successfully received response from Gemini")
@@ -624,15 +910,252 @@ def analyze_with_gemini(prompt):
         logger.error(f"Gemini API error: {str(e)}")
         return f"Error from Gemini: {str(e)}"
 
-def generate_questions(syllabus_text, objectives, question_type, ai_model="openrouter", difficulty_level="moderate", syllabus_topics=""):
-    logger.info(f"Starting question generation with {ai_model} service for {question_type} questions at {difficulty_level} level")
+AI_PROVIDERS = {
+    "openai": analyze_with_openai,
+    "openrouter": analyze_with_openrouter,
+    "groq": analyze_with_groq,
+    "huggingface": analyze_with_huggingface,
+    "gemini": analyze_with_gemini,
+}
+
+AI_PROVIDER_MODELS = {
+    "openai": OPENAI_MODEL,
+    "openrouter": OPENROUTER_MODEL,
+    "groq": GROQ_MODEL,
+    "huggingface": HUGGINGFACE_MODEL,
+    "gemini": GEMINI_MODEL,
+}
+
+# the parameter each provider API uses for its output limit
+OUTPUT_LIMIT_PARAMS = {
+    "huggingface": "max_new_tokens",
+    "gemini": "max_output_tokens",
+}
+
+@dataclass(frozen=True)
+class ProviderConfig:
+    # what one request decided about its provider calls. It is passed down explicitly
+    # instead of being read from process state, so concurrent requests stay independent.
+    provider: str
+    model: str
+    max_tokens: int = None
+    connect_timeout: float = None
+    read_timeout: float = None
+
+    @property
+    def timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+    @property
+    def params(self):
+        # the provider's request parameters with this request's output limit
+        params = dict(PROVIDER_PARAMS.get(self.provider, {}))
+        if self.max_tokens is not None:
+            params[OUTPUT_LIMIT_PARAMS.get(self.provider, "max_tokens")] = self.max_tokens
+        return params
+
+def provider_config(ai_service=None, model=None, max_tokens=None, read_timeout=None):
+    # unset fields take the configured defaults for the provider
+    ai_service = ai_service or AI_SERVICE
+    connect_timeout, default_read_timeout = get_request_timeout()
+    return ProviderConfig(
+        provider=ai_service,
+        model=model or AI_PROVIDER_MODELS.get(ai_service),
+        max_tokens=max_tokens or PROVIDER_PARAMS.get(ai_service, {}).get(OUTPUT_LIMIT_PARAMS.get(ai_service, "max_tokens")),
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout or default_read_timeout
+    )
+
+def as_config(config):
+    # the internal helpers also accept a bare provider name, which gets its defaults
+    return config if isinstance(config, ProviderConfig) else provider_config(config)
+
+def gemini_generation_config(config):
+    return types.GenerateContentConfig(
+        thinking_config=types.ThinkingConfig(
+            thinking_budget=PROVIDER_PARAMS["gemini"]["thinking_budget"]
+        ),
+        max_output_tokens=config.max_tokens,
+        http_options=gemini_http_options(config.timeout)
+    )
+
+def is_provider_error(result):
+    return not isinstance(result, str) or not result.strip() or result.startswith("Error")
+
+def analysis_failure(result):
+    # analyze_question_paper reports failures as text, or as an analysis that is an error message
+    if not isinstance(result, dict):
+        return str(result)
+    analysis = result.get("analysis")
+    return analysis if isinstance(analysis, str) and is_provider_error(analysis) else None
+
+def llm_cache_key(config, prompt):
+    config = as_config(config)
+    return hash_key(
+        config.provider,
+        config.model,
+        prompt,
+        config.params
+    )
+
+def request_tokens(config, prompt):
+    # what a call counts against tokens-per-minute: the prompt plus the most it may generate
+    return estimate_tokens(prompt) + (config.max_tokens or 0)
+
+@contextmanager
+def provider_slot(config, prompt):
+    # waits (briefly) for concurrency and rate budget, or raises ProviderOverloaded
+    start = time.perf_counter()
+    with provider_limits.get(config.provider).slot(request_tokens(config, prompt)):
+        observe_stage("provider_wait", time.perf_counter() - start, config.provider)
+        yield
+
+def invoke_provider(config, prompt):
+    config = as_config(config)
+    with provider_slot(config, prompt):
+        start = time.perf_counter()
+        result = None
+        outcome = "exception"
+        try:
+            result = AI_PROVIDERS[config.provider](prompt, config)
+            outcome = "error" if is_provider_error(result) else "ok"
+            return result
+        finally:
+            record_provider_call(config.provider, time.perf_counter() - start, prompt, result, outcome)
+
+def call_ai_service(config, prompt):
+    config = as_config(config)
+    ai_service = config.provider
+    if not LLM_CACHE_ENABLED:
+        return invoke_provider(config, prompt)
     
-    os.environ['AI_SERVICE'] = ai_model
+    cache_key = llm_cache_key(config, prompt)
     
-    key_topics = extract_key_topics(syllabus_text)
-    logger.info(f"Key topics extracted: {len(key_topics)} topics")
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"LLM cache hit for {ai_service} ({cache_key[:12]})")
+        return cached
     
-    truncated_syllabus = smart_truncate(syllabus_text, 6000, key_topics)
+    result = invoke_provider(config, prompt)
+    
+    if is_provider_error(result):
+        logger.warning(f"Not caching error response from {ai_service}")
+    else:
+        llm_cache.set(cache_key, result)
+    
+    return result
+
+def get_cache_stats():
+    return {"llm": llm_cache.stats()}
+
+def stream_openai_compatible(client, config, prompt, extra_headers=None):
+    stream = client.chat.completions.create(
+        extra_headers=extra_headers,
+        model=config.model,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=config.max_tokens,
+        timeout=openai_timeout(config.timeout),
+        stream=True
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+def stream_with_openai(prompt, config):
+    if not OPENAI_API_KEY:
+        yield "Error: OpenAI API key not configured."
+        return
+    client = get_openai_client(OPENAI_BASE_URL, OPENAI_API_KEY)
+    yield from stream_openai_compatible(client, config, prompt)
+
+def stream_with_openrouter(prompt, config):
+    if not OPENROUTER_API_KEY:
+        yield "Error: OpenRouter API key not configured."
+        return
+    client = get_openai_client(OPENROUTER_BASE_URL, OPENROUTER_API_KEY)
+    yield from stream_openai_compatible(
+        client,
+        config,
+        prompt,
+        extra_headers={
+            "HTTP-Referer": OPENROUTER_SITE_URL,
+            "X-Title": OPENROUTER_SITE_NAME,
+        }
+    )
+
+def stream_with_groq(prompt, config):
+    if not GROQ_API_KEY:
+        yield "Error: Groq API key not configured."
+        return
+    client = get_openai_client(GROQ_BASE_URL, GROQ_API_KEY)
+    yield from stream_openai_compatible(client, config, prompt)
+
+def stream_with_gemini(prompt, config):
+    if not GEMINI_API_KEY:
+        yield "Error: Gemini API key not configured."
+        return
+    client = get_gemini_client(GEMINI_API_KEY)
+    stream = client.models.generate_content_stream(
+        model=config.model,
+        contents=prompt,
+        config=gemini_generation_config(config)
+    )
+    for chunk in stream:
+        if chunk.text:
+            yield chunk.text
+
+# huggingface inference has no token stream here; it falls back to one full chunk
+STREAM_PROVIDERS = {
+    "openai": stream_with_openai,
+    "openrouter": stream_with_openrouter,
+    "groq": stream_with_groq,
+    "gemini": stream_with_gemini,
+}
+
+def stream_ai_service(config, prompt):
+    config = as_config(config)
+    ai_service = config.provider
+    cache_key = llm_cache_key(config, prompt)
+    
+    if LLM_CACHE_ENABLED:
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"LLM cache hit for {ai_service} stream ({cache_key[:12]})")
+            yield cached
+            return
+    
+    if ai_service not in STREAM_PROVIDERS:
+        yield call_ai_service(config, prompt)
+        return
+    
+    logger.info(f"Streaming from {ai_service}...")
+    parts = []
+    # the slot is held for the whole stream, which is how long the provider is busy with it
+    with provider_slot(config, prompt):
+        start = time.perf_counter()
+        outcome = "exception"
+        try:
+            for chunk in STREAM_PROVIDERS[ai_service](prompt, config):
+                if not parts:
+                    observe_stage("first_token", time.perf_counter() - start, ai_service)
+                parts.append(chunk)
+                yield chunk
+            outcome = "error" if is_provider_error("".join(parts)) else "ok"
+        finally:
+            record_provider_call(ai_service, time.perf_counter() - start, prompt, "".join(parts), outcome)
+    
+    result = "".join(parts)
+    if LLM_CACHE_ENABLED and not is_provider_error(result):
+        llm_cache.set(cache_key, result)
+    logger.info(f"Stream from {ai_service} finished ({len(result)} chars)")
+
+@timed("build_prompt")
+def build_generation_prompt(syllabus_text, objectives, question_type, difficulty_level="moderate", syllabus_topics="", ai_service=None):
+    query = f"{objectives}\n{syllabus_topics}"
+    if not query.strip():
+        # nothing to rank against: fall back to the unit/chapter headings
+        query = "\n".join(extract_key_topics(syllabus_text))
+    truncated_syllabus = select_syllabus_context(syllabus_text, query, ai_service, GENERATION_CONTEXT_SCALE)
     truncated_objectives = smart_truncate(objectives, 1500)
     truncated_topics = smart_truncate(syllabus_topics, 500) if syllabus_topics else ""
     
@@ -698,7 +1221,7 @@ The questions should particularly emphasize these topics: {truncated_topics}
 While still covering the broader syllabus, give special attention to these specified areas.
 """
     
-    prompt = f"""You are an expert educator and question paper designer with extensive experience in curriculum development.
+    return f"""You are an expert educator and question paper designer with extensive experience in curriculum development.
 
 TASK: Generate a comprehensive question paper based on the provided syllabus and learning objectives.
 
@@ -749,24 +1272,38 @@ IMPORTANT: Every single question in the paper must be at {difficulty_level.upper
 
 Please generate a complete, ready-to-use question paper that an instructor could immediately use for {difficulty_level} level assessment."""
 
+def generate_questions(syllabus_text, objectives, question_type, ai_model="openrouter", difficulty_level="moderate", syllabus_topics="", config=None):
+    config = config or provider_config(ai_model)
+    ai_model = config.provider
+    logger.info(f"Starting question generation with {ai_model} service for {question_type} questions at {difficulty_level} level")
+    
+    prompt = build_generation_prompt(syllabus_text, objectives, question_type, difficulty_level, syllabus_topics, ai_model)
+    
     try:
-        if ai_model == "openai":
-            result = analyze_with_openai(prompt)
-        elif ai_model == "openrouter":
-            result = analyze_with_openrouter(prompt)
-        elif ai_model == "groq":
-            result = analyze_with_groq(prompt)
-        elif ai_model == "huggingface":
-            result = analyze_with_huggingface(prompt)
-        elif ai_model == "gemini":
-            result = analyze_with_gemini(prompt)
-        else:
+        if ai_model not in AI_PROVIDERS:
             logger.error(f"Unsupported AI service for generation: {ai_model}")
             return "Error: Unsupported AI service configured for generation."
         
+        result = call_ai_service(config, prompt)
+        
         logger.info(f"Question generation completed with {ai_model}")
         return result
         
+    except ProviderOverloaded:
+        raise
     except Exception as e:
         logger.error(f"Error during question generation: {str(e)}")
         return f"Error during question generation: {str(e)}"
+
+def generate_questions_stream(syllabus_text, objectives, question_type, ai_model="openrouter", difficulty_level="moderate", syllabus_topics="", config=None):
+    config = config or provider_config(ai_model)
+    ai_model = config.provider
+    logger.info(f"Starting streamed question generation with {ai_model} service for {question_type} questions at {difficulty_level} level")
+    
+    if ai_model not in AI_PROVIDERS:
+        logger.error(f"Unsupported AI service for generation: {ai_model}")
+        yield "Error: Unsupported AI service configured for generation."
+        return
+    
+    prompt = build_generation_prompt(syllabus_text, objectives, question_type, difficulty_level, syllabus_topics, ai_model)
+    yield from stream_ai_service(config, prompt)
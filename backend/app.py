@@ -1,36 +1,240 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
-from pymongo import MongoClient
-from utils.pdf_parser import extract_text
-from ai_logic import analyze_question_paper, generate_questions
+from pymongo import MongoClient, ASCENDING
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from bson import ObjectId
+from bson.errors import InvalidId
+from utils.pdf_parser import extract_text_from_upload, get_pdf_cache_stats
+from utils.uploads import Upload, UploadRequest, receive_upload, max_content_length
+from utils.syllabus_store import SyllabusStore, SYLLABUS_STORE_DIR, SYLLABUS_STORE_TTL
+from utils.result_store import ResultStore, result_key, HISTORY_PAGE_SIZE
+from utils.jobs import JobManager, JobQueueFull, JobFailed
+from utils.rate_limiter import ProviderOverloaded
+from utils import metrics
+from utils.auth import issue_token, optional_auth, require_auth, current_user_id, ACCESS_TOKEN_TTL
+from utils.logging_config import configure_logging, set_request_id, reset_request_id
+from ai_logic import analyze_question_paper, analyze_question_paper_stream, generate_questions, generate_questions_stream, get_cache_stats, is_provider_error, analysis_failure, extract_key_topics, provider_config, AI_PROVIDERS, ANALYSIS_CHUNKED, provider_limits
 from werkzeug.security import check_password_hash, generate_password_hash
 import os
 import logging
 import re
+import json
+import time
+import uuid
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 app = Flask(__name__)
 CORS(app)
+# Werkzeug refuses larger bodies from Content-Length before reading them
+app.config['MAX_CONTENT_LENGTH'] = max_content_length()
+app.request_class = UploadRequest
 
 MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
-client = MongoClient(MONGO_URI)
+
+def mongo_client_options():
+    # pool and timeouts; unset variables keep pymongo's defaults
+    options = {}
+    settings = {
+        # how long a request waits for an unreachable MongoDB before failing (pymongo's default is 30s)
+        'MONGO_SERVER_SELECTION_TIMEOUT_MS': 'serverSelectionTimeoutMS',
+        'MONGO_MAX_POOL_SIZE': 'maxPoolSize',
+        'MONGO_MIN_POOL_SIZE': 'minPoolSize',
+        'MONGO_MAX_IDLE_TIME_MS': 'maxIdleTimeMS',
+        'MONGO_WAIT_QUEUE_TIMEOUT_MS': 'waitQueueTimeoutMS',
+        'MONGO_CONNECT_TIMEOUT_MS': 'connectTimeoutMS',
+        'MONGO_SOCKET_TIMEOUT_MS': 'socketTimeoutMS',
+    }
+    for variable, option in settings.items():
+        value = os.getenv(variable)
+        if value:
+            options[option] = int(value)
+    return options
+
+client = MongoClient(MONGO_URI, **mongo_client_options())
 db = client['question_difficulty_app']
 users_collection = db['users']
+results_collection = db['results']
+
+USER_INDEX_RETRY_SECONDS = float(os.getenv("USER_INDEX_RETRY_SECONDS", "30"))
+
+class UserIndexes:
+    # uniqueness is enforced by MongoDB, and login looks users up by index instead of a scan.
+    # ensure() reports whether the indexes are confirmed; until then a failed attempt is
+    # retried (at most every retry_seconds) by the next register or login.
+    def __init__(self, collection, retry_seconds=USER_INDEX_RETRY_SECONDS):
+        self.collection = collection
+        self.retry_seconds = retry_seconds
+        self.ready = False
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def ensure(self):
+        if self.ready:
+            return True
+        # a request never waits on another thread's attempt, it falls back instead
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            if self.ready or time.monotonic() < self._retry_at:
+                return self.ready
+            self.collection.create_index('username', unique=True, name='username_unique')
+            self.collection.create_index('email', unique=True, name='email_unique')
+            self.ready = True
+            logger.info("User indexes are in place")
+        except DuplicateKeyError as e:
+            self._retry_at = time.monotonic() + self.retry_seconds
+            logger.error(f"Cannot create unique user indexes, the users collection already has duplicates: {str(e)}")
+        except PyMongoError as e:
+            self._retry_at = time.monotonic() + self.retry_seconds
+            logger.warning(f"Could not create user indexes: {str(e)}")
+        finally:
+            self._lock.release()
+        return self.ready
 
-os.makedirs("logs", exist_ok=True)
-log_filename = f"logs/app.log"
+def duplicate_user_message(error):
+    # which unique index the insert hit decides the 409 message
+    details = error.details or {}
+    fields = set(details.get('keyPattern') or details.get('keyValue') or {})
+    if 'email' in fields or 'email_unique' in str(error):
+        return 'User with this email already exists'
+    return 'Username already taken'
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_filename),
-        logging.StreamHandler()
-    ]
-)
+configure_logging()
 
 logger = logging.getLogger(__name__)
 
+# at startup, off the import path so an unreachable MongoDB does not delay it
+user_indexes = UserIndexes(users_collection)
+threading.Thread(target=user_indexes.ensure, name="user-indexes", daemon=True).start()
+
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "4"))
+JOB_MAX_QUEUE = int(os.getenv("JOB_MAX_QUEUE", "32"))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))
+
+# papers of one /analyze/batch request analysed at the same time, and the most it accepts
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_PAPERS = int(os.getenv("BATCH_MAX_PAPERS", "100"))
+
+job_manager = JobManager(max_workers=JOB_MAX_WORKERS, max_queue=JOB_MAX_QUEUE, result_ttl=JOB_RESULT_TTL)
+
+syllabus_store = SyllabusStore(SYLLABUS_STORE_DIR, ttl=SYLLABUS_STORE_TTL or None)
+result_store = ResultStore(results_collection)
+
+def has_syllabus():
+    return 'syllabus' in request.files or bool(request.form.get("syllabus_id"))
+
+def receive_syllabus():
+    # a stored Syllabus when the request names a syllabus_id (None if unknown), else the uploaded file
+    syllabus_id = request.form.get("syllabus_id")
+    if syllabus_id:
+        return syllabus_store.get(syllabus_id)
+    return receive_upload(request.files['syllabus'])
+
+def syllabus_text_from(source):
+    if isinstance(source, Upload):
+        with source:
+            return extract_text_from_upload(source)
+    return source.text
+
+def syllabus_label():
+    syllabus_id = request.form.get("syllabus_id")
+    return f"id:{syllabus_id[:12]}" if syllabus_id else request.files['syllabus'].filename
+
+def analyze_with_results(syllabus_text, objectives, question_text, config, chunked, user_id=None, paper_name=None, syllabus_name=None):
+    # the same paper, syllabus, objectives and model are answered from the results collection
+    key = result_key(
+        question_text, syllabus_text, objectives, config.provider, config.model,
+        ANALYSIS_CHUNKED if chunked is None else chunked
+    )
+    stored = result_store.find(key, user_id, paper_name, syllabus_name)
+    if stored is not None:
+        logger.info(f"Serving stored analysis for paper {key['paper_fingerprint'][:12]} ({config.provider})")
+        return stored
+
+    result = analyze_question_paper(syllabus_text, objectives, question_text, chunked=chunked, config=config)
+    # a partial analysis (some chunked batches failed) is returned but not stored, so a retry can complete it
+    if analysis_failure(result) is None and not result.get('partial'):
+        result_store.save(key, result, user_id, paper_name, syllabus_name)
+    return result
+
+def overloaded(error):
+    # a fast refusal the client can retry, instead of a request that hangs behind the provider
+    response = jsonify({"error": f"{error.provider} is busy, please retry later", "retry_after": error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
+
+def check_provider(ai_model):
+    if ai_model not in AI_PROVIDERS:
+        logger.error(f"Unsupported AI model {ai_model[:40]}")
+        return jsonify({"error": f"Unsupported AI model: {ai_model[:40]}"}), 400
+    try:
+        provider_limits.get(ai_model).check()
+    except ProviderOverloaded as e:
+        return overloaded(e)
+    return None
+
+def unknown_syllabus():
+    logger.error(f"Unknown syllabus_id {request.form.get('syllabus_id', '')[:64]}")
+    return jsonify({"error": "Unknown syllabus_id; upload it again via /api/syllabus"}), 404
+
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+@app.before_request
+def assign_request_id():
+    # honour an upstream proxy's ID so logs can be joined across services
+    incoming = request.headers.get('X-Request-ID', '')
+    g.request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+    g.request_id_token = set_request_id(g.request_id)
+
+@app.after_request
+def add_request_id_header(response):
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+@app.teardown_request
+def clear_request_id(exc):
+    token = g.pop("request_id_token", None)
+    if token is not None:
+        reset_request_id(token)
+
+def metrics_endpoint():
+    # the route template keeps label cardinality bounded (/jobs/<job_id>, not every id)
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+def metrics_provider():
+    # only known providers become label values, so a client cannot mint new series
+    if request.method != "POST" or not request.files:
+        return "none"
+    provider = request.form.get("ai_model", "gemini")
+    return provider if provider in AI_PROVIDERS else "other"
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    provider = metrics_provider()
+    g.metrics_token = metrics.set_request_labels(endpoint=metrics_endpoint(), provider=provider)
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = metrics_endpoint()
+    method = request.method
+    start = g.get("request_start", time.perf_counter())
+    # streamed bodies finish after this hook, so the observation waits for close
+    response.call_on_close(
+        lambda: metrics.record_http_request(endpoint, method, response.status_code, time.perf_counter() - start)
+    )
+    return response
+
+@app.teardown_request
+def clear_request_metrics(exc):
+    token = g.pop("metrics_token", None)
+    if token is not None:
+        metrics.reset_request_labels(token)
+
 @app.route('/api/auth/login', methods=['POST'])
 def login():
     try:
@@ -42,7 +246,8 @@ def login():
         username = data['username'].strip()
         password = data['password']
         
-        user = users_collection.find_one({'username': username})
+        user_indexes.ensure()
+        user = users_collection.find_one({'username': username}, {'username': 1, 'email': 1, 'password': 1})
         
         if not user:
             return jsonify({'message': 'Invalid username or password'}), 401
@@ -50,8 +255,12 @@ def login():
         if not check_password_hash(user['password'], password):
             return jsonify({'message': 'Invalid username or password'}), 401
         
+        # a signed token stands in for the password on later requests
         return jsonify({
             'message': 'Login successful',
+            'access_token': issue_token(user),
+            'token_type': 'Bearer',
+            'expires_in': ACCESS_TOKEN_TTL,
             'user': {
                 'id': str(user['_id']),
                 'email': user['email'],
@@ -102,17 +311,17 @@ def register_user():
         if errors:
             return jsonify({'message': '; '.join(errors)}), 400
         
-        existing_user = users_collection.find_one({
-            '$or': [
-                {'email': email},
-                {'username': username}
-            ]
-        })
-        
-        if existing_user:
-            if existing_user.get('email') == email:
-                return jsonify({'message': 'User with this email already exists'}), 409
-            else:
+        if not user_indexes.ensure():
+            # nothing stops a duplicate until the unique indexes exist, so check first
+            existing_user = users_collection.find_one({
+                '$or': [
+                    {'email': email},
+                    {'username': username}
+                ]
+            }, {'email': 1})
+            if existing_user:
+                if existing_user.get('email') == email:
+                    return jsonify({'message': 'User with this email already exists'}), 409
                 return jsonify({'message': 'Username already taken'}), 409
         
         hashed_password = generate_password_hash(password)
@@ -125,7 +334,11 @@ def register_user():
             'isActive': True
         }
         
-        result = users_collection.insert_one(user_doc)
+        # with the indexes in place this is one round trip: they reject a taken username or email
+        try:
+            result = users_collection.insert_one(user_doc)
+        except DuplicateKeyError as e:
+            return jsonify({'message': duplicate_user_message(e)}), 409
         
         if result.inserted_id:
             logger.info(f"New user registered: {username} ({email})")
@@ -140,95 +353,242 @@ def register_user():
         logger.error(f"Error in register_user: {str(e)}")
         return jsonify({'message': 'Internal server error'}), 500
 
+@app.route("/api/syllabus", methods=["POST"])
+@optional_auth
+def upload_syllabus():
+    if 'syllabus' not in request.files:
+        logger.error("Missing syllabus file in request")
+        return jsonify({"error": "Missing syllabus file"}), 400
+
+    try:
+        with receive_upload(request.files['syllabus']) as upload:
+            existing = syllabus_store.get(upload.sha256)
+            if existing is not None:
+                logger.info(f"Syllabus {upload.filename} already stored as {upload.sha256[:12]}")
+                return jsonify(existing.metadata()), 200
+            syllabus_text = extract_text_from_upload(upload)
+
+        syllabus = syllabus_store.create(upload.sha256, upload.filename, syllabus_text, extract_key_topics(syllabus_text), current_user_id())
+        return jsonify(syllabus.metadata()), 201
+
+    except Exception as e:
+        logger.error(f"Error storing syllabus: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+@app.route("/api/syllabus/<syllabus_id>", methods=["GET"])
+def get_syllabus(syllabus_id):
+    syllabus = syllabus_store.get(syllabus_id)
+    if syllabus is None:
+        return jsonify({"error": "Syllabus not found"}), 404
+    return jsonify(syllabus.metadata()), 200
+
+@app.route("/api/syllabus/<syllabus_id>", methods=["DELETE"])
+@require_auth
+def delete_syllabus(syllabus_id):
+    # handles are the PDF's sha256, which anyone holding the same file can compute,
+    # so only the user who stored it may delete it
+    syllabus = syllabus_store.get(syllabus_id)
+    if syllabus is None:
+        return jsonify({"error": "Syllabus not found"}), 404
+    if syllabus.owner_id is None or syllabus.owner_id != current_user_id():
+        return jsonify({"error": "Only the user who stored this syllabus can delete it"}), 403
+    syllabus_store.delete(syllabus_id)
+    return jsonify({"syllabus_id": syllabus_id, "deleted": True}), 200
+
 @app.route("/analyze", methods=["POST"])
+@optional_auth
 def analyze():
     logger.info("Received analysis request")
     
-    if 'syllabus' not in request.files or 'question_pdf' not in request.files:
+    if not has_syllabus() or 'question_pdf' not in request.files:
         logger.error("Missing syllabus or question file in request")
         return jsonify({"error": "Missing syllabus or question file"}), 400
 
-    syllabus_file = request.files['syllabus']
     question_file = request.files['question_pdf']
     objectives = request.form.get("objectives", "")
     ai_model = request.form.get("ai_model", "gemini")
+    chunked = request.form.get("chunked")
+    chunked = chunked.lower() == "true" if chunked is not None else None
     
-    os.environ['AI_SERVICE'] = ai_model
+    refused = check_provider(ai_model)
+    if refused:
+        return refused
 
-    logger.info(f"Processing files: syllabus={syllabus_file.filename}, question={question_file.filename}, ai_model={ai_model}")
+    # this request's provider settings, passed down rather than shared through the environment
+    config = provider_config(ai_model)
 
-    os.makedirs("tmp", exist_ok=True)
-    syllabus_path = f"tmp/{syllabus_file.filename}"
-    question_path = f"tmp/{question_file.filename}"
-    syllabus_file.save(syllabus_path)
-    question_file.save(question_path)
-
-    logger.info("Files saved successfully, extracting text...")
+    logger.info(f"Processing files: syllabus={syllabus_label()}, question={question_file.filename}, ai_model={ai_model}, user={current_user_id() or 'anonymous'}")
 
     try:
-        syllabus_text = extract_text(syllabus_path)
-        question_text = extract_text(question_path)
+        with metrics.stage_timer("upload_receive"):
+            syllabus_source = receive_syllabus()
+            question_upload = receive_upload(question_file)
+        if syllabus_source is None:
+            question_upload.close()
+            return unknown_syllabus()
+
+        logger.info("Files received, extracting text...")
+
+        with question_upload:
+            syllabus_text = syllabus_text_from(syllabus_source)
+            question_text = extract_text_from_upload(question_upload)
         logger.info("Text extraction completed")
 
-        result = analyze_question_paper(syllabus_text, objectives, question_text)
+        result = analyze_with_results(
+            syllabus_text, objectives, question_text, config, chunked,
+            user_id=current_user_id(), paper_name=question_file.filename, syllabus_name=syllabus_label()
+        )
+        failure = analysis_failure(result)
+        if failure:
+            logger.error(f"Analysis failed: {failure[:200]}")
+            return jsonify({"error": failure}), 502
         logger.info("Analysis completed successfully")
-        
-        if isinstance(result, dict):
-            return jsonify(result)
-        else:
-            return jsonify({"result": result})
+        return jsonify(result)
     
+    except ProviderOverloaded as e:
+        return overloaded(e)
     except Exception as e:
         logger.error(f"Error during analysis: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
+USERS_PAGE_SIZE = 50
+USERS_MAX_PAGE_SIZE = 500
+USER_FIELDS = {'username': 1, 'email': 1, 'createdAt': 1, 'isActive': 1}
+
+def public_user(user):
+    user['_id'] = str(user['_id'])
+    if isinstance(user.get('createdAt'), datetime):
+        user['createdAt'] = user['createdAt'].isoformat()
+    return user
+
 @app.route('/api/users', methods=['GET'])
 def get_users():
+    # keyset pagination on _id: each page is one range scan of the _id index,
+    # however deep into the collection it starts
+    query = {}
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            query['_id'] = {'$gt': ObjectId(cursor)}
+        except (InvalidId, TypeError):
+            return jsonify({'message': 'Invalid cursor'}), 400
+
+    if request.args.get('format') == 'ndjson':
+        # every user from the cursor on (or up to limit), written as Mongo yields them
+        limit = request.args.get('limit', type=int) or 0
+        users = users_collection.find(query, USER_FIELDS).sort('_id', ASCENDING).limit(max(limit, 0)).batch_size(USERS_PAGE_SIZE)
+
+        def lines():
+            try:
+                for user in users:
+                    yield ndjson_line(public_user(user))
+            except Exception as e:
+                logger.error(f"Error streaming users: {str(e)}")
+                yield ndjson_line({'error': 'Internal server error'})
+            finally:
+                users.close()
+
+        return Response(stream_with_context(iterate_in_context(lines())), mimetype="application/x-ndjson")
+
+    limit = request.args.get('limit', USERS_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, USERS_MAX_PAGE_SIZE))
     try:
-        users = list(users_collection.find({}, {'password': 0}))
-        for user in users:
-            user['_id'] = str(user['_id'])
-        return jsonify(users), 200
+        # one extra document tells whether another page exists
+        users = list(users_collection.find(query, USER_FIELDS).sort('_id', ASCENDING).limit(limit + 1))
     except Exception as e:
         logger.error(f"Error in get_users: {str(e)}")
         return jsonify({'message': 'Internal server error'}), 500
 
+    page = [public_user(user) for user in users[:limit]]
+    next_cursor = page[-1]['_id'] if len(users) > limit else None
+    return jsonify({'users': page, 'next_cursor': next_cursor}), 200
+
+@app.route('/api/results', methods=['GET'])
+@require_auth
+def get_results_history():
+    user_id = current_user_id()
+    try:
+        limit = int(request.args.get('limit', HISTORY_PAGE_SIZE))
+        results, next_cursor = result_store.history(user_id, limit, request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'message': 'Invalid limit or cursor'}), 400
+    except Exception as e:
+        logger.error(f"Error in get_results_history: {str(e)}")
+        return jsonify({'message': 'Internal server error'}), 500
+    return jsonify({'results': results, 'next_cursor': next_cursor}), 200
+
+@app.route('/api/results/<result_id>', methods=['GET'])
+@require_auth
+def get_result(result_id):
+    try:
+        result = result_store.get(result_id, current_user_id())
+    except Exception as e:
+        logger.error(f"Error in get_result: {str(e)}")
+        return jsonify({'message': 'Internal server error'}), 500
+    if result is None:
+        return jsonify({'message': 'Result not found'}), 404
+    return jsonify(result), 200
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy', 'timestamp': datetime.utcnow()}), 200
 
+@app.errorhandler(413)
+def upload_too_large(e):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024)
+    return jsonify({"error": f"Upload too large; the limit is {limit_mb:g} MB"}), 413
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    stats = get_cache_stats()
+    stats.update(get_pdf_cache_stats())
+    return jsonify(stats), 200
+
 @app.route("/generate", methods=["POST"])
+@optional_auth
 def generate():
     logger.info("Received question generation request")
     
-    if 'syllabus' not in request.files:
+    if not has_syllabus():
         logger.error("Missing syllabus file in request")
         return jsonify({"error": "Missing syllabus file"}), 400
 
-    syllabus_file = request.files['syllabus']
     objectives = request.form.get("objectives", "")
     syllabus_topics = request.form.get("syllabus_topics", "")
     question_type = request.form.get("question_type", "assignment")
     difficulty_level = request.form.get("difficulty_level", "moderate")
     ai_model = request.form.get("ai_model", "gemini")
     
-    os.environ['AI_SERVICE'] = ai_model
+    refused = check_provider(ai_model)
+    if refused:
+        return refused
 
-    logger.info(f"Processing generation: syllabus={syllabus_file.filename}, type={question_type}, difficulty={difficulty_level}, model={ai_model}")
+    # this request's provider settings, passed down rather than shared through the environment
+    config = provider_config(ai_model)
+
+    logger.info(f"Processing generation: syllabus={syllabus_label()}, type={question_type}, difficulty={difficulty_level}, model={ai_model}, user={current_user_id() or 'anonymous'}")
     if syllabus_topics:
         logger.info(f"Specific topics requested: {syllabus_topics[:100]}...")
 
-    os.makedirs("tmp", exist_ok=True)
-    syllabus_path = f"tmp/{syllabus_file.filename}"
-    syllabus_file.save(syllabus_path)
+    try:
+        with metrics.stage_timer("upload_receive"):
+            syllabus_source = receive_syllabus()
+        if syllabus_source is None:
+            return unknown_syllabus()
 
-    logger.info("File saved successfully, extracting text...")
+        logger.info("File received, extracting text...")
 
-    try:
-        syllabus_text = extract_text(syllabus_path)
+        syllabus_text = syllabus_text_from(syllabus_source)
         logger.info("Text extraction completed")
 
-        result = generate_questions(syllabus_text, objectives, question_type, ai_model, difficulty_level, syllabus_topics)
+        result = generate_questions(syllabus_text, objectives, question_type, ai_model, difficulty_level, syllabus_topics, config=config)
+        if is_provider_error(result):
+            logger.error(f"Question generation failed: {str(result)[:200]}")
+            return jsonify({"error": result}), 502
         logger.info("Question generation completed successfully")
         
         return jsonify({
@@ -239,10 +599,355 @@ def generate():
             "syllabus_topics": syllabus_topics
         })
     
+    except ProviderOverloaded as e:
+        return overloaded(e)
     except Exception as e:
         logger.error(f"Error during question generation: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def iterate_in_context(iterator):
+    # the server iterates streamed bodies outside the view's context; replay it so
+    # request IDs and metric labels still apply to work done inside the generator
+    context = contextvars.copy_context()
+
+    def replay():
+        while True:
+            try:
+                item = context.run(next, iterator)
+            except StopIteration:
+                return
+            yield item
+
+    return replay()
+
+def sse_response(events):
+    return Response(
+        stream_with_context(iterate_in_context(events)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route("/generate/stream", methods=["POST"])
+@optional_auth
+def generate_stream():
+    logger.info("Received streaming question generation request")
+
+    if not has_syllabus():
+        logger.error("Missing syllabus file in request")
+        return jsonify({"error": "Missing syllabus file"}), 400
+
+    refused = check_provider(request.form.get("ai_model", "gemini"))
+    if refused:
+        return refused
+
+    syllabus_source = receive_syllabus()
+    if syllabus_source is None:
+        return unknown_syllabus()
+    objectives = request.form.get("objectives", "")
+    syllabus_topics = request.form.get("syllabus_topics", "")
+    question_type = request.form.get("question_type", "assignment")
+    difficulty_level = request.form.get("difficulty_level", "moderate")
+    ai_model = request.form.get("ai_model", "gemini")
+    config = provider_config(ai_model)
+
+    metadata = {
+        "ai_model": ai_model,
+        "difficulty_level": difficulty_level,
+        "question_type": question_type,
+        "syllabus_topics": syllabus_topics
+    }
+
+    def events():
+        # sent before extraction so the client gets its first byte immediately
+        yield sse_event("start", metadata)
+        parts = []
+        try:
+            syllabus_text = syllabus_text_from(syllabus_source)
+            for chunk in generate_questions_stream(syllabus_text, objectives, question_type, ai_model, difficulty_level, syllabus_topics, config=config):
+                parts.append(chunk)
+                yield sse_event("token", {"text": chunk})
+        except Exception as e:
+            logger.error(f"Error during streamed question generation: {str(e)}")
+            yield sse_event("error", {"error": f"Error from {ai_model}: {str(e)}"})
+            return
+
+        questions = "".join(parts)
+        if is_provider_error(questions):
+            yield sse_event("error", {"error": questions})
+        else:
+            logger.info("Streamed question generation completed successfully")
+            yield sse_event("done", dict(metadata, questions=questions))
+
+    return sse_response(events())
+
+@app.route("/analyze/stream", methods=["POST"])
+@optional_auth
+def analyze_stream():
+    logger.info("Received streaming analysis request")
+
+    if not has_syllabus() or 'question_pdf' not in request.files:
+        logger.error("Missing syllabus or question file in request")
+        return jsonify({"error": "Missing syllabus or question file"}), 400
+
+    refused = check_provider(request.form.get("ai_model", "gemini"))
+    if refused:
+        return refused
+
+    syllabus_source = receive_syllabus()
+    if syllabus_source is None:
+        return unknown_syllabus()
+    question_upload = receive_upload(request.files['question_pdf'])
+    objectives = request.form.get("objectives", "")
+    ai_model = request.form.get("ai_model", "gemini")
+    config = provider_config(ai_model)
+
+    event_names = {"token": "token", "question": "question", "result": "done", "error": "error"}
+
+    def events():
+        yield sse_event("start", {"ai_model": ai_model})
+        try:
+            with question_upload:
+                syllabus_text = syllabus_text_from(syllabus_source)
+                question_text = extract_text_from_upload(question_upload)
+            for kind, payload in analyze_question_paper_stream(syllabus_text, objectives, question_text, config=config):
+                if kind == "token":
+                    payload = {"text": payload}
+                elif kind == "error":
+                    payload = {"error": payload}
+                yield sse_event(event_names[kind], payload)
+        except Exception as e:
+            logger.error(f"Error during streamed analysis: {str(e)}")
+            yield sse_event("error", {"error": f"Error from {ai_model}: {str(e)}"})
+
+    return sse_response(events())
+
+def ndjson_line(data):
+    return json.dumps(data) + "\n"
+
+def analyze_batch_paper(index, upload, syllabus_text, objectives, config, chunked, user_id, syllabus_name):
+    start = time.perf_counter()
+    line = {"type": "paper", "index": index, "filename": upload.filename}
+    try:
+        with upload:
+            question_text = extract_text_from_upload(upload)
+        result = analyze_with_results(syllabus_text, objectives, question_text, config, chunked, user_id, upload.filename, syllabus_name)
+        failure = analysis_failure(result)
+        if failure:
+            line.update(status="error", error=failure)
+        else:
+            line.update(status="ok", result=result)
+    except ProviderOverloaded as e:
+        line.update(status="error", error=f"{e.provider} is busy, please retry later", retry_after=e.retry_after)
+    except Exception as e:
+        logger.error(f"Error analysing batch paper {upload.filename}: {str(e)}")
+        line.update(status="error", error=f"Error analysing {upload.filename}: {str(e)}")
+    line["seconds"] = round(time.perf_counter() - start, 3)
+    return line
+
+@app.route("/analyze/batch", methods=["POST"])
+@optional_auth
+def analyze_batch():
+    logger.info("Received batch analysis request")
+
+    question_files = request.files.getlist("question_pdfs") + request.files.getlist("question_pdf")
+    if not has_syllabus() or not question_files:
+        logger.error("Missing syllabus or question files in batch request")
+        return jsonify({"error": "Missing syllabus or question files"}), 400
+    if len(question_files) > BATCH_MAX_PAPERS:
+        return jsonify({"error": f"Too many papers; the limit is {BATCH_MAX_PAPERS} per batch"}), 400
+
+    refused = check_provider(request.form.get("ai_model", "gemini"))
+    if refused:
+        return refused
+
+    try:
+        concurrency = int(request.form.get("concurrency", BATCH_CONCURRENCY))
+    except ValueError:
+        return jsonify({"error": "concurrency must be an integer"}), 400
+    concurrency = max(1, min(concurrency, BATCH_CONCURRENCY, len(question_files)))
+
+    syllabus_source = receive_syllabus()
+    if syllabus_source is None:
+        return unknown_syllabus()
+    with metrics.stage_timer("upload_receive"):
+        uploads = [receive_upload(question_file) for question_file in question_files]
+    objectives = request.form.get("objectives", "")
+    ai_model = request.form.get("ai_model", "gemini")
+    config = provider_config(ai_model)
+    chunked = request.form.get("chunked")
+    chunked = chunked.lower() == "true" if chunked is not None else None
+    user_id = current_user_id()
+    syllabus_name = syllabus_label()
+
+    logger.info(f"Processing batch: syllabus={syllabus_name}, papers={len(uploads)}, concurrency={concurrency}, ai_model={ai_model}")
+
+    def lines():
+        start = time.perf_counter()
+        yield ndjson_line({"type": "start", "papers": len(uploads), "concurrency": concurrency, "ai_model": ai_model})
+        try:
+            # the syllabus is extracted (and its section index built) once for every paper
+            syllabus_text = syllabus_text_from(syllabus_source)
+        except Exception as e:
+            logger.error(f"Error extracting batch syllabus: {str(e)}")
+            for upload in uploads:
+                upload.close()
+            yield ndjson_line({"type": "error", "error": f"Error extracting syllabus: {str(e)}"})
+            return
+
+        succeeded = 0
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch")
+        futures = {
+            executor.submit(contextvars.copy_context().run, analyze_batch_paper, index, upload, syllabus_text, objectives, config, chunked, user_id, syllabus_name): upload
+            for index, upload in enumerate(uploads)
+        }
+        try:
+            # one line per paper, in the order they finish
+            for future in as_completed(futures):
+                line = future.result()
+                succeeded += line["status"] == "ok"
+                yield ndjson_line(line)
+        finally:
+            # a client that disconnects cancels the papers not yet started
+            executor.shutdown(wait=False, cancel_futures=True)
+            for future, upload in futures.items():
+                if future.cancelled():
+                    upload.close()
+
+        logger.info(f"Batch analysis completed: {succeeded}/{len(uploads)} papers succeeded")
+        yield ndjson_line({
+            "type": "summary",
+            "papers": len(uploads),
+            "succeeded": succeeded,
+            "failed": len(uploads) - succeeded,
+            "seconds": round(time.perf_counter() - start, 3)
+        })
+
+    return Response(
+        stream_with_context(iterate_in_context(lines())),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def run_analysis_job(progress, syllabus_source, question_upload, objectives, config, chunked, user_id=None, syllabus_name=None):
+    with metrics.labelled(endpoint="/jobs/analyze", provider=config.provider):
+        with question_upload:
+            progress("extracting")
+            syllabus_text = syllabus_text_from(syllabus_source)
+            question_text = extract_text_from_upload(question_upload)
+
+        progress("analyzing")
+        result = analyze_with_results(syllabus_text, objectives, question_text, config, chunked, user_id, question_upload.filename, syllabus_name)
+    # a provider error is a failed job, as it is a 502 from /analyze
+    failure = analysis_failure(result)
+    if failure is not None:
+        raise JobFailed(failure)
+    return result
+
+def run_generation_job(progress, syllabus_source, objectives, question_type, config, difficulty_level, syllabus_topics):
+    with metrics.labelled(endpoint="/jobs/generate", provider=config.provider):
+        progress("extracting")
+        syllabus_text = syllabus_text_from(syllabus_source)
+
+        progress("generating")
+        result = generate_questions(syllabus_text, objectives, question_type, config.provider, difficulty_level, syllabus_topics, config=config)
+    if is_provider_error(result):
+        raise JobFailed(str(result))
+    return {
+        "questions": result,
+        "ai_model": config.provider,
+        "difficulty_level": difficulty_level,
+        "question_type": question_type,
+        "syllabus_topics": syllabus_topics
+    }
+
+def submit_job(kind, fn, *args):
+    try:
+        job = job_manager.submit(kind, fn, *args)
+    except JobQueueFull as e:
+        logger.warning(f"Rejected {kind} job: {str(e)}")
+        response = jsonify({"error": "Too many queued jobs, please retry later"})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+
+    return jsonify({
+        "job_id": job['id'],
+        "status": job['status'],
+        "status_url": f"/jobs/{job['id']}"
+    }), 202
+
+@app.route("/jobs/analyze", methods=["POST"])
+@optional_auth
+def submit_analysis_job():
+    if not has_syllabus() or 'question_pdf' not in request.files:
+        logger.error("Missing syllabus or question file in job request")
+        return jsonify({"error": "Missing syllabus or question file"}), 400
+
+    refused = check_provider(request.form.get("ai_model", "gemini"))
+    if refused:
+        return refused
+
+    syllabus_source = receive_syllabus()
+    if syllabus_source is None:
+        return unknown_syllabus()
+
+    chunked = request.form.get("chunked")
+    chunked = chunked.lower() == "true" if chunked is not None else None
+
+    return submit_job(
+        "analyze",
+        run_analysis_job,
+        syllabus_source,
+        receive_upload(request.files['question_pdf']),
+        request.form.get("objectives", ""),
+        provider_config(request.form.get("ai_model", "gemini")),
+        chunked,
+        current_user_id(),
+        syllabus_label()
+    )
+
+@app.route("/jobs/generate", methods=["POST"])
+@optional_auth
+def submit_generation_job():
+    if not has_syllabus():
+        logger.error("Missing syllabus file in job request")
+        return jsonify({"error": "Missing syllabus file"}), 400
+
+    refused = check_provider(request.form.get("ai_model", "gemini"))
+    if refused:
+        return refused
+
+    syllabus_source = receive_syllabus()
+    if syllabus_source is None:
+        return unknown_syllabus()
+
+    return submit_job(
+        "generate",
+        run_generation_job,
+        syllabus_source,
+        request.form.get("objectives", ""),
+        request.form.get("question_type", "assignment"),
+        provider_config(request.form.get("ai_model", "gemini")),
+        request.form.get("difficulty_level", "moderate"),
+        request.form.get("syllabus_topics", "")
+    )
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found or expired"}), 404
+    return jsonify(job), 200
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found or expired"}), 404
+    return jsonify(job), 200
+
 if __name__ == "__main__":
     logger.info("Starting Flask application...")
     app.run(debug=True)
@@ -0,0 +1,262 @@
+import sys
+import os
+import json
+import time
+import logging
+import argparse
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from utils.pdf_parser import extract_text, new_process_pool
+from utils.logging_config import configure_logging, set_request_id, reset_request_id
+from ai_logic import analyze_question_paper, generate_questions, analysis_failure, is_provider_error
+
+logger = logging.getLogger(__name__)
+
+def list_pdfs(directory, recursive=False):
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        paths.extend(os.path.join(root, name) for name in sorted(files) if name.lower().endswith(".pdf"))
+        if not recursive:
+            break
+    return paths
+
+def record_key(path, root):
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+def load_completed(output_path):
+    # papers that already have an "ok" line; failed ones are retried on resume
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "rb+") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # a line cut short by a crash; its paper simply runs again
+                continue
+            if record.get("status") == "ok":
+                completed.add(record["path"])
+        # make sure appended records start on a line of their own
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    return completed
+
+def extract_pdf(path):
+    # runs in a pool process, so PyMuPDF work uses every core instead of sharing the GIL
+    start = time.perf_counter()
+    try:
+        return extract_text(path), None, time.perf_counter() - start
+    except Exception as e:
+        return None, f"Error extracting {os.path.basename(path)}: {str(e)}", time.perf_counter() - start
+
+def analyze_task(syllabus_text, objectives, ai_model, chunked, question_text):
+    result = analyze_question_paper(syllabus_text, objectives, question_text, chunked=chunked, ai_service=ai_model)
+    failure = analysis_failure(result)
+    return ("error", failure) if failure else ("ok", result)
+
+def generate_task(objectives, question_type, ai_model, difficulty_level, syllabus_topics, syllabus_text):
+    result = generate_questions(syllabus_text, objectives, question_type, ai_model, difficulty_level, syllabus_topics)
+    if is_provider_error(result):
+        return "error", result
+    return "ok", {
+        "questions": result,
+        "ai_model": ai_model,
+        "difficulty_level": difficulty_level,
+        "question_type": question_type,
+        "syllabus_topics": syllabus_topics
+    }
+
+def run_task(task, key, text):
+    # each paper's log lines carry its path as the request ID
+    token = set_request_id(key)
+    start = time.perf_counter()
+    try:
+        status, payload = task(text)
+    except Exception as e:
+        logger.error(f"Error processing {key}: {str(e)}")
+        status, payload = "error", f"Error processing {key}: {str(e)}"
+    finally:
+        reset_request_id(token)
+    return status, payload, time.perf_counter() - start
+
+class BatchStats:
+    def __init__(self, total, skipped):
+        self.total = total
+        self.skipped = skipped
+        self.succeeded = 0
+        self.failed = 0
+        self.extract_seconds = 0.0
+        self.llm_seconds = 0.0
+        self.start = time.perf_counter()
+
+    @property
+    def processed(self):
+        return self.succeeded + self.failed
+
+    def add(self, record):
+        if record["status"] == "ok":
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self.extract_seconds += record.get("extract_seconds", 0.0)
+        self.llm_seconds += record.get("llm_seconds", 0.0)
+
+    def summary(self):
+        wall = max(time.perf_counter() - self.start, 1e-9)
+        return {
+            "papers": self.total,
+            "skipped": self.skipped,
+            "processed": self.processed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "wall_seconds": round(wall, 3),
+            "papers_per_second": round(self.processed / wall, 2),
+            "extract_seconds": round(self.extract_seconds, 3),
+            "llm_seconds": round(self.llm_seconds, 3),
+            # busy time over wall time: how many workers each stage kept occupied on average
+            "extract_parallelism": round(self.extract_seconds / wall, 2),
+            "llm_parallelism": round(self.llm_seconds / wall, 2)
+        }
+
+    def progress_line(self):
+        stats = self.summary()
+        remaining = self.total - self.skipped - self.processed
+        return (f"{self.processed}/{self.total - self.skipped} processed ({self.failed} failed), "
+                f"{stats['papers_per_second']} papers/s, {remaining} remaining")
+
+def run_batch(paths, task, output_path, root, processes=None, llm_concurrency=4, resume=True, progress_every=50, out=sys.stdout):
+    processes = processes or os.cpu_count() or 1
+    completed = load_completed(output_path) if resume else set()
+    todo = [path for path in paths if record_key(path, root) not in completed]
+    stats = BatchStats(len(paths), len(paths) - len(todo))
+    if stats.skipped:
+        print(f"Resuming: {stats.skipped} of {len(paths)} papers already done", file=out)
+
+    # a couple of documents queued per process keeps cores busy, and extraction stops
+    # running ahead once the LLM stage has a backlog, so texts never pile up in memory
+    extract_window = processes * 2
+    llm_window = llm_concurrency * 2
+    pending = iter(todo)
+    extracting = {}
+    running = {}
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as output, \
+            new_process_pool(processes) as extract_pool, \
+            ThreadPoolExecutor(max_workers=llm_concurrency, thread_name_prefix="llm") as llm_pool:
+
+        def refill():
+            while len(extracting) < extract_window and len(extracting) + len(running) < extract_window + llm_window:
+                path = next(pending, None)
+                if path is None:
+                    return
+                extracting[extract_pool.submit(extract_pdf, path)] = path
+
+        def write(record):
+            output.write(json.dumps(record) + "\n")
+            # flushed per line so an interrupted run resumes from the last finished paper
+            output.flush()
+            stats.add(record)
+            if progress_every and stats.processed % progress_every == 0:
+                print(stats.progress_line(), file=out)
+
+        refill()
+        while extracting or running:
+            done, _ = wait(list(extracting) + list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in extracting:
+                    path = extracting.pop(future)
+                    key = record_key(path, root)
+                    text, error, extract_seconds = future.result()
+                    if error:
+                        write({"path": key, "status": "error", "error": error, "extract_seconds": round(extract_seconds, 3)})
+                    else:
+                        running[llm_pool.submit(run_task, task, key, text)] = (key, extract_seconds)
+                else:
+                    key, extract_seconds = running.pop(future)
+                    status, payload, llm_seconds = future.result()
+                    write({
+                        "path": key,
+                        "status": status,
+                        "result" if status == "ok" else "error": payload,
+                        "extract_seconds": round(extract_seconds, 3),
+                        "llm_seconds": round(llm_seconds, 3)
+                    })
+            refill()
+
+    return stats.summary()
+
+def read_objectives(value):
+    # --objectives @file.txt reads one objective per line from a file
+    if value.startswith("@"):
+        with open(value[1:], encoding="utf-8") as f:
+            return f.read()
+    return value
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Analyze or generate from a directory of PDFs without the web server")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(sub):
+        sub.add_argument("--output", required=True, help="JSONL results file; an existing one is resumed")
+        sub.add_argument("--ai-model", default="gemini")
+        sub.add_argument("--objectives", default="", help="objectives text, or @path to read them from a file")
+        sub.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="PDF extraction processes")
+        sub.add_argument("--llm-concurrency", type=int, default=4, help="LLM calls in flight at once")
+        sub.add_argument("--recursive", action="store_true", help="include PDFs in subdirectories")
+        sub.add_argument("--limit", type=int, default=0, help="only the first N PDFs (0 for all)")
+        sub.add_argument("--no-resume", action="store_true", help="overwrite the output instead of resuming it")
+        sub.add_argument("--progress-every", type=int, default=50)
+        sub.add_argument("--log-level", default="WARNING")
+
+    analyze = subparsers.add_parser("analyze", help="analyze every question paper in a directory against one syllabus")
+    analyze.add_argument("--syllabus", required=True, help="syllabus PDF")
+    analyze.add_argument("--papers", required=True, help="directory of question paper PDFs")
+    analyze.add_argument("--chunked", choices=["true", "false"], default=None)
+    add_common(analyze)
+
+    generate = subparsers.add_parser("generate", help="generate questions for every syllabus in a directory")
+    generate.add_argument("--syllabi", required=True, help="directory of syllabus PDFs")
+    generate.add_argument("--question-type", default="assignment")
+    generate.add_argument("--difficulty-level", default="moderate")
+    generate.add_argument("--syllabus-topics", default="")
+    add_common(generate)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    configure_logging()
+    logging.getLogger().setLevel(args.log_level.upper())
+    objectives = read_objectives(args.objectives)
+
+    if args.command == "analyze":
+        root = args.papers
+        # extracted once here and shared by every LLM thread
+        syllabus_text = extract_text(args.syllabus)
+        chunked = args.chunked == "true" if args.chunked is not None else None
+        task = partial(analyze_task, syllabus_text, objectives, args.ai_model, chunked)
+    else:
+        root = args.syllabi
+        task = partial(generate_task, objectives, args.question_type, args.ai_model, args.difficulty_level, args.syllabus_topics)
+
+    paths = list_pdfs(root, recursive=args.recursive)
+    if args.limit:
+        paths = paths[:args.limit]
+    print(f"{len(paths)} PDFs, {args.processes} extraction processes, {args.llm_concurrency} concurrent LLM calls, model {args.ai_model}")
+
+    summary = run_batch(
+        paths, task, args.output, root,
+        processes=args.processes,
+        llm_concurrency=args.llm_concurrency,
+        resume=not args.no_resume,
+        progress_every=args.progress_every
+    )
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
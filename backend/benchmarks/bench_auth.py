@@ -0,0 +1,64 @@
+import sys
+import os
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from flask import jsonify
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from app import app
+from utils import auth
+
+PASSWORD = "benchmark-password"
+
+def per_call_us(fn, calls, rounds=5):
+    # best of several rounds, since the request-level difference is small next to the noise
+    fn()
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(max(1, calls // rounds)):
+            fn()
+        elapsed = (time.perf_counter() - start) / max(1, calls // rounds) * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request cost of authenticating with a password versus a signed token")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--password-calls", type=int, default=20, help="the password hash is slow by design")
+    args = parser.parse_args()
+
+    # bare routes so the numbers are the auth overhead, not an endpoint's work
+    app.add_url_rule("/bench/anonymous", "bench_anonymous", lambda: jsonify({"user": None}))
+    app.add_url_rule("/bench/authenticated", "bench_authenticated", auth.require_auth(lambda: jsonify({"user": auth.current_user_id()})))
+    client = app.test_client()
+
+    password_hash = generate_password_hash(PASSWORD)
+    token = auth.issue_token({"_id": ObjectId(), "username": "bench"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def verify_uncached():
+        auth.verified_tokens.clear()
+        auth.verify_token(token)
+
+    rows = [
+        ("check_password_hash (default method)", per_call_us(lambda: check_password_hash(password_hash, PASSWORD), args.password_calls, rounds=1)),
+        ("verify_token, signature check", per_call_us(verify_uncached, args.calls)),
+        ("verify_token, cached", per_call_us(lambda: auth.verify_token(token), args.calls)),
+    ]
+    # the two request paths alternate round by round so drift affects both alike
+    anonymous, authenticated = None, None
+    for _ in range(5):
+        anonymous = min(filter(None, [anonymous, per_call_us(lambda: client.get("/bench/anonymous"), args.calls // 5, rounds=1)]))
+        authenticated = min(filter(None, [authenticated, per_call_us(lambda: client.get("/bench/authenticated", headers=headers), args.calls // 5, rounds=1)]))
+    rows += [("GET without auth", anonymous), ("GET with bearer token (cached)", authenticated)]
+    print(f"{'operation':<40} {'us/call':>10}")
+    for label, micros in rows:
+        print(f"{label:<40} {micros:>10.1f}")
+    print(f"token auth adds {rows[4][1] - rows[3][1]:.1f} us per request; a password check costs {rows[0][1] / 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
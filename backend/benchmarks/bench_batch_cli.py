@@ -0,0 +1,50 @@
+import sys
+import os
+import argparse
+import tempfile
+from functools import partial
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# measure extraction and provider calls, not cache hits
+os.environ.setdefault("PDF_CACHE_ENABLED", "false")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+
+import batch_cli
+from benchmarks import fake_provider
+from benchmarks.synthetic import make_text_pdf_bytes, make_syllabus_text, make_question_paper_text
+
+def write_archive(directory, papers, questions):
+    for number in range(papers):
+        with open(os.path.join(directory, f"paper{number:04d}.pdf"), "wb") as f:
+            f.write(make_text_pdf_bytes(make_question_paper_text(questions, seed=number)))
+    return batch_cli.list_pdfs(directory)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the offline batch analyzer over a synthetic archive")
+    parser.add_argument("--papers", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake provider seconds per call")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--llm-concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    fake_provider.install(fake_provider.FakeProvider(latency=args.latency, questions=args.questions))
+    task = partial(batch_cli.analyze_task, make_syllabus_text(24), "Design relational schemas", "fake", False)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_archive(directory, args.papers, args.questions)
+        output = os.path.join(directory, "results.jsonl")
+        print(f"{args.papers} papers, {args.latency * 1000:.0f} ms per LLM call")
+        print(f"{'processes':>9} {'llm':>5} {'wall s':>8} {'papers/s':>9} {'extract x':>10} {'llm x':>7}")
+        for processes in args.processes:
+            for concurrency in args.llm_concurrency:
+                summary = batch_cli.run_batch(
+                    paths, task, output, directory,
+                    processes=processes, llm_concurrency=concurrency, resume=False, progress_every=0
+                )
+                assert summary["succeeded"] == args.papers, summary
+                print(f"{processes:>9} {concurrency:>5} {summary['wall_seconds']:>8.2f} {summary['papers_per_second']:>9.1f} "
+                      f"{summary['extract_parallelism']:>10.2f} {summary['llm_parallelism']:>7.2f}")
+
+if __name__ == "__main__":
+    main()
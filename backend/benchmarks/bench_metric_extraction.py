@@ -0,0 +1,161 @@
+import sys
+import os
+import re
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_logic import extract_question_metrics, parse_multiple_question_analysis
+from benchmarks.synthetic import make_analysis
+
+# the regex-cascade extractor as it was before the single-pass rewrite, kept as the comparison point
+
+def legacy_extract_question_metrics(question_id, content, ai_service):
+    import re
+    
+    metrics = {
+        'question_id': question_id,
+        'ai_model_used': ai_service
+    }
+    
+    difficulty_patterns = [
+        r'\*\s*\*\*difficulty\s+label\*\*[:\s]*([^\n\r]+)',
+        r'difficulty\s+label[:\s]*([^\n\r]+)',
+        r'difficulty[:\s]+(easy|moderate|tough|hard|difficult)',
+        r'(easy|moderate|tough|hard|difficult)\s+difficulty'
+    ]
+    for pattern in difficulty_patterns:
+        match = re.search(pattern, content, re.IGNORECASE)
+        if match:
+            difficulty = match.group(1).strip()
+            difficulty = re.sub(r'\*+', '', difficulty)
+            metrics['difficulty_label'] = difficulty.title()
+            break
+    
+    score_patterns = [
+        r'\*\s*\*\*difficulty\s+score\*\*[:\s]*(\d+(?:\.\d+)?)',
+        r'difficulty\s+score[:\s]*(\d+(?:\.\d+)?)',
+        r'score[:\s]*(\d+(?:\.\d+)?)'
+    ]
+    for pattern in score_patterns:
+        match = re.search(pattern, content, re.IGNORECASE)
+        if match:
+            metrics['difficulty_score'] = float(match.group(1))
+            break
+    
+    alignment_patterns = [
+        r'\*\s*\*\*syllabus\s+alignment\s+score\*\*[:\s]*(\d+(?:\.\d+)?)',
+        r'syllabus\s+alignment\s+score[:\s]*(\d+(?:\.\d+)?)',
+        r'alignment[:\s]*(\d+(?:\.\d+)?)'
+    ]
+    for pattern in alignment_patterns:
+        match = re.search(pattern, content, re.IGNORECASE)
+        if match:
+            metrics['syllabus_alignment_score'] = float(match.group(1))
+            break
+    
+    cognitive_patterns = [
+        r'\*\s*\*\*bloom[\'s]*\s+taxonomy\s+level\*\*[:\s]*([^\n\r]+)',
+        r'bloom[\'s]*\s+taxonomy\s+level[:\s]*([^\n\r]+)',
+        r'cognitive\s+level[:\s]*([^\n\r]+)',
+        r'(remember|understand|apply|analyze|evaluate|create)'
+    ]
+    for pattern in cognitive_patterns:
+        match = re.search(pattern, content, re.IGNORECASE)
+        if match:
+            level = match.group(1).strip()
+            level = re.sub(r'\*+', '', level).title()
+            if level in ['Remember', 'Understand', 'Apply', 'Analyze', 'Evaluate', 'Create']:
+                metrics['cognitive_level'] = level
+                break
+    
+    depth_patterns = [
+        r'\*\s*\*\*application\s+depth\*\*[:\s]*(\d+)',
+        r'application\s+depth[:\s]*(\d+)',
+        r'depth[:\s]*(\d+)'
+    ]
+    for pattern in depth_patterns:
+        match = re.search(pattern, content, re.IGNORECASE)
+        if match:
+            metrics['application_depth'] = int(match.group(1))
+            break
+    
+    time_patterns = [
+        r'\*\s*\*\*estimated\s+time\s+to\s+solve\*\*[:\s]*([^\n\r]+)',
+        r'estimated\s+time[:\s]*([^\n\r]+)',
+        r'time\s+to\s+solve[:\s]*([^\n\r]+)',
+        r'(\d+)\s*minutes?'
+    ]
+    for pattern in time_patterns:
+        match = re.search(pattern, content, re.IGNORECASE)
+        if match:
+            time_str = match.group(1).strip()
+            time_str = re.sub(r'\*+', '', time_str)
+            metrics['estimated_time_to_solve'] = time_str if 'minute' in time_str else f"{time_str} minutes"
+            break
+    
+    explanation_patterns = [
+        r'\*\s*\*\*brief\s+explanation\*\*[:\s]*([^\n\r*]+)',
+        r'brief\s+explanation[:\s]*([^\n\r*]+)',
+        r'explanation[:\s]*([^\n\r*]+)'
+    ]
+    for pattern in explanation_patterns:
+        match = re.search(pattern, content, re.IGNORECASE)
+        if match:
+            explanation = match.group(1).strip()
+            explanation = re.sub(r'\*+', '', explanation)
+            metrics['explanation'] = explanation
+            break
+    
+    difficulty_score = metrics.get('difficulty_score', 5)
+    application_depth = metrics.get('application_depth', 3)
+    
+    complexity_index = min(10, max(1, application_depth * 2))
+    metrics['complexity_index'] = round(complexity_index, 1)
+    
+    metrics.setdefault('difficulty_label', 'Moderate')
+    metrics.setdefault('difficulty_score', 6.0)
+    metrics.setdefault('syllabus_alignment_score', 7.0)
+    metrics.setdefault('cognitive_level', 'Apply')
+    metrics.setdefault('application_depth', 3)
+    metrics.setdefault('estimated_time_to_solve', '15 minutes')
+    metrics.setdefault('explanation', 'Analysis completed for this question.')
+    
+    return metrics
+
+def split_blocks(analysis):
+    parts = re.split(r'\*\*Question[:\s]*([^*]+)\*\*', analysis)
+    return [(parts[i].strip(), parts[i + 1].strip()) for i in range(1, len(parts) - 1, 2)]
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the regex cascade with the single-pass metric extractor")
+    parser.add_argument("--questions", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--drift", type=float, default=0.2, help="share of blocks that stray from the bullet format")
+    args = parser.parse_args()
+
+    print(f"{'questions':>9} {'cascade s':>10} {'single-pass s':>14} {'speedup':>8} {'parse_multiple s':>17}")
+    for questions in args.questions:
+        analysis = make_analysis(questions, drift=args.drift)
+        blocks = split_blocks(analysis)
+
+        legacy = [legacy_extract_question_metrics(qid, content, "bench") for qid, content in blocks]
+        current = [extract_question_metrics(qid, content, "bench") for qid, content in blocks]
+        assert legacy == current, "single-pass extractor diverged from the cascade"
+
+        legacy_seconds = best_of(lambda: [legacy_extract_question_metrics(q, c, "bench") for q, c in blocks], args.repeat)
+        current_seconds = best_of(lambda: [extract_question_metrics(q, c, "bench") for q, c in blocks], args.repeat)
+        parse_seconds = best_of(lambda: parse_multiple_question_analysis(analysis, "bench"), args.repeat)
+        print(f"{questions:>9} {legacy_seconds:>10.3f} {current_seconds:>14.3f} {legacy_seconds / current_seconds:>7.1f}x {parse_seconds:>17.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import sys
+import os
+import math
+import time
+import random
+import argparse
+from collections import Counter
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.context_selector import tokenize
+from utils.objective_matcher import ObjectiveMatcher, split_objectives
+from benchmarks.synthetic import TOPICS, make_question_paper_text
+
+VERBS = ["Design", "Apply", "Analyze", "Evaluate", "Explain", "Compare", "Implement", "Optimize"]
+CONTEXTS = ["relational schemas", "transaction workloads", "library management systems", "distributed storage", "query plans"]
+
+# the substring matcher as it was before the batch rewrite, kept as the comparison point
+def legacy_match_objectives_to_question(objectives, question):
+    matched = []
+    for obj in objectives.split("\n"):
+        if any(word in question for word in obj.split()):
+            matched.append(obj)
+    return matched
+
+# the same cosine scores computed pair by pair, re-tokenizing every objective for every question
+def pairwise_scores(matcher, questions):
+    scores = []
+    for question in questions:
+        question_weights = matcher.weights(Counter(tokenize(question)))
+        row = {}
+        for index, objective in enumerate(matcher.objectives):
+            objective_weights = matcher.weights(Counter(tokenize(objective)))
+            score = sum(weight * objective_weights.get(term, 0.0) for term, weight in question_weights.items())
+            if score:
+                row[index] = score
+        scores.append(row)
+    return scores
+
+def make_objectives(count, seed=0):
+    rng = random.Random(seed)
+    return "\n".join(
+        f"{rng.choice(VERBS)} {rng.choice(TOPICS).lower()} for {rng.choice(CONTEXTS)}"
+        for _ in range(count)
+    )
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-question objective matching with the batch sparse matcher")
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--objectives", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    objectives = make_objectives(args.objectives)
+    questions = make_question_paper_text(args.questions).split("\n")[1:]
+
+    matcher = ObjectiveMatcher(objectives)
+    reference = pairwise_scores(matcher, questions)
+    batch = matcher.scores(questions)
+    for expected, actual in zip(reference, batch):
+        assert expected.keys() == actual.keys()
+        assert all(math.isclose(expected[index], actual[index]) for index in expected), "batch scores diverged"
+
+    legacy_seconds = best_of(lambda: [legacy_match_objectives_to_question(objectives, q) for q in questions], args.repeat)
+    pairwise_seconds = best_of(lambda: pairwise_scores(ObjectiveMatcher(objectives), questions), args.repeat)
+    batch_seconds = best_of(lambda: ObjectiveMatcher(objectives).match(questions), args.repeat)
+
+    legacy_matches = sum(len(legacy_match_objectives_to_question(objectives, q)) for q in questions)
+    batch_matches = sum(len(matches) for matches in matcher.match(questions))
+    pairs = args.questions * len(split_objectives(objectives))
+    print(f"{args.questions} questions x {len(matcher.objectives)} objectives ({pairs} pairs)")
+    print(f"{'matcher':<22} {'seconds':>9} {'matched pairs':>14}")
+    print(f"{'legacy substring':<22} {legacy_seconds:>9.4f} {legacy_matches:>14}")
+    print(f"{'pairwise scoring':<22} {pairwise_seconds:>9.4f} {batch_matches:>14}")
+    print(f"{'batch sparse':<22} {batch_seconds:>9.4f} {batch_matches:>14}")
+    print(f"batch speedup over pairwise scoring: {pairwise_seconds / batch_seconds:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import sys
+import os
+import time
+import argparse
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz
+from utils import pdf_parser
+from benchmarks.synthetic import make_pdf_file
+
+# the pre-streaming implementation, kept here as the comparison point
+def extract_text_concat(pdf_path):
+    text = ""
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            text += page.get_text()
+    return text
+
+def time_call(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PDF extraction strategies on synthetic PDFs")
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 400, 1000])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # measure raw parsing, not cache lookups
+    pdf_parser.PDF_CACHE_ENABLED = False
+
+    print(f"{'pages':>6} {'strategy':<22} {'seconds':>9} {'pages/s':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for pages in args.pages:
+            path = os.path.join(directory, f"synthetic_{pages}.pdf")
+            make_pdf_file(path, pages)
+
+            strategies = [
+                ("concat (original)", lambda: extract_text_concat(path)),
+                ("streaming join", lambda: "".join(pdf_parser.iter_page_text(path))),
+                (f"process pool x{args.workers}", lambda: pdf_parser.extract_text_parallel(path, args.workers)),
+            ]
+
+            baseline_seconds = None
+            baseline_text = None
+            for name, fn in strategies:
+                seconds, text = time_call(fn, args.repeat)
+                if baseline_seconds is None:
+                    baseline_seconds, baseline_text = seconds, text
+                assert text == baseline_text, f"{name} produced different text"
+                print(f"{pages:>6} {name:<22} {seconds:>9.3f} {pages / seconds:>10.0f} {baseline_seconds / seconds:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
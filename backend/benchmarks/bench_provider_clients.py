@@ -0,0 +1,95 @@
+import sys
+import os
+import json
+import time
+import socket
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from openai import OpenAI
+
+COMPLETION = json.dumps({
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "stub",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "**Question: Q1**"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+}).encode("utf-8")
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # headers and body go out in separate writes; avoid Nagle stalls on keep-alive
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(COMPLETION)))
+        self.end_headers()
+        self.wfile.write(COMPLETION)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1"
+
+def per_call_ms(fn, calls):
+    fn()
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) * 1000 / calls
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call overhead of fresh vs pooled provider clients")
+    parser.add_argument("--calls", type=int, default=300)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server()
+
+    # ai_logic reads its endpoints at import time
+    os.environ.update({
+        "OPENAI_BASE_URL": base_url,
+        "OPENAI_API_KEY": "bench",
+        "OPENROUTER_BASE_URL": base_url,
+        "OPENROUTER_API_KEY": "bench",
+    })
+    import ai_logic
+
+    headers = {"Authorization": "Bearer bench", "Content-Type": "application/json"}
+    body = {"model": "stub", "messages": [{"role": "user", "content": "ping"}], "max_tokens": 2000}
+
+    def fresh_requests_post():
+        requests.post(f"{base_url}/chat/completions", headers=headers, json=body, timeout=60).json()
+
+    def fresh_openai_client():
+        client = OpenAI(base_url=base_url, api_key="bench")
+        client.chat.completions.create(model="stub", messages=body["messages"], max_tokens=2000)
+
+    scenarios = [
+        ("openai/groq/hf", "requests.post per call", fresh_requests_post),
+        ("openai/groq/hf", "pooled session", lambda: ai_logic.analyze_with_openai("ping", ai_logic.provider_config("openai"))),
+        ("openrouter", "OpenAI() per call", fresh_openai_client),
+        ("openrouter", "pooled client", lambda: ai_logic.analyze_with_openrouter("ping", ai_logic.provider_config("openrouter"))),
+    ]
+
+    print(f"{'provider path':<16} {'client':<24} {'ms/call':>8}")
+    for provider, name, fn in scenarios:
+        print(f"{provider:<16} {name:<24} {per_call_ms(fn, args.calls):>8.2f}")
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
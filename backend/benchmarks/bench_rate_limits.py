@@ -0,0 +1,84 @@
+import sys
+import os
+import math
+import time
+import argparse
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+
+import ai_logic
+from benchmarks import fake_provider
+from utils.rate_limiter import ProviderLimiter, ProviderOverloaded
+
+PROMPT = "Generate 5 questions on relational schemas."
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+def run(provider, limiter, clients, seconds):
+    # every client calls back to back for the whole run, like a burst of users that never lets up
+    ai_logic.provider_limits.set("fake", limiter)
+    provider.throttled = 0
+    lock = threading.Lock()
+    ok_latencies = []
+    counts = {"ok": 0, "throttled": 0, "refused": 0}
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                result = ai_logic.invoke_provider("fake", PROMPT)
+                outcome = "throttled" if ai_logic.is_provider_error(result) else "ok"
+            except ProviderOverloaded:
+                outcome = "refused"
+            elapsed = time.perf_counter() - start
+            with lock:
+                counts[outcome] += 1
+                if outcome == "ok":
+                    ok_latencies.append(elapsed)
+            if outcome == "refused":
+                # a refused client backs off briefly rather than spinning
+                time.sleep(0.05)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    return counts, wall, ok_latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Goodput against a provider with a fixed capacity, with and without the limiter")
+    parser.add_argument("--capacity", type=int, default=8, help="calls the fake provider serves at once")
+    parser.add_argument("--latency", type=float, default=0.1, help="fake provider seconds per call")
+    parser.add_argument("--clients", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--max-queue", type=int, default=32)
+    args = parser.parse_args()
+
+    provider = fake_provider.install(fake_provider.FakeProvider(latency=args.latency, capacity=args.capacity))
+    ceiling = args.capacity / args.latency
+    print(f"provider capacity {args.capacity} calls at {args.latency * 1000:.0f} ms: ceiling {ceiling:.0f} ok/s")
+    print(f"{'limiter':>8} {'clients':>8} {'ok/s':>8} {'throttled':>10} {'refused':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    try:
+        for clients in args.clients:
+            for label, limiter in (
+                ("off", ProviderLimiter("fake", 0, max_queue=10 ** 9)),
+                ("on", ProviderLimiter("fake", args.capacity, max_queue=args.max_queue, max_wait=args.latency * 20))
+            ):
+                counts, wall, latencies = run(provider, limiter, clients, args.seconds)
+                print(f"{label:>8} {clients:>8} {counts['ok'] / wall:>8.1f} {counts['throttled']:>10} {counts['refused']:>8} "
+                      f"{percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 95) * 1000:>8.0f}")
+    finally:
+        fake_provider.uninstall()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import sys
+import os
+import math
+import time
+import random
+import argparse
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
+from werkzeug.security import generate_password_hash
+
+PASSWORD = "benchmark-password"
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+def timings(fn, samples):
+    values = []
+    for number in range(samples):
+        start = time.perf_counter()
+        fn(number)
+        values.append((time.perf_counter() - start) * 1000)
+    return values
+
+def report(label, values):
+    print(f"{label:<44} {percentile(values, 50):>8.2f} {percentile(values, 95):>8.2f} {max(values):>8.2f}")
+
+def seed_users(collection, count, password_hash, batch=10000):
+    for start in range(0, count, batch):
+        collection.insert_many([
+            {
+                'username': f"user{number:07d}",
+                'email': f"user{number:07d}@example.edu",
+                'password': password_hash,
+                'createdAt': datetime.utcnow(),
+                'isActive': True
+            }
+            for number in range(start, min(start + batch, count))
+        ], ordered=False)
+
+def legacy_register(collection, username, email, password_hash):
+    # the pre-index flow: an $or lookup, then the insert
+    existing = collection.find_one({'$or': [{'email': email}, {'username': username}]})
+    if existing:
+        return False
+    collection.insert_one({'username': username, 'email': email, 'password': password_hash, 'createdAt': datetime.utcnow(), 'isActive': True})
+    return True
+
+def indexed_register(collection, username, email, password_hash):
+    try:
+        collection.insert_one({'username': username, 'email': email, 'password': password_hash, 'createdAt': datetime.utcnow(), 'isActive': True})
+        return True
+    except DuplicateKeyError:
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Login and registration latency against a users collection with and without indexes (needs MongoDB at MONGO_URI)")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--samples", type=int, default=300)
+    parser.add_argument("--database", default="question_difficulty_bench")
+    parser.add_argument("--keep", action="store_true", help="leave the benchmark database in place")
+    args = parser.parse_args()
+
+    import app as app_module
+    client = MongoClient(app_module.MONGO_URI, **app_module.mongo_client_options())
+    collection = client[args.database]["users"]
+    collection.drop()
+
+    # a cheap hash keeps seeding fast and stops password checks from hiding database time
+    password_hash = generate_password_hash(PASSWORD, method="pbkdf2:sha256:1000")
+    start = time.perf_counter()
+    seed_users(collection, args.users, password_hash)
+    print(f"Seeded {args.users} users in {time.perf_counter() - start:.1f}s\n")
+
+    rng = random.Random(0)
+    existing = [f"user{rng.randrange(args.users):07d}" for _ in range(args.samples)]
+    print(f"{'operation (ms)':<44} {'p50':>8} {'p95':>8} {'max':>8}")
+
+    try:
+        report("login lookup, no index", timings(lambda n: collection.find_one({'username': existing[n]}), args.samples))
+        report("register ($or find + insert), no index", timings(
+            lambda n: legacy_register(collection, f"legacy{n}", f"legacy{n}@example.edu", password_hash), args.samples
+        ))
+
+        app_module.users_collection = collection
+        app_module.ensure_user_indexes()
+        report("login lookup, unique index", timings(
+            lambda n: collection.find_one({'username': existing[n]}, {'username': 1, 'email': 1, 'password': 1}), args.samples
+        ))
+        report("register (single insert), unique index", timings(
+            lambda n: indexed_register(collection, f"fresh{n}", f"fresh{n}@example.edu", password_hash), args.samples
+        ))
+        report("register duplicate (DuplicateKeyError)", timings(
+            lambda n: indexed_register(collection, existing[n], f"other{n}@example.edu", password_hash), args.samples
+        ))
+
+        # whole endpoints; registration includes the default (deliberately slow) password hash
+        http = app_module.app.test_client()
+        report("POST /api/auth/login", timings(
+            lambda n: http.post("/api/auth/login", json={'username': existing[n], 'password': PASSWORD}), args.samples
+        ))
+        report("POST /api/register", timings(
+            lambda n: http.post("/api/register", json={'username': f"http{n}", 'email': f"http{n}@example.edu", 'password': PASSWORD}),
+            args.samples
+        ))
+        report("POST /api/register, taken username", timings(
+            lambda n: http.post("/api/register", json={'username': existing[n], 'email': f"taken{n}@example.edu", 'password': PASSWORD}),
+            args.samples
+        ))
+    finally:
+        if not args.keep:
+            client.drop_database(args.database)
+        client.close()
+
+if __name__ == "__main__":
+    main()
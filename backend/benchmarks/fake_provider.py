@@ -0,0 +1,105 @@
+import re
+import time
+import random
+import threading
+from contextlib import contextmanager
+from benchmarks.synthetic import make_analysis_for_ids, make_generated_paper
+
+QUESTION_ID_PATTERN = re.compile(r'^[ \t]*(Q\d+[A-Za-z]?)\b', re.MULTILINE)
+
+class FakeProvider:
+    # deterministic stand-in for analyze_with_*: answers in the **Question: X** format
+    # for analysis prompts and with a numbered paper for generation prompts
+    # with a capacity, calls beyond that many in flight are throttled the way a real API does
+    def __init__(self, latency=0.0, jitter=0.0, questions=10, seed=0, capacity=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.questions = questions
+        self.seed = seed
+        self.capacity = capacity
+        self.calls = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+    def _sleep(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+
+    def _admit(self):
+        with self._lock:
+            if self.capacity and self.in_flight >= self.capacity:
+                self.throttled += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def _leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def respond(self, prompt):
+        if "QUESTION PAPER TO ANALYZE:" in prompt:
+            paper = prompt.split("QUESTION PAPER TO ANALYZE:", 1)[1].split("TASK:", 1)[0]
+            ids = QUESTION_ID_PATTERN.findall(paper) or [f"Q{number}" for number in range(1, self.questions + 1)]
+            return make_analysis_for_ids(ids, seed=self.seed)
+        return make_generated_paper(self.questions, seed=self.seed)
+
+    def __call__(self, prompt, config=None):
+        if not self._admit():
+            return "Error from Fake: 429 - rate limit exceeded"
+        try:
+            self._sleep()
+        finally:
+            self._leave()
+        return self.respond(prompt)
+
+    def stream(self, prompt, config=None):
+        if not self._admit():
+            yield "Error from Fake: 429 - rate limit exceeded"
+            return
+        try:
+            self._sleep()
+        finally:
+            self._leave()
+        for line in self.respond(prompt).splitlines(keepends=True):
+            yield line
+
+# ai_logic is imported lazily so the mock server can set *_BASE_URL before it loads
+def install(provider, name="fake"):
+    import ai_logic
+    ai_logic.AI_PROVIDERS[name] = provider
+    ai_logic.STREAM_PROVIDERS[name] = provider.stream
+    ai_logic.AI_PROVIDER_MODELS[name] = f"{name}-model"
+    ai_logic.PROVIDER_PARAMS[name] = {"max_tokens": 2000}
+    return provider
+
+def uninstall(name="fake"):
+    import ai_logic
+    for registry in (ai_logic.AI_PROVIDERS, ai_logic.STREAM_PROVIDERS, ai_logic.AI_PROVIDER_MODELS, ai_logic.PROVIDER_PARAMS):
+        registry.pop(name, None)
+
+@contextmanager
+def patched_provider(name, provider=None, stream=None):
+    # swaps a registered provider's call and/or stream function for the block, with the
+    # LLM cache emptied on the way in and out so no fake answer outlives it
+    import ai_logic
+    original = ai_logic.AI_PROVIDERS.get(name), ai_logic.STREAM_PROVIDERS.get(name)
+    if provider is not None:
+        ai_logic.AI_PROVIDERS[name] = provider
+    if stream is not None:
+        ai_logic.STREAM_PROVIDERS[name] = stream
+    ai_logic.llm_cache.clear()
+    try:
+        yield provider
+    finally:
+        for registry, function in zip((ai_logic.AI_PROVIDERS, ai_logic.STREAM_PROVIDERS), original):
+            if function is None:
+                registry.pop(name, None)
+            else:
+                registry[name] = function
+        ai_logic.llm_cache.clear()
@@ -0,0 +1,143 @@
+import sys
+import os
+import math
+import time
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from benchmarks.synthetic import make_text_pdf_bytes, make_syllabus_text, make_question_paper_text
+
+ENDPOINTS = ["analyze", "generate", "analyze/stream", "generate/stream"]
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+def start_local_app(args):
+    # the mock must be configured before ai_logic reads its *_BASE_URL settings
+    from benchmarks.mock_llm_server import start_mock_server
+    mock = start_mock_server(
+        latency=args.mock_latency,
+        jitter=args.mock_jitter,
+        error_rate=args.mock_error_rate,
+        chunk_delay=args.mock_chunk_delay,
+        questions=args.questions
+    )
+    os.environ.update(mock.provider_env())
+    os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+    os.environ.setdefault("PDF_CACHE_ENABLED", "false")
+    # repeated /analyze requests would otherwise be answered from MongoDB
+    os.environ.setdefault("RESULTS_STORE_ENABLED", "false")
+
+    from werkzeug.serving import make_server
+    from app import app
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return mock, server, f"http://127.0.0.1:{server.server_port}"
+
+class LoadDriver:
+    def __init__(self, url, ai_model, endpoints, syllabus_pdf, question_pdf, timeout):
+        self.url = url.rstrip("/")
+        self.ai_model = ai_model
+        self.endpoints = endpoints
+        self.syllabus_pdf = syllabus_pdf
+        self.question_pdf = question_pdf
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def session(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def send(self, number):
+        endpoint = self.endpoints[number % len(self.endpoints)]
+        files = {"syllabus": ("syllabus.pdf", self.syllabus_pdf, "application/pdf")}
+        if endpoint.startswith("analyze"):
+            files["question_pdf"] = ("paper.pdf", self.question_pdf, "application/pdf")
+        data = {"ai_model": self.ai_model, "objectives": "Design relational schemas\nApply normalization"}
+
+        start = time.perf_counter()
+        try:
+            response = self.session().post(f"{self.url}/{endpoint}", files=files, data=data, timeout=self.timeout)
+            body = response.text
+            if response.status_code != 200:
+                outcome = f"http {response.status_code}"
+            elif endpoint.endswith("/stream"):
+                outcome = "error event" if "event: error" in body else "ok"
+            else:
+                payload = response.json()
+                text = str(payload.get("analysis", payload.get("questions", "")))
+                failed = "error" in payload or text.startswith("Error")
+                outcome = "error payload" if failed else "ok"
+        except requests.RequestException as e:
+            outcome = type(e).__name__
+        return endpoint, outcome, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent multipart load against /analyze and /generate")
+    parser.add_argument("--url", help="base URL of a running app; omitted starts the app and a mock LLM in-process")
+    parser.add_argument("--ai-model", default="openrouter")
+    parser.add_argument("--endpoints", nargs="+", default=["analyze", "generate"], choices=ENDPOINTS)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--units", type=int, default=20, help="units in the synthetic syllabus")
+    parser.add_argument("--questions", type=int, default=10, help="questions in the synthetic paper")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--mock-latency", type=float, default=0.2)
+    parser.add_argument("--mock-jitter", type=float, default=0.1)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--mock-chunk-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    mock = server = None
+    url = args.url
+    if not url:
+        mock, server, url = start_local_app(args)
+
+    driver = LoadDriver(
+        url,
+        args.ai_model,
+        args.endpoints,
+        make_text_pdf_bytes(make_syllabus_text(args.units)),
+        make_text_pdf_bytes(make_question_paper_text(args.questions)),
+        args.timeout
+    )
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(driver.send, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {elapsed:.2f}s, {args.requests / elapsed:.1f} req/s")
+    if mock:
+        print(f"mock upstream received {mock.requests} calls")
+    print(f"\n{'endpoint':<18} {'count':>6} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for endpoint in args.endpoints + ["all"]:
+        rows = [r for r in results if endpoint in ("all", r[0])]
+        if not rows:
+            continue
+        latencies = [r[2] * 1000 for r in rows]
+        errors = sum(1 for r in rows if r[1] != "ok")
+        print(
+            f"{endpoint:<18} {len(rows):>6} {errors / len(rows):>6.1%} "
+            f"{percentile(latencies, 50):>9.1f} {percentile(latencies, 95):>9.1f} "
+            f"{percentile(latencies, 99):>9.1f} {max(latencies):>9.1f}"
+        )
+
+    failures = Counter(r[1] for r in results if r[1] != "ok")
+    if failures:
+        print("\nfailures: " + ", ".join(f"{name} x{count}" for name, count in failures.most_common()))
+
+    if server:
+        server.shutdown()
+        mock.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import sys
+import os
+import json
+import time
+import random
+import socket
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_provider import FakeProvider
+
+# providers served by the mock and the env vars that point ai_logic at it
+BASE_URL_VARS = {
+    "openai": ("OPENAI_BASE_URL", "OPENAI_API_KEY", "/v1"),
+    "openrouter": ("OPENROUTER_BASE_URL", "OPENROUTER_API_KEY", "/v1"),
+    "groq": ("GROQ_BASE_URL", "GROQ_API_KEY", "/v1"),
+    "huggingface": ("HUGGINGFACE_BASE_URL", "HUGGINGFACE_API_KEY", "/models"),
+}
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self.send_json(200, {"object": "list", "data": [{"id": "mock-model", "object": "model"}]})
+        else:
+            self.send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        settings = self.server.settings
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.server.count_request()
+
+        delay = settings["latency"] + (self.server.rng_uniform(0, settings["jitter"]) if settings["jitter"] else 0.0)
+        if delay:
+            time.sleep(delay)
+
+        if settings["error_rate"] and self.server.rng_uniform(0, 1) < settings["error_rate"]:
+            status = self.server.rng_choice([429, 500, 503])
+            self.send_json(status, {"error": {"message": f"mock upstream error {status}", "type": "mock_error", "code": status}})
+            return
+
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+            content = self.server.provider.respond(prompt)
+            if request.get("stream"):
+                self.stream_completion(request.get("model", "mock-model"), content, settings["chunk_delay"])
+            else:
+                self.send_json(200, {
+                    "id": "chatcmpl-mock",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "mock-model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4, "total_tokens": (len(prompt) + len(content)) // 4}
+                })
+        else:
+            # Hugging Face inference API shape: POST /models/<model> with {"inputs": ...}
+            content = self.server.provider.respond(request.get("inputs", ""))
+            self.send_json(200, [{"generated_text": content}])
+
+    def stream_completion(self, model, content, chunk_delay):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        event({"role": "assistant", "content": ""})
+        for line in content.splitlines(keepends=True):
+            event({"content": line})
+            if chunk_delay:
+                time.sleep(chunk_delay)
+        event({}, "stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, error_rate=0.0, chunk_delay=0.0, questions=10, seed=0):
+        super().__init__(address, MockLLMHandler)
+        self.settings = {"latency": latency, "jitter": jitter, "error_rate": error_rate, "chunk_delay": chunk_delay}
+        self.provider = FakeProvider(questions=questions, seed=seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def rng_uniform(self, low, high):
+        with self._lock:
+            return self._rng.uniform(low, high)
+
+    def rng_choice(self, options):
+        with self._lock:
+            return self._rng.choice(options)
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_port}"
+
+    def provider_env(self, api_key="mock"):
+        env = {}
+        for base_var, key_var, path in BASE_URL_VARS.values():
+            env[base_var] = self.url + path
+            env[key_var] = api_key
+        return env
+
+def start_mock_server(host="127.0.0.1", port=0, **settings):
+    server = MockLLMServer((host, port), **settings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds before each response starts")
+    parser.add_argument("--jitter", type=float, default=0.2, help="extra random latency up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429/500/503")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="seconds between streamed chunks")
+    parser.add_argument("--questions", type=int, default=10, help="questions in generated papers")
+    args = parser.parse_args()
+
+    server = MockLLMServer(
+        (args.host, args.port),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        chunk_delay=args.chunk_delay,
+        questions=args.questions
+    )
+    print("Mock LLM server listening. Point the app at it with:")
+    for name, value in server.provider_env().items():
+        print(f"  export {name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
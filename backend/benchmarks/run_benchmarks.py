@@ -0,0 +1,144 @@
+import sys
+import os
+import io
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# a stored analysis would answer every repeat of /analyze and hide the pipeline being timed
+os.environ.setdefault("RESULTS_STORE_ENABLED", "false")
+
+import ai_logic
+from utils import pdf_parser
+from utils.context_selector import SectionIndex
+from utils.objective_matcher import ObjectiveMatcher
+from benchmarks import fake_provider
+from benchmarks.bench_objective_matching import make_objectives
+from benchmarks.synthetic import (
+    make_pdf_bytes, make_text_pdf_bytes, make_syllabus_text, make_question_paper_text, make_analysis
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+def measure(fn, repeat):
+    fn()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # memory is traced in a separate run so tracing overhead does not skew the timings
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "peak_kb": peak / 1024}
+
+def build_cases(args):
+    syllabus_text = make_syllabus_text(args.units)
+    question_text = make_question_paper_text(args.questions)
+    analysis = make_analysis(args.questions)
+    key_topics = ai_logic.extract_key_topics(syllabus_text)
+    objectives = make_objectives(50)
+    questions = ai_logic.split_questions(question_text)
+    pdf_bytes = make_pdf_bytes(args.pages)
+    syllabus_pdf = make_text_pdf_bytes(syllabus_text)
+    question_pdf = make_text_pdf_bytes(question_text)
+
+    from app import app
+    client = app.test_client()
+
+    def post_analyze():
+        response = client.post("/analyze", data={
+            "syllabus": (io.BytesIO(syllabus_pdf), "syllabus.pdf"),
+            "question_pdf": (io.BytesIO(question_pdf), "paper.pdf"),
+            "objectives": "Design relational schemas\nApply normalization",
+            "ai_model": "fake",
+        }, content_type="multipart/form-data")
+        assert response.status_code == 200, response.data
+
+    def post_generate():
+        response = client.post("/generate", data={
+            "syllabus": (io.BytesIO(syllabus_pdf), "syllabus.pdf"),
+            "objectives": "Design relational schemas",
+            "ai_model": "fake",
+        }, content_type="multipart/form-data")
+        assert response.status_code == 200, response.data
+
+    return [
+        (f"extract_text[{args.pages}p]", lambda: pdf_parser.extract_text_from_bytes(pdf_bytes)),
+        (f"extract_key_topics[{args.units}u]", lambda: ai_logic.extract_key_topics(syllabus_text)),
+        (f"smart_truncate[{len(syllabus_text) // 1024}kB]", lambda: ai_logic.smart_truncate(syllabus_text, 4000, key_topics)),
+        (f"select_context[{len(syllabus_text) // 1024}kB]", lambda: SectionIndex.from_text(syllabus_text).select(question_text, 1500)),
+        (f"match_objectives[{len(questions)}qx50o]", lambda: ObjectiveMatcher(objectives).match(questions)),
+        (f"parse_multiple_question_analysis[{args.questions}q]", lambda: ai_logic.parse_multiple_question_analysis(analysis, "fake")),
+        (f"generate_question_difficulty_metrics[x{args.questions}]", lambda: [
+            ai_logic.generate_question_difficulty_metrics(level, str(score % 10), "gemini")
+            for score, level in enumerate(["easy", "moderate", "tough"] * (args.questions // 3 + 1))
+        ]),
+        ("POST /analyze", post_analyze),
+        ("POST /generate", post_generate),
+    ]
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous and result["seconds"] > previous["seconds"] * (1 + threshold):
+            regressions.append((name, previous["seconds"], result["seconds"]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the analysis pipeline")
+    parser.add_argument("--pages", type=int, default=100, help="pages in the synthetic PDF for extract_text")
+    parser.add_argument("--units", type=int, default=200, help="units in the synthetic syllabus")
+    parser.add_argument("--questions", type=int, default=500, help="questions in the synthetic paper and analysis")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the fake provider sleeps per call")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--with-cache", action="store_true", help="keep the PDF and LLM caches enabled")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown vs baseline before failing")
+    args = parser.parse_args()
+
+    if not args.with_cache:
+        pdf_parser.PDF_CACHE_ENABLED = False
+        ai_logic.LLM_CACHE_ENABLED = False
+    fake_provider.install(fake_provider.FakeProvider(latency=args.latency, questions=args.questions))
+
+    results = {}
+    print(f"{'benchmark':<48} {'ms':>10} {'peak kB':>10}")
+    for name, fn in build_cases(args):
+        results[name] = measure(fn, args.repeat)
+        print(f"{name:<48} {results[name]['seconds'] * 1000:>10.2f} {results[name]['peak_kb']:>10.0f}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "created": datetime.utcnow().isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "args": vars(args),
+                "results": results
+            }, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms")
+        if regressions:
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
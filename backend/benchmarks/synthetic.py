@@ -0,0 +1,100 @@
+import random
+import fitz
+
+LEVELS = ['Remember', 'Understand', 'Apply', 'Analyze', 'Evaluate', 'Create']
+LABELS = ['Easy', 'Moderate', 'Tough']
+TOPICS = [
+    "Relational algebra", "Functional dependencies", "Normal forms", "Transactions",
+    "Concurrency control", "Indexing and hashing", "Query optimization", "Recovery systems",
+    "E-R modelling", "SQL joins", "Distributed databases", "NoSQL data models",
+]
+
+PARAGRAPH = (
+    "Unit {unit}: Relational database design covers functional dependencies, "
+    "normal forms, lossless decomposition and dependency preservation. Students "
+    "apply closure algorithms to find candidate keys and evaluate trade-offs "
+    "between normalization and query performance on realistic schemas. "
+)
+
+def make_pdf_document(pages, paragraph_repeat=12):
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(page.rect + (40, 40, -40, -40), PARAGRAPH.format(unit=number + 1) * paragraph_repeat, fontsize=9)
+    return doc
+
+def make_pdf_file(path, pages):
+    doc = make_pdf_document(pages)
+    doc.save(path)
+    doc.close()
+
+def make_pdf_bytes(pages, paragraph_repeat=12):
+    doc = make_pdf_document(pages, paragraph_repeat)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def make_text_pdf_bytes(text, lines_per_page=60):
+    doc = fitz.open()
+    lines = text.split("\n")
+    for start in range(0, max(1, len(lines)), lines_per_page):
+        page = doc.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), "\n".join(lines[start:start + lines_per_page]), fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def make_syllabus_text(units, seed=0):
+    rng = random.Random(seed)
+    sections = []
+    for unit in range(1, units + 1):
+        topic = TOPICS[(unit - 1) % len(TOPICS)]
+        subtopics = ", ".join(rng.sample(TOPICS, 3))
+        sections.append(
+            f"Unit {unit}: {topic}\n"
+            f"Topic {unit}.1: Foundations of {topic.lower()} and related {subtopics.lower()}.\n"
+            f"{PARAGRAPH.format(unit=unit)}\n"
+        )
+    return "\n".join(sections)
+
+def make_question_paper_text(questions, seed=0):
+    rng = random.Random(seed)
+    lines = ["Answer all questions. Marks are shown in brackets."]
+    for number in range(1, questions + 1):
+        topic = rng.choice(TOPICS)
+        lines.append(f"Q{number}. Explain {topic.lower()} and apply it to a library management schema. [{rng.randint(5, 15)}]")
+    return "\n".join(lines)
+
+def make_question_block(rng, question_id, drift=0.0):
+    lines = [
+        f"**Question: {question_id}**",
+        f"*   **Difficulty Label**: {rng.choice(LABELS)}",
+        f"*   **Difficulty Score**: {rng.randint(1, 10)}",
+        f"*   **Syllabus Alignment Score**: {rng.randint(1, 10)} (Aligns with Unit {rng.randint(1, 8)}.)",
+        f"*   **Bloom's Taxonomy Level**: {rng.choice(LEVELS)}",
+        f"*   **Application Depth**: {rng.randint(1, 5)} (Requires applying concepts to a scenario.)",
+        f"*   **Estimated Time to Solve**: {rng.randint(5, 45)} minutes",
+        "*   **Brief Explanation**: The question asks students to apply the closure algorithm "
+        "to a schema and justify each step, which goes beyond recall.",
+    ]
+    # a share of blocks drift from the requested format to exercise fallback parsing
+    if rng.random() < drift:
+        del lines[rng.randint(1, len(lines) - 1)]
+    if rng.random() < drift / 2:
+        lines[2] = f"Difficulty score {rng.randint(1, 10)}/10"
+    return "\n".join(lines)
+
+def make_analysis(questions, seed=0, drift=0.2):
+    rng = random.Random(seed)
+    return "\n\n".join(make_question_block(rng, f"Q{number}", drift) for number in range(1, questions + 1))
+
+def make_analysis_for_ids(question_ids, seed=0):
+    rng = random.Random(seed)
+    return "\n\n".join(make_question_block(rng, question_id) for question_id in question_ids)
+
+def make_generated_paper(questions, difficulty_level="moderate", seed=0):
+    rng = random.Random(seed)
+    lines = [f"Instructions: Answer all questions. Difficulty: {difficulty_level}."]
+    for number in range(1, questions + 1):
+        lines.append(f"Q{number}. Analyze {rng.choice(TOPICS).lower()} for a university records system. ({rng.randint(5, 15)} marks)")
+    return "\n".join(lines)
@@ -0,0 +1,54 @@
+import sys
+import os
+import io
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bson import ObjectId
+from app import app
+from utils import auth
+from test_cache import make_pdf
+from benchmarks.fake_provider import patched_provider
+
+USER = {"_id": ObjectId(), "username": "ada"}
+
+def test_tokens_verify_without_the_database_and_reject_tampering():
+    auth.verified_tokens.clear()
+    token = auth.issue_token(USER)
+    assert auth.verify_token(token) == {"sub": str(USER["_id"]), "username": "ada"}
+    assert auth.verified_tokens.get(token) is not None
+
+    assert auth.verify_token(token[:-2] + ("A" if token[-2] != "A" else "B") + token[-1]) is None
+    other_key = auth.URLSafeTimedSerializer("another-secret", salt=auth.TOKEN_SALT).dumps({"sub": "x", "username": "x"})
+    assert auth.verify_token(other_key) is None
+
+    # an expired token is refused even when an earlier check is still cached
+    original_ttl = auth.ACCESS_TOKEN_TTL
+    auth.ACCESS_TOKEN_TTL = -1
+    try:
+        auth.verified_tokens.clear()
+        assert auth.verify_token(auth.issue_token(USER)) is None
+        auth.verified_tokens.set(token, ({"sub": "stale", "username": "stale"}, 0))
+        assert auth.verify_token(token) is None
+    finally:
+        auth.ACCESS_TOKEN_TTL = original_ttl
+        auth.verified_tokens.clear()
+
+def test_generate_accepts_a_token_and_refuses_a_bad_one():
+    client = app.test_client()
+    post = lambda headers: client.post("/generate", data={
+        "syllabus": (io.BytesIO(make_pdf(["Unit 1: Heaps"])), "syllabus.pdf"),
+        "ai_model": "groq",
+    }, headers=headers, content_type="multipart/form-data")
+    with patched_provider("groq", lambda prompt, config: "Q1. Define a heap."):
+        assert post({}).status_code == 200
+        assert post({"Authorization": f"Bearer {auth.issue_token(USER)}"}).status_code == 200
+        refused = post({"Authorization": "Bearer not-a-token"})
+        assert refused.status_code == 401
+        assert refused.headers["WWW-Authenticate"] == 'Bearer error="invalid_token"'
+        # history is per user, so it needs a token
+        assert client.get("/api/results").status_code == 401
+
+if __name__ == "__main__":
+    test_tokens_verify_without_the_database_and_reject_tampering()
+    test_generate_accepts_a_token_and_refuses_a_bad_one()
+    print("Auth tests passed")
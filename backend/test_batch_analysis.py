@@ -0,0 +1,82 @@
+import sys
+import os
+import io
+import json
+import time
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+from test_cache import make_pdf
+from benchmarks.fake_provider import patched_provider
+
+def parse_ndjson(body):
+    return [json.loads(line) for line in body.decode("utf-8").splitlines() if line]
+
+def test_batch_streams_one_line_per_paper_with_its_own_status():
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+    extracted = []
+
+    def fake_provider(prompt, config):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        if "Outage" in prompt:
+            return "Error from Groq: 503 - unavailable"
+        return "**Question: Q1**\n*   **Difficulty Label**: Easy\n*   **Difficulty Score**: 3"
+
+    def counting_extract(upload):
+        extracted.append(upload.filename)
+        return original_extract(upload)
+
+    original_extract = app_module.extract_text_from_upload
+    app_module.extract_text_from_upload = counting_extract
+    try:
+        with patched_provider("groq", fake_provider):
+            papers = [(io.BytesIO(make_pdf([f"Q1. Explain sorting variant {n}."])), f"paper{n}.pdf") for n in range(6)]
+            papers.append((io.BytesIO(make_pdf(["Q1. Outage question."])), "outage.pdf"))
+            papers.append((io.BytesIO(b"not a pdf"), "broken.pdf"))
+            response = app_module.app.test_client().post("/analyze/batch", data={
+                "syllabus": (io.BytesIO(make_pdf(["Unit 1: Sorting algorithms"])), "syllabus.pdf"),
+                "question_pdfs": papers,
+                "ai_model": "groq",
+                "concurrency": "2",
+            }, content_type="multipart/form-data")
+            assert response.mimetype == "application/x-ndjson"
+            lines = parse_ndjson(response.data)
+
+            assert lines[0] == {"type": "start", "papers": 8, "concurrency": 2, "ai_model": "groq"}
+            assert lines[-1]["type"] == "summary"
+            assert (lines[-1]["succeeded"], lines[-1]["failed"]) == (6, 2)
+            results = {line["filename"]: line for line in lines[1:-1]}
+            assert sorted(line["index"] for line in results.values()) == list(range(8))
+            assert all(results[f"paper{n}.pdf"]["status"] == "ok" for n in range(6))
+            assert results["paper0.pdf"]["result"]["metrics"]["difficulty_label"] == "Easy"
+            # one failing paper, provider or PDF, does not sink the rest
+            assert results["outage.pdf"] == dict(results["outage.pdf"], status="error", error="Error from Groq: 503 - unavailable")
+            assert results["broken.pdf"]["status"] == "error" and "broken.pdf" in results["broken.pdf"]["error"]
+
+            assert extracted.count("syllabus.pdf") == 1
+            assert peak[0] == 2
+    finally:
+        app_module.extract_text_from_upload = original_extract
+
+def test_batch_rejects_missing_files_and_unknown_syllabus():
+    client = app_module.app.test_client()
+    syllabus = lambda: (io.BytesIO(make_pdf(["Unit 1: Sorting"])), "syllabus.pdf")
+    assert client.post("/analyze/batch", data={"syllabus": syllabus()}, content_type="multipart/form-data").status_code == 400
+    response = client.post("/analyze/batch", data={
+        "syllabus_id": "0" * 64,
+        "question_pdfs": [(io.BytesIO(b"%PDF"), "paper.pdf")],
+    }, content_type="multipart/form-data")
+    assert response.status_code == 404
+
+if __name__ == "__main__":
+    test_batch_streams_one_line_per_paper_with_its_own_status()
+    test_batch_rejects_missing_files_and_unknown_syllabus()
+    print("Batch analysis tests passed")
@@ -0,0 +1,64 @@
+import sys
+import os
+import io
+import json
+import tempfile
+from functools import partial
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import batch_cli
+from test_cache import make_pdf
+from benchmarks.fake_provider import patched_provider
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def test_batch_cli_writes_jsonl_and_resumes():
+    calls = []
+    with patched_provider("groq", lambda prompt, config: calls.append(prompt) or "**Question: Q1**\n*   **Difficulty Label**: Tough"):
+        with tempfile.TemporaryDirectory() as directory:
+            papers = os.path.join(directory, "papers")
+            os.makedirs(os.path.join(papers, "2023"))
+            for name, pages in [("a.pdf", ["Q1. Explain heaps."]), ("b.pdf", ["Q1. Explain tries."]), ("2023/c.pdf", ["Q1. Explain graphs."])]:
+                with open(os.path.join(papers, name), "wb") as f:
+                    f.write(make_pdf(pages))
+            with open(os.path.join(papers, "broken.pdf"), "wb") as f:
+                f.write(b"not a pdf")
+
+            paths = batch_cli.list_pdfs(papers, recursive=True)
+            assert [batch_cli.record_key(path, papers) for path in paths] == ["a.pdf", "b.pdf", "broken.pdf", "2023/c.pdf"]
+
+            output = os.path.join(directory, "results.jsonl")
+            task = partial(batch_cli.analyze_task, "Unit 1: Data structures", "", "groq", False)
+            run = lambda: batch_cli.run_batch(paths, task, output, papers, processes=2, llm_concurrency=2, out=io.StringIO())
+
+            summary = run()
+            assert (summary["processed"], summary["succeeded"], summary["failed"]) == (4, 3, 1)
+            records = {record["path"]: record for record in read_records(output)}
+            assert records["2023/c.pdf"]["result"]["metrics"]["difficulty_label"] == "Tough"
+            assert records["broken.pdf"]["status"] == "error" and "broken.pdf" in records["broken.pdf"]["error"]
+            assert len(calls) == 3
+
+            # finished papers are skipped; failed ones and a line cut short by a crash run again
+            lines = open(output, encoding="utf-8").read().splitlines()
+            kept = [line for line in lines if json.loads(line)["path"] != "a.pdf"]
+            with open(output, "w", encoding="utf-8") as f:
+                f.write("\n".join(kept) + '\n{"path": "a.pdf", "sta')
+            summary = run()
+            assert (summary["skipped"], summary["processed"], summary["succeeded"]) == (2, 2, 1)
+            assert sorted(record["path"] for record in read_records_lenient(output) if record["status"] == "ok") == ["2023/c.pdf", "a.pdf", "b.pdf"]
+
+def read_records_lenient(path):
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                pass
+    return records
+
+if __name__ == "__main__":
+    test_batch_cli_writes_jsonl_and_resumes()
+    print("Batch CLI tests passed")
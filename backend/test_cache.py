@@ -0,0 +1,90 @@
+import sys
+import os
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import fitz
+import ai_logic
+from utils import pdf_parser
+from utils.cache import LRUCache, TieredCache, hash_key
+from benchmarks.fake_provider import patched_provider
+
+def make_pdf(pages):
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def test_lru_eviction_and_ttl():
+    cache = LRUCache(max_size=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    cache = LRUCache(max_size=2, ttl=0.05)
+    cache.set("a", 1)
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+def test_disk_tier_survives_restart():
+    with tempfile.TemporaryDirectory() as directory:
+        key = hash_key("gemini", "model", "prompt", {})
+        TieredCache("llm", directory=directory).set(key, "analysis text")
+
+        # a fresh instance simulates a process restart
+        cache = TieredCache("llm", directory=directory)
+        assert cache.get(key) == "analysis text"
+        assert cache.get(key) == "analysis text"
+        stats = cache.stats()
+        assert stats["disk_hits"] == 1
+        assert stats["memory_hits"] == 1
+
+def test_llm_responses_cached_but_errors_are_not():
+    calls = []
+
+    def fake_provider(prompt, config):
+        calls.append(prompt)
+        return "Error from Gemini: quota exceeded" if "fail" in prompt else f"**Question: Q1** for {prompt}"
+
+    with patched_provider("gemini", fake_provider):
+        assert ai_logic.call_ai_service("gemini", "ok") == ai_logic.call_ai_service("gemini", "ok")
+        assert len(calls) == 1
+
+        ai_logic.call_ai_service("gemini", "fail")
+        ai_logic.call_ai_service("gemini", "fail")
+        assert len(calls) == 3
+
+        stats = ai_logic.get_cache_stats()["llm"]
+        assert stats["hits"] == 1
+        assert stats["stores"] == 1
+
+def test_pdf_extraction_cache_reuses_unchanged_pages():
+    pdf_parser.document_cache = TieredCache("pdf_document")
+    pdf_parser.page_cache = TieredCache("pdf_page")
+
+    original = make_pdf(["Unit 1: Databases", "Unit 2: Normalization", "Unit 3: Transactions"])
+    edited = make_pdf(["Unit 1: Databases", "Unit 2: Indexing", "Unit 3: Transactions"])
+
+    text = pdf_parser.extract_text_from_bytes(original)
+    assert "Normalization" in text
+    assert pdf_parser.extract_text_from_bytes(original) == text
+    assert pdf_parser.document_cache.stats()["hits"] == 1
+
+    assert "Indexing" in pdf_parser.extract_text_from_bytes(edited)
+    page_stats = pdf_parser.page_cache.stats()
+    assert page_stats["hits"] == 2
+    assert page_stats["misses"] == 4
+
+if __name__ == "__main__":
+    test_lru_eviction_and_ttl()
+    test_disk_tier_survives_restart()
+    test_llm_responses_cached_but_errors_are_not()
+    test_pdf_extraction_cache_reuses_unchanged_pages()
+    print("Cache tests passed")
@@ -0,0 +1,106 @@
+import sys
+import os
+import re
+import time
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import ai_logic
+import app as app_module
+from benchmarks.fake_provider import patched_provider
+
+QUESTION_PAPER = "Answer all questions.\n" + "\n".join(
+    f"Q{number}. Explain concept {number} with an example." for number in range(1, 13)
+)
+
+def fake_analysis_provider(active, peak, lock):
+    def provider(prompt, config):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        paper = prompt.split("QUESTION PAPER TO ANALYZE:")[1].split("TASK:")[0]
+        ids = re.findall(r'^(Q\d+)\.', paper, re.MULTILINE)
+        with lock:
+            active[0] -= 1
+        return "\n".join(
+            f"**Question: {qid}**\n*   **Difficulty Label**: Easy\n*   **Difficulty Score**: 3\n"
+            for qid in ids
+        )
+    return provider
+
+def test_split_questions_keeps_preamble_with_first_question():
+    questions = ai_logic.split_questions(QUESTION_PAPER)
+    assert len(questions) == 12
+    assert questions[0].startswith("Answer all questions.")
+    assert questions[-1].startswith("Q12.")
+
+def test_chunked_analysis_covers_every_question():
+    active, peak, lock = [0], [0], threading.Lock()
+    with patched_provider("gemini", fake_analysis_provider(active, peak, lock)):
+        result = ai_logic.analyze_question_paper("Unit 1: Concepts", "Explain concepts", QUESTION_PAPER, chunked=True, ai_service="gemini")
+
+    ids = [metric["question_id"] for metric in result["all_questions_metrics"]]
+    assert ids == [f"Q{number}" for number in range(1, 13)]
+    assert result["total_questions_analyzed"] == 12
+    assert 1 < peak[0] <= ai_logic.ANALYSIS_MAX_WORKERS
+
+def failing_batch_provider(failing_question):
+    # answers like fake_analysis_provider, except for the batch that holds failing_question
+    answer = fake_analysis_provider([0], [0], threading.Lock())
+
+    def provider(prompt, config):
+        paper = prompt.split("QUESTION PAPER TO ANALYZE:")[1].split("TASK:")[0]
+        if re.search(rf'^{failing_question}\.', paper, re.MULTILINE):
+            return "Error from Gemini: 503 - overloaded"
+        return answer(prompt, config)
+    return provider
+
+def test_failed_batches_are_reported_not_joined_into_the_analysis():
+    paper = "\n".join(f"Q{number}. Explain concept {number}." for number in range(1, 11))
+    for failing_question, analysed in (("Q1", ["Q6", "Q7", "Q8", "Q9", "Q10"]), ("Q6", ["Q1", "Q2", "Q3", "Q4", "Q5"])):
+        with patched_provider("gemini", failing_batch_provider(failing_question)):
+            result = ai_logic.analyze_question_paper("Unit 1: Concepts", "", paper, chunked=True, ai_service="gemini")
+
+        assert ai_logic.analysis_failure(result) is None
+        assert "Error" not in result["analysis"]
+        assert [metric["question_id"] for metric in result["all_questions_metrics"]] == analysed
+        assert result["partial"] is True
+        failed = result["failed_batches"]
+        assert len(failed) == 1 and failed[0]["questions"] == 5
+        assert failed[0]["error"].startswith("Error from Gemini")
+
+class RecordingStore:
+    def __init__(self):
+        self.saved = []
+
+    def find(self, key, user_id=None, paper_name=None, syllabus_name=None):
+        return None
+
+    def save(self, key, result, user_id=None, paper_name=None, syllabus_name=None):
+        self.saved.append(result)
+
+def test_partial_analyses_are_not_stored():
+    paper = "\n".join(f"Q{number}. Explain concept {number}." for number in range(1, 11))
+    original_store = app_module.result_store
+    store = app_module.result_store = RecordingStore()
+    config = ai_logic.provider_config("gemini")
+    try:
+        with patched_provider("gemini", failing_batch_provider("Q6")):
+            result = app_module.analyze_with_results("Unit 1: Concepts", "", paper, config, True)
+        assert result["partial"] is True
+        assert store.saved == []
+
+        with patched_provider("gemini", failing_batch_provider("Q99")):
+            result = app_module.analyze_with_results("Unit 1: Concepts", "", paper, config, True)
+        assert "partial" not in result
+        assert store.saved == [result]
+    finally:
+        app_module.result_store = original_store
+
+if __name__ == "__main__":
+    test_split_questions_keeps_preamble_with_first_question()
+    test_chunked_analysis_covers_every_question()
+    test_failed_batches_are_reported_not_joined_into_the_analysis()
+    test_partial_analyses_are_not_stored()
+    print("Chunked analysis tests passed")
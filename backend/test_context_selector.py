@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import ai_logic
+from utils.context_selector import split_sections, select_context, estimate_tokens, SectionIndex
+from benchmarks.synthetic import make_syllabus_text, TOPICS
+
+def make_distinct_syllabus(units):
+    return "\n\n".join(
+        f"Unit {unit}: {TOPICS[unit % len(TOPICS)]}\n"
+        f"Covers {TOPICS[unit % len(TOPICS)].lower()} in depth with worked examples, lab {unit} and a case study."
+        for unit in range(1, units + 1)
+    )
+
+def test_sections_follow_headings_and_paragraphs():
+    text = "Course outline\nIntro line\n\nUnit 1: Sorting\nMerge sort\n1.1 Quick sort\nUnit 2: Graphs\nBFS and DFS"
+    assert split_sections(text) == [
+        "Course outline\nIntro line",
+        "Unit 1: Sorting\nMerge sort",
+        "1.1 Quick sort",
+        "Unit 2: Graphs\nBFS and DFS",
+    ]
+    long_section = "Unit 1: Long\n" + "\n".join(f"line {n} " * 10 for n in range(100))
+    assert all(len(piece) <= 1200 for piece in split_sections(long_section))
+
+def test_ranked_sections_are_packed_within_budget():
+    syllabus = make_distinct_syllabus(120) + "\n\nUnit 121: Locking protocols\nTwo-phase locking, deadlock detection and wait-die."
+    query = "Q1. Explain concurrency control with two-phase locking.\nQ2. Compare recovery systems and concurrency."
+    selected = select_context(syllabus, query, 300)
+
+    assert estimate_tokens(selected) <= 300
+    # every topic the paper asks about is covered, including one at the very end
+    assert "Concurrency control" in selected and "Recovery systems" in selected
+    assert "Unit 121: Locking protocols" in selected
+    assert "Query optimization" not in selected
+    # only matching sections are sent, so the prompt is shorter than the budget allows
+    assert estimate_tokens(selected) < 300
+
+def test_short_text_and_unmatched_queries():
+    short = make_syllabus_text(2)
+    assert select_context(short, "anything", 10_000) == short
+
+    syllabus = make_distinct_syllabus(60)
+    selected = select_context(syllabus, "zzzz unrelated", 100)
+    assert selected.startswith("Unit 1:")
+
+    index = SectionIndex.from_text(syllabus)
+    scores = index.scores("normal forms normal forms")
+    best = max(range(len(scores)), key=scores.__getitem__)
+    assert "Normal forms" in index.sections[best]
+
+def test_budget_follows_provider():
+    syllabus = make_distinct_syllabus(200)
+    groq = ai_logic.select_syllabus_context(syllabus, "", "groq")
+    gemini = ai_logic.select_syllabus_context(syllabus, "", "gemini")
+    assert estimate_tokens(groq) <= ai_logic.SYLLABUS_TOKEN_BUDGETS["groq"]
+    assert estimate_tokens(groq) < estimate_tokens(gemini) <= ai_logic.SYLLABUS_TOKEN_BUDGETS["gemini"]
+
+if __name__ == "__main__":
+    test_sections_follow_headings_and_paragraphs()
+    test_ranked_sections_are_packed_within_budget()
+    test_short_text_and_unmatched_queries()
+    test_budget_follows_provider()
+    print("Context selector tests passed")
@@ -0,0 +1,81 @@
+import sys
+import os
+import io
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+from app import app
+from utils import metrics
+from utils.syllabus_store import SyllabusStore
+from test_cache import make_pdf
+from benchmarks.fake_provider import patched_provider
+
+def test_registry_renders_prometheus_text():
+    registry = metrics.MetricsRegistry("test")
+    counter = registry.counter("requests_total", "Requests", ("route",))
+    histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1))
+    counter.inc(route='/a"b')
+    counter.inc(2, route='/a"b')
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(5, route="/a")
+
+    text = registry.render()
+    assert "# TYPE test_requests_total counter" in text
+    assert 'test_requests_total{route="/a\\"b"} 3' in text
+    assert "# TYPE test_latency_seconds histogram" in text
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/a"} 3' in text
+    assert 'test_latency_seconds_sum{route="/a"} 5.55' in text
+
+def test_request_stages_are_exposed_per_endpoint_and_provider():
+    metrics.registry.reset()
+    with patched_provider("groq", lambda prompt, config: "Q1. Define a heap."):
+        client = app.test_client()
+        response = client.post("/generate", data={
+            "syllabus": (io.BytesIO(make_pdf(["Unit 1: Heaps"])), "syllabus.pdf"),
+            "ai_model": "groq",
+        }, content_type="multipart/form-data")
+        assert response.status_code == 200
+        # WSGI servers close the response once the body is sent; that records the request
+        response.close()
+
+        for stage in ["upload_receive", "extract_text", "select_context", "build_prompt"]:
+            series = metrics.STAGE_SECONDS.value(endpoint="/generate", provider="groq", stage=stage)
+            assert series and series["count"] >= 1, stage
+        call = metrics.PROVIDER_CALL_SECONDS.value(endpoint="/generate", provider="groq", outcome="ok")
+        assert call["count"] == 1
+        assert metrics.RESPONSE_CHARS.value(endpoint="/generate", provider="groq") == len("Q1. Define a heap.")
+        assert metrics.PROMPT_CHARS.value(endpoint="/generate", provider="groq") > 0
+
+        body = client.get("/metrics").get_data(as_text=True)
+        assert 'qdapp_http_requests_total{endpoint="/generate",method="POST",status="200"} 1' in body
+        assert 'stage="extract_text"' in body
+
+def test_unknown_provider_names_do_not_create_series():
+    metrics.registry.reset()
+    client = app.test_client()
+    original_store = app_module.syllabus_store
+    with tempfile.TemporaryDirectory() as directory:
+        app_module.syllabus_store = SyllabusStore(directory)
+        try:
+            for number in range(3):
+                client.post("/api/syllabus", data={
+                    "syllabus": (io.BytesIO(make_pdf([f"Unit {number}: Heaps"])), "syllabus.pdf"),
+                    "ai_model": f"junk-{number}",
+                }, content_type="multipart/form-data").close()
+        finally:
+            app_module.syllabus_store = original_store
+
+    position = metrics.STAGE_SECONDS.label_names.index("provider")
+    providers = {key[position] for key in metrics.STAGE_SECONDS.values}
+    assert providers == {"other"}
+
+if __name__ == "__main__":
+    test_registry_renders_prometheus_text()
+    test_request_stages_are_exposed_per_endpoint_and_provider()
+    test_unknown_provider_names_do_not_create_series()
+    print("Instrumentation tests passed")
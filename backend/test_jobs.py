@@ -0,0 +1,112 @@
+import sys
+import os
+import io
+import time
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from utils.jobs import JobManager, JobQueueFull
+from test_cache import make_pdf
+from benchmarks.fake_provider import patched_provider
+
+def wait_for(manager, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def test_queue_limit_cancellation_and_expiry():
+    release = threading.Event()
+    manager = JobManager(max_workers=1, max_queue=1, result_ttl=0.2)
+
+    running = manager.submit("test", lambda progress: release.wait(5) and "done")
+    queued = manager.submit("test", lambda progress: "never runs")
+    try:
+        manager.submit("test", lambda progress: "rejected")
+        assert False, "expected JobQueueFull"
+    except JobQueueFull:
+        pass
+
+    assert manager.cancel(queued["id"])["status"] == "cancelled"
+    release.set()
+    assert wait_for(manager, running["id"])["result"] == "done"
+    assert manager.get(queued["id"])["status"] == "cancelled"
+
+    time.sleep(0.3)
+    assert manager.get(running["id"]) is None
+
+def test_cancelled_running_job_counts_until_its_worker_is_free():
+    release = threading.Event()
+    started = threading.Event()
+    manager = JobManager(max_workers=1, max_queue=0, result_ttl=60)
+
+    def blocking(progress):
+        started.set()
+        release.wait(5)
+        return "done"
+
+    running = manager.submit("test", blocking)
+    assert started.wait(5)
+    assert manager.cancel(running["id"])["status"] == "cancelled"
+    # the worker is still busy, so a resubmit must not slip past the limit
+    try:
+        manager.submit("test", lambda progress: "rejected")
+        assert False, "expected JobQueueFull"
+    except JobQueueFull:
+        pass
+
+    release.set()
+    manager._jobs[running["id"]]["future"].result(timeout=5)
+    assert wait_for(manager, manager.submit("test", lambda progress: "ok")["id"])["result"] == "ok"
+
+def test_analysis_job_endpoint():
+    with patched_provider("groq", lambda prompt, config: "**Question: Q1**\n*   **Difficulty Label**: Tough\n"):
+        client = app.test_client()
+        response = client.post("/jobs/analyze", data={
+            "syllabus": (io.BytesIO(make_pdf(["Unit 1: Graphs"])), "syllabus.pdf"),
+            "question_pdf": (io.BytesIO(make_pdf(["Q1. Prove Euler's formula."])), "paper.pdf"),
+            "ai_model": "groq",
+        }, content_type="multipart/form-data")
+        assert response.status_code == 202
+        job_id = response.get_json()["job_id"]
+
+        from app import job_manager
+        wait_for(job_manager, job_id)
+        job = client.get(f"/jobs/{job_id}").get_json()
+        assert job["status"] == "completed"
+        assert job["result"]["ai_model"] == "groq"
+        assert job["result"]["metrics"]["difficulty_label"] == "Tough"
+        assert client.get("/jobs/unknown").status_code == 404
+
+def test_provider_errors_fail_the_job():
+    with patched_provider("groq", lambda prompt, config: "Error from Groq: 503 - unavailable"):
+        client = app.test_client()
+        from app import job_manager
+        submitted = [
+            client.post("/jobs/analyze", data={
+                "syllabus": (io.BytesIO(make_pdf(["Unit 1: Trees"])), "syllabus.pdf"),
+                "question_pdf": (io.BytesIO(make_pdf(["Q1. Balance an AVL tree."])), "paper.pdf"),
+                "ai_model": "groq",
+                "chunked": "false",
+            }, content_type="multipart/form-data"),
+            client.post("/jobs/generate", data={
+                "syllabus": (io.BytesIO(make_pdf(["Unit 1: Trees"])), "syllabus.pdf"),
+                "ai_model": "groq",
+            }, content_type="multipart/form-data"),
+        ]
+        for response in submitted:
+            assert response.status_code == 202
+            job = wait_for(job_manager, response.get_json()["job_id"])
+            assert job["status"] == "failed"
+            assert job["error"] == "Error from Groq: 503 - unavailable"
+            assert job["result"] is None
+
+if __name__ == "__main__":
+    test_queue_limit_cancellation_and_expiry()
+    test_analysis_job_endpoint()
+    test_provider_errors_fail_the_job()
+    print("Job tests passed")
@@ -0,0 +1,76 @@
+import sys
+import os
+import io
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import ai_logic
+from app import app
+from utils import logging_config
+from test_cache import make_pdf
+from benchmarks.fake_provider import patched_provider
+
+def read_log_lines(path):
+    logging_config.stop_logging()
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def test_request_id_flows_into_ai_logic_logs():
+    original_file = logging_config.LOG_FILE
+    with patched_provider("groq", lambda prompt, config: "Q1. Define a trie."), tempfile.TemporaryDirectory() as directory:
+        logging_config.LOG_FILE = os.path.join(directory, "app.log")
+        logging_config.configure_logging()
+        try:
+            client = app.test_client()
+            response = client.post("/generate", data={
+                "syllabus": (io.BytesIO(make_pdf(["Unit 1: Tries"])), "syllabus.pdf"),
+                "ai_model": "groq",
+            }, headers={"X-Request-ID": "req-123"}, content_type="multipart/form-data")
+            assert response.headers["X-Request-ID"] == "req-123"
+
+            generated = client.get("/health").headers["X-Request-ID"]
+            assert len(generated) == 32 and generated != "req-123"
+
+            entries = read_log_lines(logging_config.LOG_FILE)
+            tagged = [entry for entry in entries if entry["request_id"] == "req-123"]
+            assert {"app", "ai_logic"} <= {entry["logger"] for entry in tagged}
+            assert any("Starting question generation" in entry["message"] for entry in tagged)
+        finally:
+            logging_config.LOG_FILE = original_file
+            logging_config.configure_logging()
+
+def test_chunked_batches_keep_request_id():
+    original_file = logging_config.LOG_FILE
+    with tempfile.TemporaryDirectory() as directory:
+        logging_config.LOG_FILE = os.path.join(directory, "app.log")
+        logging_config.configure_logging()
+        token = logging_config.set_request_id("batch-req")
+        try:
+            question_text = "\n".join(f"Q{n}. Explain topic {n}." for n in range(1, 9))
+            with patched_provider("groq", lambda prompt, config: (ai_logic.logger.info("batch call"), "**Question: Q1**\n* **Difficulty Score**: 5")[1]):
+                ai_logic.analyze_in_batches(ai_logic.provider_config("groq"), "Unit 1", "", question_text)
+        finally:
+            logging_config.reset_request_id(token)
+        try:
+            batch_entries = [entry for entry in read_log_lines(logging_config.LOG_FILE) if entry["message"] == "batch call"]
+            assert len(batch_entries) == 2
+            assert all(entry["request_id"] == "batch-req" for entry in batch_entries)
+            assert all(entry["thread"] != "MainThread" for entry in batch_entries)
+        finally:
+            logging_config.LOG_FILE = original_file
+            logging_config.configure_logging()
+
+def test_streamed_body_keeps_request_id():
+    with patched_provider("groq", stream=lambda prompt, config: iter(["id=" + logging_config.get_request_id()])):
+        response = app.test_client().post("/generate/stream", data={
+            "syllabus": (io.BytesIO(make_pdf(["Unit 1: Graphs"])), "syllabus.pdf"),
+            "ai_model": "groq",
+        }, headers={"X-Request-ID": "stream-1"}, content_type="multipart/form-data")
+        assert b"id=stream-1" in response.data
+
+if __name__ == "__main__":
+    test_request_id_flows_into_ai_logic_logs()
+    test_chunked_batches_keep_request_id()
+    test_streamed_body_keeps_request_id()
+    print("Logging tests passed")
@@ -0,0 +1,50 @@
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_logic import extract_question_metrics, parse_multiple_question_analysis
+from benchmarks.bench_metric_extraction import legacy_extract_question_metrics, split_blocks
+from benchmarks.synthetic import make_analysis
+from test_parsing import test_analysis
+
+ODD_BLOCKS = [
+    "*   **Difficulty Label**:\n    Tough\n*   **Difficulty Score**: N/A\n*   **Difficulty Score**: 8",
+    "* **Bloom's Taxonomy Level**: Applying concepts\n* **Blooms  Taxonomy Level**: Analyze",
+    "*   ** Difficulty Label **: Easy\nDifficulty label: Moderate",
+    "*   **Brief Explanation**:   *emphasis* first\n*   **Estimated Time to Solve**: **12**",
+    "*   **Application Depth**: four\nDepth: 2\r\n*   **Estimated Time to Solve**: 10 mins\r",
+    "Tough difficulty overall; score: 7.5; alignment 9; understand the concept; 25 minutes",
+    "",
+]
+
+def assert_same(question_id, content):
+    expected = legacy_extract_question_metrics(question_id, content, "test")
+    actual = extract_question_metrics(question_id, content, "test")
+    assert actual == expected, (content, expected, actual)
+    assert list(actual) == list(expected)
+
+def test_fixture_matches_regex_cascade():
+    for question_id, content in split_blocks(test_analysis):
+        assert_same(question_id, content)
+    metrics = parse_multiple_question_analysis(test_analysis, "test")
+    assert [m["difficulty_score"] for m in metrics] == [6.0, 7.0]
+    assert [m["cognitive_level"] for m in metrics] == ["Create", "Apply"]
+
+def test_generated_and_malformed_blocks_match_regex_cascade():
+    for question_id, content in split_blocks(make_analysis(300, seed=3, drift=0.5)):
+        assert_same(question_id, content)
+    for content in ODD_BLOCKS:
+        assert_same("Q1", content)
+
+    # shuffled lines from well-formed blocks
+    rng = random.Random(11)
+    for question_id, content in split_blocks(make_analysis(100, seed=5)):
+        lines = content.split("\n")
+        rng.shuffle(lines)
+        assert_same(question_id, "\n".join(lines))
+
+if __name__ == "__main__":
+    test_fixture_matches_regex_cascade()
+    test_generated_and_malformed_blocks_match_regex_cascade()
+    print("Metric extractor tests passed")
@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import ai_logic
+from benchmarks.mock_llm_server import start_mock_server, BASE_URL_VARS
+from benchmarks.load_test import percentile
+from test_parsing import test_analysis
+
+def point_providers_at(server):
+    saved = {}
+    for base_var, key_var, path in BASE_URL_VARS.values():
+        saved[base_var] = getattr(ai_logic, base_var)
+        saved[key_var] = getattr(ai_logic, key_var)
+        setattr(ai_logic, base_var, server.url + path)
+        setattr(ai_logic, key_var, "mock")
+    return saved
+
+def test_mock_server_speaks_openai_protocol():
+    server = start_mock_server()
+    saved = point_providers_at(server)
+    prompt = ai_logic.build_analysis_prompt("Unit 1: Sorting", "", "Q1. Define sorting.\nQ2. Explain merge sort.")
+    try:
+        analysis = ai_logic.analyze_with_openrouter(prompt, ai_logic.provider_config("openrouter"))
+        metrics = ai_logic.parse_multiple_question_analysis(analysis, "openrouter")
+        assert [m["question_id"] for m in metrics] == ["Q1", "Q2"]
+
+        streamed = "".join(ai_logic.stream_with_openrouter(prompt, ai_logic.provider_config("openrouter")))
+        assert streamed == analysis
+
+        assert ai_logic.analyze_with_huggingface(prompt, ai_logic.provider_config("huggingface")) == analysis
+        assert server.requests == 3
+    finally:
+        for name, value in saved.items():
+            setattr(ai_logic, name, value)
+        server.shutdown()
+
+def test_mock_server_injects_errors():
+    server = start_mock_server(error_rate=1.0)
+    saved = point_providers_at(server)
+    try:
+        assert ai_logic.is_provider_error(ai_logic.analyze_with_openrouter(test_analysis, ai_logic.provider_config("openrouter")))
+        assert ai_logic.is_provider_error(ai_logic.analyze_with_huggingface(test_analysis, ai_logic.provider_config("huggingface")))
+    finally:
+        for name, value in saved.items():
+            setattr(ai_logic, name, value)
+        server.shutdown()
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([5.0], 95) == 5.0
+    assert percentile([], 50) == 0.0
+
+if __name__ == "__main__":
+    test_mock_server_speaks_openai_protocol()
+    test_mock_server_injects_errors()
+    test_percentile_nearest_rank()
+    print("Mock LLM server tests passed")
@@ -0,0 +1,42 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.objective_matcher import ObjectiveMatcher, match_objectives, match_objectives_to_question
+
+OBJECTIVES = """Design relational database schemas
+Apply normalization to remove anomalies
+
+Analyze concurrency control protocols
+Evaluate a sorting algorithm"""
+
+def test_whole_words_match_not_substrings():
+    # "a" and "to" used to match inside any question containing those letters
+    assert match_objectives_to_question("a\nto\nApply normalization", "Normalize the database schema") == []
+    assert match_objectives_to_question(OBJECTIVES, "Explain normalization of database schemas.") == [
+        "Design relational database schemas",
+        "Apply normalization to remove anomalies",
+    ]
+
+def test_paper_is_scored_against_every_objective_in_one_pass():
+    questions = [
+        "Q1. Design a relational schema for a library database.",
+        "Q2. Compare two-phase locking with other concurrency control protocols.",
+        "Q3. Write a haiku.",
+    ]
+    matcher = ObjectiveMatcher(OBJECTIVES)
+    assert len(matcher.objectives) == 4
+    ranked = matcher.match(questions)
+
+    assert [objective for objective, _ in ranked[0]] == ["Design relational database schemas"]
+    assert ranked[1][0][0] == "Analyze concurrency control protocols"
+    assert ranked[2] == []
+    assert all(0 < score <= 1 for matches in ranked for _, score in matches)
+    # a question that is only the objective's words matches it fully
+    assert match_objectives(OBJECTIVES, ["Evaluate a sorting algorithm"])[0][0] == ("Evaluate a sorting algorithm", 1.0)
+    assert match_objectives(OBJECTIVES, questions, top_k=1, min_score=0.3)[1:] == [[ranked[1][0]], []]
+
+if __name__ == "__main__":
+    test_whole_words_match_not_substrings()
+    test_paper_is_scored_against_every_objective_in_one_pass()
+    print("Objective matcher tests passed")
@@ -0,0 +1,72 @@
+import sys
+import os
+import tempfile
+import fitz
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import pdf_parser
+from utils.cache import TieredCache
+from test_cache import make_pdf
+
+def test_streaming_and_parallel_extraction_match():
+    pdf_parser.document_cache = TieredCache("pdf_document")
+    pdf_parser.page_cache = TieredCache("pdf_page")
+    data = make_pdf([f"Module {number}: Query processing" for number in range(12)])
+
+    streamed = list(pdf_parser.iter_page_text(data))
+    assert len(streamed) == 12
+    assert "Module 11" in streamed[-1]
+
+    serial = pdf_parser.extract_text_from_bytes(data, parallel_min_pages=0)
+    pdf_parser.document_cache.clear()
+    pdf_parser.page_cache.clear()
+    parallel = pdf_parser.extract_text_from_bytes(data, parallel_min_pages=4)
+
+    assert serial == "".join(streamed)
+    assert parallel == serial
+
+def test_disk_tier_survives_a_cleared_memory_tier():
+    with tempfile.TemporaryDirectory() as directory:
+        pdf_parser.document_cache = TieredCache("pdf_document", directory=os.path.join(directory, "documents"))
+        pdf_parser.page_cache = TieredCache("pdf_page", directory=os.path.join(directory, "pages"))
+        try:
+            data = make_pdf(["Unit 3: Transactions"])
+            text = pdf_parser.extract_text_from_bytes(data)
+            assert os.listdir(os.path.join(directory, "documents"))
+
+            pdf_parser.document_cache.memory.clear()
+            assert pdf_parser.extract_text_from_bytes(data) == text
+            assert pdf_parser.document_cache.stats()["disk_hits"] == 1
+        finally:
+            pdf_parser.document_cache = TieredCache("pdf_document")
+            pdf_parser.page_cache = TieredCache("pdf_page")
+
+def make_encoded_pdf(differences=None):
+    # the same content stream, shown through a font whose encoding may remap character codes
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Hello world", fontname="helv")
+    page.clean_contents()
+    if differences:
+        for font in page.get_fonts():
+            doc.xref_set_key(font[0], "Encoding", f"<</Type/Encoding/BaseEncoding/WinAnsiEncoding/Differences[{differences}]>>")
+    return doc.tobytes()
+
+def test_pages_sharing_a_content_stream_but_not_an_encoding_are_cached_apart():
+    pdf_parser.page_cache = TieredCache("pdf_page")
+    try:
+        plain, remapped = make_encoded_pdf(), make_encoded_pdf("72/X 101/Z")
+        with fitz.open(stream=plain, filetype="pdf") as first, fitz.open(stream=remapped, filetype="pdf") as second:
+            assert first[0].read_contents() == second[0].read_contents()
+            assert pdf_parser.page_fingerprint(first, first[0]) != pdf_parser.page_fingerprint(second, second[0])
+
+        assert "".join(pdf_parser.iter_page_text(plain)).strip() == "Hello world"
+        assert "".join(pdf_parser.iter_page_text(remapped)).strip() == "XZllo world"
+    finally:
+        pdf_parser.page_cache = TieredCache("pdf_page")
+
+if __name__ == "__main__":
+    test_streaming_and_parallel_extraction_match()
+    test_disk_tier_survives_a_cleared_memory_tier()
+    test_pages_sharing_a_content_stream_but_not_an_encoding_are_cached_apart()
+    print("PDF parser tests passed")
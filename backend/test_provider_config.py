@@ -0,0 +1,104 @@
+import sys
+import os
+import io
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import openai
+import ai_logic
+import app as app_module
+from utils import provider_clients
+from test_cache import make_pdf
+
+FAKE_PROVIDERS = ["fake_alpha", "fake_beta", "fake_gamma"]
+
+def test_config_defaults_and_overrides():
+    config = ai_logic.provider_config("groq")
+    assert config.model == ai_logic.AI_PROVIDER_MODELS["groq"]
+    assert config.params == ai_logic.PROVIDER_PARAMS["groq"]
+
+    tuned = ai_logic.provider_config("huggingface", model="tiny-model", max_tokens=64, read_timeout=5)
+    assert tuned.model == "tiny-model"
+    assert tuned.params["max_new_tokens"] == 64
+    assert tuned.timeout[1] == 5
+    # overriding one request leaves the shared defaults alone
+    assert ai_logic.PROVIDER_PARAMS["huggingface"]["max_new_tokens"] == 2000
+
+def test_unset_timeouts_and_retries_keep_each_clients_defaults():
+    original = (provider_clients.PROVIDER_CONNECT_TIMEOUT, provider_clients.PROVIDER_READ_TIMEOUT, provider_clients.PROVIDER_MAX_RETRIES)
+    try:
+        provider_clients.PROVIDER_CONNECT_TIMEOUT = provider_clients.PROVIDER_READ_TIMEOUT = provider_clients.PROVIDER_MAX_RETRIES = None
+        provider_clients.reset_clients()
+        client = provider_clients.get_openai_client("http://127.0.0.1:9/v1", "key")
+        assert client.timeout == openai.DEFAULT_TIMEOUT
+        assert client.max_retries == openai.DEFAULT_MAX_RETRIES
+        config = ai_logic.provider_config("groq")
+        assert provider_clients.http_timeout(config.timeout) == (60, 60)
+        assert provider_clients.gemini_http_options(config.timeout) is None
+
+        provider_clients.PROVIDER_READ_TIMEOUT, provider_clients.PROVIDER_MAX_RETRIES = 5, 0
+        provider_clients.reset_clients()
+        client = provider_clients.get_openai_client("http://127.0.0.1:9/v1", "key")
+        assert client.timeout.read == 5 and client.max_retries == 0
+    finally:
+        provider_clients.PROVIDER_CONNECT_TIMEOUT, provider_clients.PROVIDER_READ_TIMEOUT, provider_clients.PROVIDER_MAX_RETRIES = original
+        provider_clients.reset_clients()
+
+def test_default_provider_is_not_taken_from_a_previous_request():
+    config = ai_logic.provider_config()
+    assert config.provider == ai_logic.AI_SERVICE
+    ai_logic.provider_config("groq")
+    assert ai_logic.provider_config().provider == ai_logic.AI_SERVICE
+
+def fake_provider(name):
+    rng = random.Random(name)
+
+    def provider(prompt, config):
+        # a short, uneven wait so requests for different providers interleave
+        time.sleep(rng.uniform(0, 0.005))
+        assert config.provider == name
+        return f"**Question: Q1**\n*   **Difficulty Label**: Easy\nserved by {config.provider} using {config.model}"
+    return provider
+
+def test_concurrent_mixed_provider_requests_each_get_their_own_provider():
+    for name in FAKE_PROVIDERS:
+        ai_logic.AI_PROVIDERS[name] = fake_provider(name)
+        ai_logic.AI_PROVIDER_MODELS[name] = f"{name}-model"
+        ai_logic.PROVIDER_PARAMS[name] = {"max_tokens": 100}
+    environment_before = os.environ.get("AI_SERVICE")
+    syllabus = make_pdf(["Unit 1: Sorting algorithms"])
+    paper = make_pdf(["Q1. Explain merge sort."])
+    client = app_module.app.test_client()
+
+    def send(number):
+        name = FAKE_PROVIDERS[number % len(FAKE_PROVIDERS)]
+        data = {
+            "syllabus": (io.BytesIO(syllabus), "syllabus.pdf"),
+            "objectives": f"Objective {number}",
+            "ai_model": name,
+        }
+        if number % 2:
+            data["question_pdf"] = (io.BytesIO(paper), "paper.pdf")
+            response = client.post("/analyze", data=data, content_type="multipart/form-data")
+            text = response.get_json()["analysis"]
+        else:
+            response = client.post("/generate", data=data, content_type="multipart/form-data")
+            text = response.get_json()["questions"]
+        return name, response.status_code, response.get_json()["ai_model"], text
+
+    try:
+        with ThreadPoolExecutor(max_workers=24) as executor:
+            results = list(executor.map(send, range(300)))
+    finally:
+        for name in FAKE_PROVIDERS:
+            for registry in (ai_logic.AI_PROVIDERS, ai_logic.AI_PROVIDER_MODELS, ai_logic.PROVIDER_PARAMS):
+                registry.pop(name, None)
+
+    assert len(results) == 300
+    for name, status, ai_model, text in results:
+        assert status == 200
+        assert ai_model == name
+        assert text.endswith(f"served by {name} using {name}-model")
+    assert os.environ.get("AI_SERVICE") == environment_before
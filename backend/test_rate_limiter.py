@@ -0,0 +1,119 @@
+import sys
+import os
+import io
+import time
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+import ai_logic
+import app as app_module
+from utils.rate_limiter import TokenBucket, ProviderLimiter, ProviderOverloaded
+from test_cache import make_pdf
+from benchmarks.fake_provider import patched_provider
+
+def test_token_bucket_reservations_queue_behind_each_other():
+    bucket = TokenBucket(60)
+    now = time.monotonic()
+    assert bucket.reserve(60, now) == 0.0
+    # the next request waits one second per unit at 60 per minute
+    assert bucket.reserve(1, now) == pytest.approx(1.0)
+    assert bucket.reserve(1, now) == pytest.approx(2.0)
+
+def test_limiter_caps_concurrency_and_refuses_past_the_queue():
+    limiter = ProviderLimiter("test", 2, max_queue=2, max_wait=5)
+    lock = threading.Lock()
+    release = threading.Event()
+    active = [0]
+    peak = [0]
+
+    def call():
+        with limiter.slot():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            release.wait(5)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while limiter.stats()["waiting"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # two running, two waiting: a fifth call is refused without waiting at all
+    start = time.perf_counter()
+    with pytest.raises(ProviderOverloaded) as refused:
+        limiter.check()
+    assert time.perf_counter() - start < 0.1
+    assert refused.value.reason == "queue full"
+    assert refused.value.retry_after >= 1
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
+    assert limiter.stats()["active"] == 0 and limiter.stats()["rejected"] == 1
+
+def test_rate_limit_beyond_max_wait_is_refused():
+    limiter = ProviderLimiter("test", 0, rpm=60, max_wait=0.5)
+    for _ in range(60):
+        with limiter.slot():
+            pass
+    with pytest.raises(ProviderOverloaded) as refused:
+        limiter.check()
+    assert refused.value.reason == "rate limit"
+
+def test_no_free_slot_refusal_gives_back_its_rate_budget():
+    limiter = ProviderLimiter("test", 1, rpm=6, tpm=600, max_wait=0.2)
+    holding = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with limiter.slot(tokens=100):
+            holding.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    try:
+        assert holding.wait(5)
+        for _ in range(3):
+            with pytest.raises(ProviderOverloaded) as refused:
+                with limiter.slot(tokens=200):
+                    pass
+            assert refused.value.reason == "no free slot"
+        # only the running call is still charged (slow refill, so the refusals would show)
+        assert limiter.requests.level == pytest.approx(5, abs=0.5)
+        assert limiter.tokens.level == pytest.approx(500, abs=50)
+    finally:
+        release.set()
+        thread.join()
+
+def test_busy_provider_gets_a_fast_429_with_retry_after():
+    original = ai_logic.provider_limits.get("groq")
+    app_module.provider_limits.set("groq", ProviderLimiter("groq", 1, max_queue=0))
+    try:
+        response = app_module.app.test_client().post("/analyze", data={
+            "syllabus": (io.BytesIO(make_pdf(["Unit 1: Sorting algorithms"])), "syllabus.pdf"),
+            "question_pdf": (io.BytesIO(make_pdf(["Q1. Explain merge sort."])), "paper.pdf"),
+            "ai_model": "groq",
+        }, content_type="multipart/form-data")
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert response.get_json()["retry_after"] == int(response.headers["Retry-After"])
+    finally:
+        ai_logic.provider_limits.set("groq", original)
+
+def test_provider_error_is_a_502_not_an_analysis():
+    with patched_provider("groq", lambda prompt, config: "Error from Groq: 503 - unavailable"):
+        response = app_module.app.test_client().post("/analyze", data={
+            "syllabus": (io.BytesIO(make_pdf(["Unit 1: Graph algorithms"])), "syllabus.pdf"),
+            "question_pdf": (io.BytesIO(make_pdf(["Q1. Explain Dijkstra's algorithm."])), "paper.pdf"),
+            "ai_model": "groq",
+            "chunked": "false",
+        }, content_type="multipart/form-data")
+        assert response.status_code == 502
+        assert response.get_json() == {"error": "Error from Groq: 503 - unavailable"}
@@ -0,0 +1,143 @@
+import sys
+import os
+import time
+from types import SimpleNamespace
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bson import ObjectId
+from pymongo import MongoClient, DESCENDING
+from utils.result_store import ResultStore, result_key, text_fingerprint, encode_cursor, decode_cursor
+
+def test_fingerprints_ignore_layout_but_not_content():
+    assert text_fingerprint("Q1. Explain\n\n  heaps.") == text_fingerprint("Q1. Explain heaps.")
+    assert text_fingerprint("Q1. Explain heaps.") != text_fingerprint("Q1. Explain tries.")
+    key = result_key("Q1. Explain heaps.", "Unit 1: Heaps", "", "groq", "llama", None)
+    assert key["chunked"] is False
+    assert key != result_key("Q1. Explain heaps.", "Unit 1: Heaps", "", "groq", "llama-2", None)
+
+def test_cursor_round_trips_and_rejects_garbage():
+    created_at = datetime(2026, 3, 1, 12, 30, 15, 123000)
+    document_id = ObjectId()
+    assert decode_cursor(encode_cursor(created_at, document_id)) == (created_at, document_id)
+    for cursor in ["not-a-cursor", encode_cursor(created_at, document_id)[:-6]]:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{cursor} decoded")
+
+def test_unreachable_mongodb_is_skipped_after_one_failure():
+    client = MongoClient("mongodb://127.0.0.1:9/", serverSelectionTimeoutMS=200, connect=False)
+    store = ResultStore(client["test"]["results"], enabled=True, retry_seconds=60)
+    key = result_key("paper", "syllabus", "", "groq", "llama", False)
+
+    start = time.perf_counter()
+    assert store.find(key) is None
+    assert not store.available()
+    # while it is marked unavailable nothing waits on the server again
+    store.save(key, {"analysis": "ok"})
+    assert store.find(key) is None
+    assert time.perf_counter() - start < 2
+    client.close()
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self.documents.sort(key=lambda document: document[field], reverse=direction == DESCENDING)
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    def __iter__(self):
+        return iter(self.documents)
+
+class FakeCollection:
+    # the subset of a pymongo collection ResultStore uses, with MongoDB's millisecond datetimes
+    def __init__(self):
+        self.documents = []
+        self.database = SimpleNamespace(client=SimpleNamespace(topology_description=SimpleNamespace(server_descriptions=dict)))
+
+    def create_index(self, keys, **options):
+        pass
+
+    def matches(self, document, query):
+        for field, condition in query.items():
+            if field == "$or":
+                if not any(self.matches(document, alternative) for alternative in condition):
+                    return False
+            elif isinstance(condition, dict):
+                if field not in document or not document[field] < condition["$lt"]:
+                    return False
+            elif document.get(field) != condition:
+                return False
+        return True
+
+    def find_one(self, query, projection=None):
+        return next((dict(document) for document in self.documents if self.matches(document, query)), None)
+
+    def find(self, query, projection=None):
+        return FakeCursor([dict(document) for document in self.documents if self.matches(document, query)])
+
+    def update_one(self, query, update, upsert=False):
+        if any(self.matches(document, query) for document in self.documents):
+            return
+        document = dict(update["$setOnInsert"], _id=ObjectId())
+        created_at = document["created_at"]
+        document["created_at"] = created_at.replace(microsecond=created_at.microsecond // 1000 * 1000)
+        self.documents.append(document)
+
+def test_identical_analyses_are_stored_once_per_user():
+    collection = FakeCollection()
+    store = ResultStore(collection, enabled=True)
+    key = result_key("Q1. Explain heaps.", "Unit 1: Heaps", "", "groq", "llama", False)
+    result = {"analysis": "ok", "metrics": {"difficulty_label": "Easy"}}
+
+    assert store.find(key, "ada") is None
+    store.save(key, result, "ada", "paper.pdf", "syllabus.pdf")
+    store.save(key, result, "ada", "paper.pdf", "syllabus.pdf")
+    assert len(collection.documents) == 1
+    assert store.find(key, "ada") == result
+    assert len(collection.documents) == 1
+
+    # another user is served ada's copy, and it is recorded in their own history
+    assert store.find(key, "grace", "other.pdf", "syllabus.pdf") == result
+    assert sorted(document["user_id"] for document in collection.documents) == ["ada", "grace"]
+    history, _ = store.history("grace")
+    assert [entry["paper_name"] for entry in history] == ["other.pdf"]
+    assert store.get(history[0]["id"], "grace")["result"] == result
+    assert store.get(history[0]["id"], "ada") is None
+
+def test_history_pages_newest_first_without_gaps_or_repeats():
+    collection = FakeCollection()
+    store = ResultStore(collection, enabled=True)
+    # saved within the same few milliseconds, so pages also rely on the _id tie-break
+    for number in range(7):
+        key = result_key(f"Q1. Paper {number}", "Unit 1", "", "groq", "llama", False)
+        store.save(key, {"analysis": "ok"}, "ada", f"paper{number}.pdf")
+    store.save(result_key("Q1. Someone else", "Unit 1", "", "groq", "llama", False), {"analysis": "ok"}, "grace", "theirs.pdf")
+
+    names = []
+    page, cursor = store.history("ada", limit=3)
+    pages = 1
+    names.extend(entry["paper_name"] for entry in page)
+    while cursor:
+        page, cursor = store.history("ada", limit=3, cursor=cursor)
+        pages += 1
+        names.extend(entry["paper_name"] for entry in page)
+    assert pages == 3
+    assert names == [f"paper{number}.pdf" for number in reversed(range(7))]
+
+if __name__ == "__main__":
+    test_fingerprints_ignore_layout_but_not_content()
+    test_cursor_round_trips_and_rejects_garbage()
+    test_unreachable_mongodb_is_skipped_after_one_failure()
+    test_identical_analyses_are_stored_once_per_user()
+    test_history_pages_newest_first_without_gaps_or_repeats()
+    print("Result store tests passed")
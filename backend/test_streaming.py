@@ -0,0 +1,104 @@
+import sys
+import os
+import io
+import json
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import ai_logic
+from app import app
+from test_cache import make_pdf
+from benchmarks.fake_provider import patched_provider
+from test_parsing import test_analysis
+
+def parse_sse(body):
+    events = []
+    for block in body.decode("utf-8").strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def post_stream(client, ai_model):
+    return client.post("/generate/stream", data={
+        "syllabus": (io.BytesIO(make_pdf(["Unit 1: Sorting algorithms"])), "syllabus.pdf"),
+        "ai_model": ai_model,
+        "difficulty_level": "easy",
+    }, content_type="multipart/form-data")
+
+def test_generate_stream_relays_tokens_and_caches_result():
+    calls = []
+
+    def fake_stream(prompt, config):
+        calls.append(prompt)
+        yield "Q1. Define "
+        yield "merge sort."
+
+    with patched_provider("gemini", stream=fake_stream):
+        client = app.test_client()
+        response = post_stream(client, "gemini")
+        assert response.mimetype == "text/event-stream"
+        events = parse_sse(response.data)
+        assert [name for name, _ in events] == ["start", "token", "token", "done"]
+        assert events[-1][1]["questions"] == "Q1. Define merge sort."
+
+        # a repeat request is served whole from the response cache
+        events = parse_sse(post_stream(client, "gemini").data)
+        assert [name for name, _ in events] == ["start", "token", "done"]
+        assert len(calls) == 1
+
+def test_generate_stream_reports_provider_errors():
+    with patched_provider("huggingface", lambda prompt, config: "Error from Hugging Face: 503 - loading"):
+        events = parse_sse(post_stream(app.test_client(), "huggingface").data)
+        assert events[-1] == ("error", {"error": "Error from Hugging Face: 503 - loading"})
+
+def feed_in_chunks(text, sizes):
+    parser = ai_logic.IncrementalQuestionParser("test")
+    emitted = []
+    position = 0
+    for size in sizes:
+        emitted.extend(parser.feed(text[position:position + size]))
+        position += size
+    emitted.extend(parser.feed(text[position:]))
+    emitted.extend(parser.finish())
+    return emitted
+
+def test_incremental_parser_matches_batch_parser():
+    rng = random.Random(7)
+    samples = [
+        test_analysis,
+        "Intro text\n" + test_analysis + "\n**Question: Q2**\n*   **Difficulty Score**: 9\n",
+        "No headers here, Tough difficulty, score: 8",
+    ]
+    for text in samples:
+        expected = ai_logic.parse_multiple_question_analysis(text, "test")
+        assert feed_in_chunks(text, [len(text)]) == expected
+        assert feed_in_chunks(text, [1] * len(text)) == expected
+        for _ in range(20):
+            assert feed_in_chunks(text, [rng.randint(1, 40) for _ in range(len(text) // 10)]) == expected
+
+def test_analyze_stream_emits_questions_before_completion():
+    def fake_stream(prompt, config):
+        yield from test_analysis.splitlines(keepends=True)
+
+    with patched_provider("openrouter", stream=fake_stream):
+        response = app.test_client().post("/analyze/stream", data={
+            "syllabus": (io.BytesIO(make_pdf(["Chapter 6: E-R Model"])), "syllabus.pdf"),
+            "question_pdf": (io.BytesIO(make_pdf(["Q1 A. Draw an ER diagram."])), "paper.pdf"),
+            "ai_model": "openrouter",
+        }, content_type="multipart/form-data")
+        events = parse_sse(response.data)
+        names = [name for name, _ in events]
+        # Q1 A is emitted as soon as the Q1 B header arrives, before the stream ends
+        last_token = len(names) - 1 - names[::-1].index("token")
+        assert names.index("question") < last_token
+        questions = [payload for name, payload in events if name == "question"]
+        assert [q["question_id"] for q in questions] == ["Q1 A", "Q1 B"]
+        assert events[-1][0] == "done"
+        assert events[-1][1]["all_questions_metrics"] == questions
+
+if __name__ == "__main__":
+    test_generate_stream_relays_tokens_and_caches_result()
+    test_generate_stream_reports_provider_errors()
+    test_incremental_parser_matches_batch_parser()
+    test_analyze_stream_emits_questions_before_completion()
+    print("Streaming tests passed")
@@ -0,0 +1,80 @@
+import sys
+import os
+import io
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bson import ObjectId
+import app as app_module
+from utils.auth import issue_token
+from utils.syllabus_store import SyllabusStore
+from utils.context_selector import select_context
+from test_cache import make_pdf
+from benchmarks.fake_provider import patched_provider
+
+SYLLABUS_PAGES = ["Unit 1: Sorting algorithms\nMerge sort and quick sort", "Unit 2: Graph search\nBFS, DFS and Dijkstra"]
+
+def test_syllabus_handle_replaces_the_upload():
+    prompts = []
+    original_store = app_module.syllabus_store
+    original_extract = app_module.extract_text_from_upload
+    original_receive = app_module.receive_upload
+    fake = lambda prompt, config: prompts.append(prompt) or "Q1. Compare BFS and DFS."
+    with patched_provider("groq", fake), tempfile.TemporaryDirectory() as directory:
+        app_module.syllabus_store = SyllabusStore(directory)
+        try:
+            client = app_module.app.test_client()
+            owner = {"Authorization": f"Bearer {issue_token({'_id': ObjectId(), 'username': 'ada'})}"}
+            other = {"Authorization": f"Bearer {issue_token({'_id': ObjectId(), 'username': 'grace'})}"}
+            pdf = make_pdf(SYLLABUS_PAGES)
+            upload = lambda: client.post("/api/syllabus", data={
+                "syllabus": (io.BytesIO(pdf), "syllabus.pdf"),
+            }, headers=owner, content_type="multipart/form-data")
+
+            created = upload()
+            assert created.status_code == 201
+            syllabus_id = created.get_json()["syllabus_id"]
+            assert created.get_json()["key_topics"] == ["Unit 1: Sorting algorithms", "Unit 2: Graph search"]
+            assert upload().get_json()["syllabus_id"] == syllabus_id
+            assert upload().status_code == 200
+
+            # a known handle needs no PDF work at all
+            app_module.extract_text_from_upload = lambda upload: (_ for _ in ()).throw(AssertionError("re-extracted"))
+            response = client.post("/generate", data={"syllabus_id": syllabus_id, "ai_model": "groq"})
+            assert response.status_code == 200
+            assert "Dijkstra" in prompts[-1]
+
+            assert client.post("/generate", data={"syllabus_id": "0" * 64}).status_code == 404
+            assert client.post("/generate", data={"syllabus_id": "../../etc/passwd"}).status_code == 404
+            # an unknown handle still releases the question paper it came with
+            received = []
+            app_module.receive_upload = lambda storage: received.append(original_receive(storage)) or received[-1]
+            assert client.post("/analyze", data={
+                "syllabus_id": "0" * 64,
+                "question_pdf": (io.BytesIO(pdf), "paper.pdf"),
+            }, content_type="multipart/form-data").status_code == 404
+            assert len(received) == 1 and received[0].data is None and received[0].path is None
+            assert client.get(f"/api/syllabus/{syllabus_id}").get_json()["sections"] == 2
+
+            # a fresh store (e.g. after a restart) loads text, topics and index from disk
+            reloaded = SyllabusStore(directory).get(syllabus_id)
+            stored = app_module.syllabus_store.get(syllabus_id)
+            assert reloaded.text == stored.text and reloaded.key_topics == stored.key_topics
+            assert reloaded.index.postings == stored.index.postings
+            assert reloaded.index.select("dijkstra", 5) == stored.index.select("dijkstra", 5)
+            assert select_context(reloaded.text, "dijkstra", 5) == stored.index.select("dijkstra", 5)
+
+            # the handle is computable by anyone with the same PDF, so deleting it takes its owner
+            assert client.delete(f"/api/syllabus/{syllabus_id}").status_code == 401
+            assert client.delete(f"/api/syllabus/{syllabus_id}", headers=other).status_code == 403
+            assert client.get(f"/api/syllabus/{syllabus_id}").status_code == 200
+            assert client.delete(f"/api/syllabus/{syllabus_id}", headers=owner).status_code == 200
+            assert client.get(f"/api/syllabus/{syllabus_id}").status_code == 404
+        finally:
+            app_module.syllabus_store = original_store
+            app_module.extract_text_from_upload = original_extract
+            app_module.receive_upload = original_receive
+
+if __name__ == "__main__":
+    test_syllabus_handle_replaces_the_upload()
+    print("Syllabus store tests passed")
@@ -0,0 +1,119 @@
+import sys
+import os
+import io
+import gc
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from werkzeug.datastructures import FileStorage
+from werkzeug.test import EnvironBuilder
+from app import app
+from utils import pdf_parser, uploads
+from utils.uploads import receive_upload, UploadRequest, UploadSpool
+from test_cache import make_pdf
+from benchmarks.fake_provider import patched_provider
+
+def storage(data, filename="syllabus.pdf"):
+    return FileStorage(stream=io.BytesIO(data), filename=filename)
+
+def test_small_uploads_stay_in_memory_and_large_ones_spill():
+    data = make_pdf(["Unit 1: Hashing", "Unit 2: Tries"])
+    expected = pdf_parser.extract_text_from_bytes(data)
+
+    with receive_upload(storage(data)) as upload:
+        assert upload.path is None
+        assert upload.sha256 == hashlib.sha256(data).hexdigest()
+        assert upload.size == len(data)
+        assert pdf_parser.extract_text_from_upload(upload) == expected
+
+    upload = receive_upload(storage(data), spool_bytes=len(data) // 3)
+    path = upload.path
+    assert upload.data is None and os.path.exists(path)
+    with open(path, "rb") as f:
+        assert f.read() == data
+    assert upload.sha256 == hashlib.sha256(data).hexdigest()
+    assert pdf_parser.extract_text_from_upload(upload) == expected
+    upload.close()
+    assert not os.path.exists(path)
+
+    # an upload that is dropped without being closed still removes its file
+    path = receive_upload(storage(data), spool_bytes=1).path
+    gc.collect()
+    assert not os.path.exists(path)
+
+def test_concurrent_uploads_with_the_same_filename_do_not_collide():
+    original_cache = pdf_parser.PDF_CACHE_ENABLED
+    pdf_parser.PDF_CACHE_ENABLED = False
+
+    def post(number):
+        response = app.test_client().post("/analyze", data={
+            "syllabus": (io.BytesIO(make_pdf([f"Unit {number}: Marker{number}x"])), "syllabus.pdf"),
+            "question_pdf": (io.BytesIO(make_pdf([f"Q1. Question marker{number}y"])), "paper.pdf"),
+            "ai_model": "groq",
+        }, content_type="multipart/form-data")
+        return number, response.get_json()["analysis"]
+
+    try:
+        with patched_provider("groq", lambda prompt, config: prompt), ThreadPoolExecutor(max_workers=8) as executor:
+            for number, analysis in executor.map(post, range(16)):
+                assert f"Marker{number}x" in analysis
+                assert f"marker{number}y" in analysis
+        assert not os.path.exists("tmp/syllabus.pdf")
+    finally:
+        pdf_parser.PDF_CACHE_ENABLED = original_cache
+
+def test_form_files_are_taken_without_a_second_copy():
+    small = make_pdf(["Unit 1: Hashing"])
+    large = small + b"%" + b"0" * 4096
+    original = uploads.UPLOAD_SPOOL_MB
+    uploads.UPLOAD_SPOOL_MB = 2048 / (1024 * 1024)
+    builder = EnvironBuilder(method="POST", data={
+        "syllabus": (io.BytesIO(small), "syllabus.pdf"),
+        "question_pdf": (io.BytesIO(large), "paper.pdf"),
+        "unused_pdf": (io.BytesIO(large), "unused.pdf"),
+    })
+    request = UploadRequest(builder.get_environ())
+    try:
+        streams = {name: request.files[name].stream for name in ("syllabus", "question_pdf", "unused_pdf")}
+        assert all(isinstance(stream, UploadSpool) for stream in streams.values())
+
+        syllabus = receive_upload(request.files["syllabus"])
+        assert syllabus.data == small and syllabus.path is None
+        assert syllabus.sha256 == hashlib.sha256(small).hexdigest()
+
+        # the parser already wrote the large one to its own temp file, which is adopted as is
+        paper = receive_upload(request.files["question_pdf"])
+        assert paper.path == streams["question_pdf"].path
+        assert paper.sha256 == hashlib.sha256(large).hexdigest() and paper.size == len(large)
+        with open(paper.path, "rb") as f:
+            assert f.read() == large
+
+        unused_path = streams["unused_pdf"].path
+        request.close()
+        # the adopted file outlives the request; the one nobody took does not
+        assert os.path.exists(paper.path)
+        assert not os.path.exists(unused_path)
+        paper.close()
+    finally:
+        uploads.UPLOAD_SPOOL_MB = original
+        request.close()
+
+def test_oversized_request_is_rejected_with_413():
+    original = app.config['MAX_CONTENT_LENGTH']
+    app.config['MAX_CONTENT_LENGTH'] = 1024
+    try:
+        response = app.test_client().post("/generate", data={
+            "syllabus": (io.BytesIO(b"%PDF" + b"0" * 4096), "syllabus.pdf"),
+        }, content_type="multipart/form-data")
+        assert response.status_code == 413
+        assert "limit" in response.get_json()["error"]
+    finally:
+        app.config['MAX_CONTENT_LENGTH'] = original
+
+if __name__ == "__main__":
+    test_small_uploads_stay_in_memory_and_large_ones_spill()
+    test_concurrent_uploads_with_the_same_filename_do_not_collide()
+    test_form_files_are_taken_without_a_second_copy()
+    test_oversized_request_is_rejected_with_413()
+    print("Upload tests passed")
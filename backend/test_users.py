@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pymongo.errors import DuplicateKeyError, ServerSelectionTimeoutError
+import app as app_module
+from app import app, duplicate_user_message, UserIndexes
+
+class FakeUsers:
+    # stands in for the users collection: insert_one always hits the username index
+    def __init__(self, existing=None, index_error=None):
+        self.existing = existing
+        self.index_error = index_error
+        self.indexes = []
+        self.inserts = 0
+
+    def create_index(self, field, **options):
+        if self.index_error:
+            raise self.index_error
+        self.indexes.append(options['name'])
+
+    def find_one(self, query, projection=None):
+        return self.existing
+
+    def insert_one(self, document):
+        self.inserts += 1
+        raise DuplicateKeyError("E11000 duplicate key error index: username_unique", 11000, {"keyPattern": {"username": 1}})
+
+def register_with(users, indexes):
+    original = app_module.users_collection, app_module.user_indexes
+    app_module.users_collection, app_module.user_indexes = users, indexes
+    try:
+        return app.test_client().post("/api/register", json={"username": "ada", "email": "ada@example.com", "password": "secret1"})
+    finally:
+        app_module.users_collection, app_module.user_indexes = original
+
+def test_users_listing_rejects_a_malformed_cursor_before_querying():
+    client = app.test_client()
+    for cursor in ["not-an-id", "0" * 23]:
+        response = client.get(f"/api/users?cursor={cursor}")
+        assert response.status_code == 400
+        assert response.get_json() == {"message": "Invalid cursor"}
+
+def test_duplicate_key_errors_map_to_the_existing_conflict_messages():
+    def error(index, field, value):
+        message = f"E11000 duplicate key error collection: question_difficulty_app.users index: {index} dup key: {{ {field}: \"{value}\" }}"
+        return DuplicateKeyError(message, 11000, {"code": 11000, "keyPattern": {field: 1}, "keyValue": {field: value}, "errmsg": message})
+
+    assert duplicate_user_message(error("email_unique", "email", "a@b.co")) == "User with this email already exists"
+    assert duplicate_user_message(error("username_unique", "username", "ada")) == "Username already taken"
+    # servers that omit keyPattern still name the index in the message
+    assert duplicate_user_message(DuplicateKeyError("E11000 duplicate key error index: email_unique", 11000)) == "User with this email already exists"
+
+def test_register_maps_a_duplicate_insert_to_409_and_falls_back_until_indexes_exist():
+    # indexes confirmed: the insert alone decides
+    users = FakeUsers()
+    response = register_with(users, UserIndexes(users))
+    assert response.status_code == 409
+    assert response.get_json() == {"message": "Username already taken"}
+    assert users.indexes == ["username_unique", "email_unique"] and users.inserts == 1
+
+    # indexes not created (e.g. MongoDB was down at startup): the pre-check still answers 409
+    down = FakeUsers(existing={"email": "ada@example.com"}, index_error=ServerSelectionTimeoutError("down"))
+    indexes = UserIndexes(down, retry_seconds=0)
+    response = register_with(down, indexes)
+    assert response.status_code == 409
+    assert response.get_json() == {"message": "User with this email already exists"}
+    assert down.inserts == 0 and not indexes.ready
+
+    # the next attempt after the retry interval creates them
+    down.existing, down.index_error = None, None
+    assert register_with(down, indexes).status_code == 409
+    assert down.indexes == ["username_unique", "email_unique"] and indexes.ready and down.inserts == 1
+
+if __name__ == "__main__":
+    test_users_listing_rejects_a_malformed_cursor_before_querying()
+    test_duplicate_key_errors_map_to_the_existing_conflict_messages()
+    test_register_maps_a_duplicate_insert_to_409_and_falls_back_until_indexes_exist()
+    print("User listing tests passed")
@@ -0,0 +1,94 @@
+import os
+import time
+import logging
+import secrets
+from functools import wraps
+from flask import request, jsonify, g
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from dotenv import load_dotenv
+from utils.cache import LRUCache
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ACCESS_TOKEN_TTL = int(os.getenv("ACCESS_TOKEN_TTL", str(12 * 3600)))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+# how long a verified token is trusted without checking its signature again
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "300"))
+TOKEN_SALT = "access-token"
+
+AUTH_SECRET_KEY = os.getenv("AUTH_SECRET_KEY", "")
+if not AUTH_SECRET_KEY:
+    AUTH_SECRET_KEY = secrets.token_urlsafe(32)
+    logger.warning("AUTH_SECRET_KEY is not set; tokens will not survive a restart or work across processes")
+
+serializer = URLSafeTimedSerializer(AUTH_SECRET_KEY, salt=TOKEN_SALT)
+verified_tokens = LRUCache(max_size=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+def issue_token(user):
+    claims = {"sub": str(user["_id"]), "username": user["username"]}
+    return serializer.dumps(claims)
+
+def verify_token(token):
+    # claims of a valid, unexpired token, else None; no database involved
+    cached = verified_tokens.get(token)
+    if cached is not None:
+        claims, expires_at = cached
+        if expires_at > time.time():
+            return claims
+        verified_tokens.delete(token)
+        return None
+
+    try:
+        claims, issued_at = serializer.loads(token, max_age=ACCESS_TOKEN_TTL, return_timestamp=True)
+    except BadSignature:
+        # tampered, signed with another key, or expired (SignatureExpired is a subclass)
+        return None
+    # a cached entry never outlives the token itself
+    verified_tokens.set(token, (claims, issued_at.timestamp() + ACCESS_TOKEN_TTL))
+    return claims
+
+def bearer_token():
+    header = request.headers.get("Authorization", "")
+    scheme, _, token = header.partition(" ")
+    return token.strip() if scheme.lower() == "bearer" and token.strip() else None
+
+def authenticate():
+    # True when the request has no token or a valid one; g.user holds the claims of a valid one
+    g.user = None
+    token = bearer_token()
+    if token is None:
+        return True
+    g.user = verify_token(token)
+    return g.user is not None
+
+def invalid_token():
+    response = jsonify({"message": "Invalid or expired token"})
+    response.headers["WWW-Authenticate"] = 'Bearer error="invalid_token"'
+    return response, 401
+
+def require_auth(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not authenticate():
+            return invalid_token()
+        if g.user is None:
+            response = jsonify({"message": "Authentication required"})
+            response.headers["WWW-Authenticate"] = "Bearer"
+            return response, 401
+        return view(*args, **kwargs)
+    return wrapper
+
+def optional_auth(view):
+    # anonymous requests pass; a token that is present but invalid is refused rather than ignored
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not authenticate():
+            return invalid_token()
+        return view(*args, **kwargs)
+    return wrapper
+
+def current_user_id():
+    user = g.get("user")
+    return user["sub"] if user else None
@@ -0,0 +1,190 @@
+import re
+import math
+import heapq
+import threading
+from collections import Counter, OrderedDict
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+HEADING_PATTERN = re.compile(
+    r'^\s*(?:(?:chapter|unit|topic|section|module|part|week)\b|\d+(?:\.\d+)*[\.\)]?\s+[A-Z])',
+    re.IGNORECASE
+)
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have how in is it its of on or that the this to was were
+what when where which who why will with about into their there these those using use can may
+each all any both more most other some such than then them they also been being do does not
+explain describe discuss define write question questions marks answer following give brief
+""".split())
+
+# BM25 defaults from the literature; b normalises for section length
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+MAX_SECTION_CHARS = 1200
+CHARS_PER_TOKEN = 4
+SECTION_SEPARATOR = "\n...\n"
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS and len(token) > 1]
+
+def split_long_section(section, max_chars):
+    if len(section) <= max_chars:
+        return [section]
+    pieces = []
+    current = []
+    size = 0
+    for line in section.split("\n"):
+        if current and size + len(line) > max_chars:
+            pieces.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+def split_sections(text, max_chars=MAX_SECTION_CHARS):
+    # a new section starts at every heading-like line or blank-line paragraph break
+    sections = []
+    current = []
+    for line in text.split("\n"):
+        starts_section = not line.strip() or HEADING_PATTERN.match(line)
+        if starts_section and any(part.strip() for part in current):
+            sections.append("\n".join(current).strip())
+            current = []
+        if line.strip():
+            current.append(line)
+    if any(part.strip() for part in current):
+        sections.append("\n".join(current).strip())
+    return [piece for section in sections for piece in split_long_section(section, max_chars)]
+
+class SectionIndex:
+    # sections of one document with an inverted index (term -> [(section, frequency)]),
+    # built once and scored against any number of queries
+    def __init__(self, sections, postings, lengths):
+        self.sections = sections
+        self.postings = postings
+        self.lengths = lengths
+        self.average_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    @classmethod
+    def from_sections(cls, sections):
+        postings = {}
+        lengths = []
+        for index, section in enumerate(sections):
+            counts = Counter(tokenize(section))
+            lengths.append(sum(counts.values()))
+            for term, frequency in counts.items():
+                postings.setdefault(term, []).append((index, frequency))
+        return cls(sections, postings, lengths)
+
+    @classmethod
+    def from_text(cls, text):
+        return cls.from_sections(split_sections(text))
+
+    def to_dict(self):
+        return {"sections": self.sections, "postings": self.postings, "lengths": self.lengths}
+
+    @classmethod
+    def from_dict(cls, data):
+        postings = {term: [tuple(entry) for entry in entries] for term, entries in data["postings"].items()}
+        return cls(data["sections"], postings, data["lengths"])
+
+    def idf(self, term):
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.sections) - df + 0.5) / (df + 0.5))
+
+    def term_scores(self, query):
+        # per section, the BM25 contribution of each matching query term
+        query_terms = Counter(tokenize(query))
+        contributions = [{} for _ in self.sections]
+        if not query_terms or not self.average_length:
+            return contributions
+        for term, query_count in query_terms.items():
+            entries = self.postings.get(term)
+            if not entries:
+                continue
+            idf = self.idf(term)
+            for index, frequency in entries:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[index] / self.average_length)
+                # repeated query terms (a topic asked about in many questions) weigh more
+                contributions[index][term] = idf * frequency * (BM25_K1 + 1) / (frequency + norm) * (1 + math.log(query_count))
+        return contributions
+
+    def scores(self, query):
+        return [sum(terms.values()) for terms in self.term_scores(query)]
+
+    def select(self, query, token_budget):
+        full_text = "\n\n".join(self.sections)
+        if estimate_tokens(full_text) <= token_budget:
+            return full_text
+
+        contributions = self.term_scores(query)
+        costs = [estimate_tokens(section) + estimate_tokens(SECTION_SEPARATOR) for section in self.sections]
+        covered = Counter()
+        chosen = []
+        used = 0
+
+        def marginal(index):
+            return sum(value / (1 + covered[term]) for term, value in contributions[index].items())
+
+        # lazy greedy packing: terms already covered count for less, so ten near-identical
+        # sections on one topic do not crowd out the other topics the query asks about.
+        # Scores only fall as coverage grows, so a stale heap entry is an upper bound.
+        heap = [(-marginal(index), index) for index, terms in enumerate(contributions) if terms]
+        heapq.heapify(heap)
+        while heap:
+            _, index = heapq.heappop(heap)
+            if used + costs[index] > token_budget:
+                continue
+            score = marginal(index)
+            if heap and score < -heap[0][0]:
+                heapq.heappush(heap, (-score, index))
+                continue
+            chosen.append(index)
+            used += costs[index]
+            covered.update(contributions[index].keys())
+
+        if not chosen:
+            # nothing matched the query: keep the opening sections, as a plain cut would
+            for index, cost in enumerate(costs):
+                if used + cost > token_budget:
+                    break
+                chosen.append(index)
+                used += cost
+        if not chosen and self.sections:
+            return self.sections[0][:token_budget * CHARS_PER_TOKEN]
+        return SECTION_SEPARATOR.join(self.sections[index] for index in sorted(chosen))
+
+_index_cache = OrderedDict()
+_index_cache_lock = threading.Lock()
+INDEX_CACHE_SIZE = 32
+
+def get_section_index(text):
+    # the same syllabus is usually ranked for several prompts (batches, retries, generation)
+    with _index_cache_lock:
+        index = _index_cache.get(text)
+        if index is not None:
+            _index_cache.move_to_end(text)
+            return index
+
+    index = SectionIndex.from_text(text)
+    register_section_index(text, index)
+    return index
+
+def register_section_index(text, index):
+    # lets a stored index (see syllabus_store) stand in for re-splitting the same text
+    with _index_cache_lock:
+        _index_cache[text] = index
+        _index_cache.move_to_end(text)
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+
+def select_context(text, query, token_budget):
+    if not text or estimate_tokens(text) <= token_budget:
+        return text
+    return get_section_index(text).select(query, token_budget)
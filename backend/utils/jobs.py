@@ -0,0 +1,138 @@
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobFailed(Exception):
+    # raised by a job function whose work returned an error instead of a result
+    pass
+
+
+class JobManager:
+    def __init__(self, max_workers=4, max_queue=32, result_ttl=3600):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _pending_count(self):
+        # a cancelled job holds its worker (or executor queue slot) until its future finishes
+        return sum(1 for job in self._jobs.values() if not job["future"].done())
+
+    def _purge_expired(self):
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] + self.result_ttl < now
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, kind, fn, *args, **kwargs):
+        with self._lock:
+            self._purge_expired()
+            if self._pending_count() >= self.max_workers + self.max_queue:
+                raise JobQueueFull(f"Job queue is full ({self.max_queue} waiting)")
+
+            job_id = uuid.uuid4().hex
+            job = {
+                "id": job_id,
+                "kind": kind,
+                "status": "queued",
+                "progress": "queued",
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+                "cancel_requested": False,
+            }
+            self._jobs[job_id] = job
+            # the worker inherits the submitter's request ID and metric labels
+            context = contextvars.copy_context()
+            job["future"] = self._executor.submit(context.run, self._run, job, fn, args, kwargs)
+
+        logger.info(f"Queued {kind} job {job_id}")
+        return self.snapshot(job)
+
+    def _run(self, job, fn, args, kwargs):
+        with self._lock:
+            if job["cancel_requested"]:
+                job["finished_at"] = time.time()
+                return
+            job["status"] = "running"
+            job["started_at"] = time.time()
+
+        def progress(stage):
+            # called by the job between stages; also the point where cancellation takes effect
+            with self._lock:
+                if job["cancel_requested"]:
+                    raise JobCancelled()
+                job["progress"] = stage
+
+        try:
+            result = fn(progress, *args, **kwargs)
+            with self._lock:
+                if job["cancel_requested"]:
+                    raise JobCancelled()
+                job["status"] = "completed"
+                job["progress"] = "completed"
+                job["result"] = result
+        except JobCancelled:
+            logger.info(f"Job {job['id']} cancelled while running")
+        except Exception as e:
+            logger.error(f"Job {job['id']} failed: {str(e)}")
+            with self._lock:
+                if not job["cancel_requested"]:
+                    job["status"] = "failed"
+                    job["error"] = str(e)
+        finally:
+            with self._lock:
+                job["finished_at"] = time.time()
+
+    def get(self, job_id):
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(job_id)
+            return self.snapshot(job) if job else None
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] in ("queued", "running"):
+                job["cancel_requested"] = True
+                job["status"] = "cancelled"
+                job["progress"] = "cancelled"
+                if job["future"].cancel():
+                    job["finished_at"] = time.time()
+            return self.snapshot(job)
+
+    def snapshot(self, job):
+        return {
+            key: value for key, value in job.items()
+            if key not in ("future", "cancel_requested")
+        }
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return counts
@@ -0,0 +1,243 @@
+import os
+import time
+import threading
+import contextvars
+from functools import wraps
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_PREFIX = os.getenv("METRICS_PREFIX", "qdapp")
+
+# seconds; the upper buckets cover slow provider calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# endpoint and provider of the request being served, attached to every stage timing
+request_labels = contextvars.ContextVar("metrics_request_labels", default={})
+
+def escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label_value(value)}"' for name, value in pairs) + "}"
+
+def format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def label_key(self, labels):
+        return tuple(str(labels.get(name, "none")) for name in self.label_names)
+
+    def inc(self, amount=1, **labels):
+        key = self.label_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self.values.get(self.label_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            yield self.name, format_labels(self.label_names, key), value
+
+    def reset(self):
+        with self._lock:
+            self.values.clear()
+
+class Histogram(Counter):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self.label_key(labels)
+        with self._lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def value(self, **labels):
+        with self._lock:
+            series = self.values.get(self.label_key(labels))
+            return dict(series, buckets=list(series["buckets"])) if series else None
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, dict(series, buckets=list(series["buckets"]))) for key, series in self.values.items())
+        for key, series in items:
+            for bound, count in zip(self.buckets, series["buckets"]):
+                yield f"{self.name}_bucket", format_labels(self.label_names, key, ("le", format_number(float(bound)))), count
+            yield f"{self.name}_bucket", format_labels(self.label_names, key, ("le", "+Inf")), series["count"]
+            yield f"{self.name}_sum", format_labels(self.label_names, key), series["sum"]
+            yield f"{self.name}_count", format_labels(self.label_names, key), series["count"]
+
+class MetricsRegistry:
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, label_names, **kwargs):
+        full_name = f"{self.prefix}_{name}" if self.prefix else name
+        with self._lock:
+            metric = self.metrics.get(full_name)
+            if metric is None:
+                metric = self.metrics[full_name] = cls(full_name, help_text, label_names, **kwargs)
+            return metric
+
+    def counter(self, name, help_text, label_names=()):
+        return self._get_or_create(Counter, name, help_text, label_names)
+
+    def histogram(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, label_names, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            metrics = list(self.metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+registry = MetricsRegistry(METRICS_PREFIX)
+
+STAGE_SECONDS = registry.histogram(
+    "stage_duration_seconds",
+    "Time spent in each request processing stage",
+    ("endpoint", "provider", "stage")
+)
+PROVIDER_CALL_SECONDS = registry.histogram(
+    "provider_call_duration_seconds",
+    "Latency of upstream LLM provider calls",
+    ("endpoint", "provider", "outcome")
+)
+PROMPT_CHARS = registry.counter(
+    "provider_prompt_chars_total",
+    "Characters sent to LLM providers",
+    ("endpoint", "provider")
+)
+RESPONSE_CHARS = registry.counter(
+    "provider_response_chars_total",
+    "Characters received from LLM providers",
+    ("endpoint", "provider")
+)
+PROVIDER_REJECTED = registry.counter(
+    "provider_rejected_total",
+    "Provider calls refused by the rate limiter instead of queued",
+    ("provider", "reason")
+)
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total",
+    "HTTP requests by route, method and status",
+    ("endpoint", "method", "status")
+)
+HTTP_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency including streamed bodies",
+    ("endpoint", "method")
+)
+
+def current_labels():
+    return request_labels.get()
+
+def set_request_labels(**labels):
+    return request_labels.set(labels)
+
+def reset_request_labels(token):
+    request_labels.reset(token)
+
+@contextmanager
+def labelled(**labels):
+    # for work that runs outside the request thread, e.g. queued jobs
+    token = request_labels.set(dict(request_labels.get(), **labels))
+    try:
+        yield
+    finally:
+        request_labels.reset(token)
+
+def observe_stage(stage, seconds, provider=None):
+    if not METRICS_ENABLED:
+        return
+    labels = request_labels.get()
+    STAGE_SECONDS.observe(
+        seconds,
+        endpoint=labels.get("endpoint", "none"),
+        provider=provider or labels.get("provider", "none"),
+        stage=stage
+    )
+
+@contextmanager
+def stage_timer(stage, provider=None):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start, provider)
+
+def timed(stage):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def record_provider_call(provider, seconds, prompt, response, outcome):
+    if not METRICS_ENABLED:
+        return
+    endpoint = request_labels.get().get("endpoint", "none")
+    PROVIDER_CALL_SECONDS.observe(seconds, endpoint=endpoint, provider=provider, outcome=outcome)
+    PROMPT_CHARS.inc(len(prompt), endpoint=endpoint, provider=provider)
+    RESPONSE_CHARS.inc(len(response) if isinstance(response, str) else 0, endpoint=endpoint, provider=provider)
+
+def record_provider_rejection(provider, reason):
+    if not METRICS_ENABLED:
+        return
+    PROVIDER_REJECTED.inc(provider=provider, reason=reason)
+
+def record_http_request(endpoint, method, status, seconds):
+    if not METRICS_ENABLED:
+        return
+    HTTP_REQUESTS.inc(endpoint=endpoint, method=method, status=status)
+    HTTP_SECONDS.observe(seconds, endpoint=endpoint, method=method)
+
+def render_prometheus():
+    return registry.render()
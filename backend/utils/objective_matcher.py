@@ -1,6 +1,68 @@
+import math
+from collections import Counter
+from utils.context_selector import tokenize
+
+def split_objectives(objectives):
+    # objectives arrive one per line from the form, or already as a list
+    if isinstance(objectives, str):
+        objectives = objectives.split("\n")
+    return [objective.strip() for objective in objectives if objective and objective.strip()]
+
+class ObjectiveMatcher:
+    # objectives as a sparse TF-IDF matrix with L2-normalised rows, stored by column
+    # (term -> [(objective, weight)]) so a paper is scored in one sparse product that
+    # only visits the terms its questions share with the objectives
+    def __init__(self, objectives):
+        self.objectives = split_objectives(objectives)
+        counts = [Counter(tokenize(objective)) for objective in self.objectives]
+        document_frequency = Counter(term for terms in counts for term in terms)
+        total = len(counts)
+        self.idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in document_frequency.items()}
+        # terms no objective uses still lengthen a question, so a long question that
+        # shares one word is not scored like a short one that is all about it
+        self.unseen_idf = math.log(1 + total) + 1
+        self.columns = {}
+        for index, terms in enumerate(counts):
+            for term, weight in self.weights(terms).items():
+                self.columns.setdefault(term, []).append((index, weight))
+
+    def weights(self, counts):
+        weights = {term: (1 + math.log(frequency)) * self.idf.get(term, self.unseen_idf) for term, frequency in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        return {term: weight / norm for term, weight in weights.items()} if norm else {}
+
+    def scores(self, questions):
+        # cosine similarity of every question with every objective: {objective index: score} per question
+        rows = {}
+        for question_index, question in enumerate(questions):
+            for term, weight in self.weights(Counter(tokenize(question))).items():
+                if term in self.columns:
+                    rows.setdefault(term, []).append((question_index, weight))
+
+        scores = [{} for _ in questions]
+        for term, question_entries in rows.items():
+            objective_entries = self.columns[term]
+            for question_index, question_weight in question_entries:
+                row = scores[question_index]
+                for objective_index, objective_weight in objective_entries:
+                    row[objective_index] = row.get(objective_index, 0.0) + question_weight * objective_weight
+        return scores
+
+    def match(self, questions, min_score=0.0, top_k=None):
+        # per question, [(objective, score)] best first; ties keep the objectives' order
+        ranked = []
+        for row in self.scores(questions):
+            matches = sorted(
+                ((index, score) for index, score in row.items() if score > min_score),
+                key=lambda item: (-item[1], item[0])
+            )
+            if top_k is not None:
+                matches = matches[:top_k]
+            ranked.append([(self.objectives[index], round(score, 4)) for index, score in matches])
+        return ranked
+
+def match_objectives(objectives, questions, min_score=0.0, top_k=None):
+    return ObjectiveMatcher(objectives).match(questions, min_score=min_score, top_k=top_k)
+
 def match_objectives_to_question(objectives, question):
-    matched = []
-    for obj in objectives.split("\n"):
-        if any(word in question for word in obj.split()):
-            matched.append(obj)
-    return matched
\ No newline at end of file
+    return [objective for objective, _ in match_objectives(objectives, [question])[0]]
@@ -1,8 +1,208 @@
+import os
+import re
+import math
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import fitz  # PyMuPDF
+from utils.cache import TieredCache
+from utils.metrics import timed
+from dotenv import load_dotenv
 
-def extract_text(pdf_path):
-    text = ""
-    with fitz.open(pdf_path) as doc:
+load_dotenv()
+
+PDF_CACHE_ENABLED = os.getenv("PDF_CACHE_ENABLED", "true").lower() == "true"
+PDF_CACHE_SIZE = int(os.getenv("PDF_CACHE_SIZE", "128"))
+PDF_PAGE_CACHE_SIZE = int(os.getenv("PDF_PAGE_CACHE_SIZE", "4096"))
+# the disk tier is opt-in: it keeps the text of every uploaded paper, with no size bound
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "")
+
+# documents with at least this many uncached pages are split across a process pool (0 disables)
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "0"))
+PDF_PROCESS_WORKERS = int(os.getenv("PDF_PROCESS_WORKERS", str(os.cpu_count() or 1)))
+
+document_cache = TieredCache(
+    "pdf_document",
+    max_size=PDF_CACHE_SIZE,
+    directory=os.path.join(PDF_CACHE_DIR, "documents") if PDF_CACHE_DIR else None
+)
+page_cache = TieredCache(
+    "pdf_page",
+    max_size=PDF_PAGE_CACHE_SIZE,
+    directory=os.path.join(PDF_CACHE_DIR, "pages") if PDF_CACHE_DIR else None
+)
+
+# workers are started from a clean server process rather than forked from this one: the app
+# is threaded (request threads, the log listener), and a fork would copy locks held mid-write
+PDF_PROCESS_START_METHOD = os.getenv("PDF_PROCESS_START_METHOD", "forkserver")
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+def open_pdf(source):
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+OBJECT_REFERENCE = re.compile(rb"(\d+) 0 R")
+
+def font_digest(doc, xref):
+    # the font dictionary and everything it references (descriptor, embedded font file,
+    # /Encoding and /ToUnicode streams) decide which characters get_text() reads
+    digest = hashlib.sha256()
+    pending, seen = [xref], set()
+    while pending:
+        current = pending.pop()
+        if current in seen or not 0 < current < doc.xref_length():
+            continue
+        seen.add(current)
+        source = doc.xref_object(current).encode("utf-8")
+        digest.update(source)
+        if doc.xref_is_stream(current):
+            digest.update(doc.xref_stream_raw(current) or b"")
+        pending.extend(int(number) for number in OBJECT_REFERENCE.findall(source))
+    return digest.digest()
+
+def page_fingerprint(doc, page, font_digests=None):
+    # content streams, fonts and form xobjects decide what get_text() returns,
+    # so an unchanged page hashes the same even inside an edited document.
+    # font_digests is shared across the pages of one document, which reuse the same fonts
+    if font_digests is None:
+        font_digests = {}
+    digest = hashlib.sha256()
+    digest.update(page.read_contents())
+    for font in page.get_fonts():
+        if font[0] not in font_digests:
+            font_digests[font[0]] = font_digest(doc, font[0])
+        digest.update(repr(font[1:]).encode("utf-8"))
+        digest.update(font_digests[font[0]])
+    for xobject in page.get_xobjects():
+        digest.update(doc.xref_stream(xobject[0]) or b"")
+    digest.update(repr((tuple(page.rect), page.rotation)).encode("utf-8"))
+    return digest.hexdigest()
+
+def extract_page_text(doc, page, font_digests=None):
+    if not PDF_CACHE_ENABLED:
+        return page.get_text()
+
+    key = page_fingerprint(doc, page, font_digests)
+    text = page_cache.get(key)
+    if text is None:
+        text = page.get_text()
+        page_cache.set(key, text)
+    return text
+
+def iter_page_text(source):
+    with open_pdf(source) as doc:
+        font_digests = {}
         for page in doc:
-            text += page.get_text()
+            yield extract_page_text(doc, page, font_digests)
+
+def _extract_page_batch(source, page_numbers):
+    # runs inside a pool worker, which opens its own copy of the document
+    with open_pdf(source) as doc:
+        return [doc[number].get_text() for number in page_numbers]
+
+def new_process_pool(workers):
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(PDF_PROCESS_START_METHOD))
+
+def get_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = new_process_pool(PDF_PROCESS_WORKERS)
+        return _process_pool
+
+def extract_pages_parallel(source, page_numbers, workers=None):
+    if not page_numbers:
+        return []
+
+    # a couple of batches per worker keeps cores busy when pages differ in cost
+    pool_size = workers or PDF_PROCESS_WORKERS
+    batch_size = max(1, math.ceil(len(page_numbers) / (pool_size * 2)))
+    batches = [page_numbers[i:i + batch_size] for i in range(0, len(page_numbers), batch_size)]
+
+    if workers is None:
+        results = list(get_process_pool().map(_extract_page_batch, [source] * len(batches), batches))
+    else:
+        with new_process_pool(workers) as pool:
+            results = list(pool.map(_extract_page_batch, [source] * len(batches), batches))
+
+    return [text for batch in results for text in batch]
+
+def _extract_document(source, parallel_min_pages):
+    with open_pdf(source) as doc:
+        font_digests = {}
+        if not parallel_min_pages or doc.page_count < parallel_min_pages:
+            return "".join(extract_page_text(doc, page, font_digests) for page in doc)
+
+        if PDF_CACHE_ENABLED:
+            keys = [page_fingerprint(doc, page, font_digests) for page in doc]
+            texts = [page_cache.get(key) for key in keys]
+        else:
+            keys = [None] * doc.page_count
+            texts = [None] * doc.page_count
+
+    missing = [number for number, text in enumerate(texts) if text is None]
+    if len(missing) < parallel_min_pages:
+        with open_pdf(source) as doc:
+            for number in missing:
+                texts[number] = doc[number].get_text()
+    else:
+        for number, text in zip(missing, extract_pages_parallel(source, missing)):
+            texts[number] = text
+
+    if PDF_CACHE_ENABLED:
+        for number in missing:
+            page_cache.set(keys[number], texts[number])
+    return "".join(texts)
+
+def _extract_cached(digest, source, parallel_min_pages):
+    # digest is the sha256 hex of the document bytes, computed lazily by the caller
+    if parallel_min_pages is None:
+        parallel_min_pages = PDF_PARALLEL_MIN_PAGES
+
+    if not PDF_CACHE_ENABLED:
+        return _extract_document(source, parallel_min_pages)
+
+    key = digest()
+    text = document_cache.get(key)
+    if text is not None:
+        return text
+
+    text = _extract_document(source, parallel_min_pages)
+    document_cache.set(key, text)
     return text
+
+@timed("extract_text")
+def extract_text_from_bytes(data, source=None, parallel_min_pages=None):
+    return _extract_cached(lambda: hashlib.sha256(data).hexdigest(), source or data, parallel_min_pages)
+
+@timed("extract_text")
+def extract_text_from_upload(upload, parallel_min_pages=None):
+    # the upload was hashed while it was received, so nothing is read twice
+    return _extract_cached(lambda: upload.sha256, upload.source, parallel_min_pages)
+
+def file_sha256(pdf_path):
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+@timed("extract_text")
+def extract_text(pdf_path, parallel_min_pages=None):
+    # pool workers reopen the file by path instead of receiving the bytes
+    return _extract_cached(lambda: file_sha256(pdf_path), pdf_path, parallel_min_pages)
+
+def extract_text_parallel(pdf_path, workers=None):
+    with open_pdf(pdf_path) as doc:
+        page_numbers = list(range(doc.page_count))
+    return "".join(extract_pages_parallel(pdf_path, page_numbers, workers))
+
+def get_pdf_cache_stats():
+    return {
+        "pdf_document": document_cache.stats(),
+        "pdf_page": page_cache.stats()
+    }
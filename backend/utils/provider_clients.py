@@ -0,0 +1,117 @@
+import os
+import threading
+import logging
+from http.cookiejar import DefaultCookiePolicy
+import requests
+from requests.adapters import HTTPAdapter
+import openai
+from openai import OpenAI
+from google import genai
+from google.genai import types
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROVIDER_POOL_CONNECTIONS = int(os.getenv("PROVIDER_POOL_CONNECTIONS", "10"))
+PROVIDER_POOL_MAXSIZE = int(os.getenv("PROVIDER_POOL_MAXSIZE", "20"))
+PROVIDER_KEEPALIVE_EXPIRY = float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY", "60"))
+
+def optional_env(name, cast):
+    value = os.getenv(name)
+    return cast(value) if value else None
+
+# timeouts and retries are only overridden when these are set; unset, each client keeps
+# its own defaults (the OpenAI SDK's and Gemini's, and 60s for the plain HTTP providers)
+PROVIDER_CONNECT_TIMEOUT = optional_env("PROVIDER_CONNECT_TIMEOUT", float)
+PROVIDER_READ_TIMEOUT = optional_env("PROVIDER_READ_TIMEOUT", float)
+PROVIDER_MAX_RETRIES = optional_env("PROVIDER_MAX_RETRIES", int)
+HTTP_DEFAULT_TIMEOUT = 60
+
+logger = logging.getLogger(__name__)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_or_create(key, factory):
+    # double-checked so concurrent first requests still build a single client
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                logger.info(f"Creating pooled provider client: {key[0]}")
+                client = factory()
+                _clients[key] = client
+    return client
+
+def get_request_timeout():
+    return (PROVIDER_CONNECT_TIMEOUT, PROVIDER_READ_TIMEOUT)
+
+# per-call timeouts in each SDK's form, from a (connect, read) pair whose unset parts
+# fall back to that SDK's default
+def http_timeout(timeout):
+    connect, read = timeout
+    return (connect or HTTP_DEFAULT_TIMEOUT, read or HTTP_DEFAULT_TIMEOUT)
+
+def openai_timeout(timeout):
+    connect, read = timeout
+    if connect is None and read is None:
+        return openai.NOT_GIVEN
+    return openai.Timeout(read or openai.DEFAULT_TIMEOUT.read, connect=connect or openai.DEFAULT_TIMEOUT.connect)
+
+def gemini_http_options(timeout):
+    return types.HttpOptions(timeout=int(timeout[1] * 1000)) if timeout[1] else None
+
+def _create_http_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=PROVIDER_POOL_CONNECTIONS,
+        pool_maxsize=PROVIDER_POOL_MAXSIZE,
+        max_retries=PROVIDER_MAX_RETRIES or 0
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # the session is shared across worker threads, so it must not accumulate cookies
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+def get_http_session():
+    return get_or_create(("http",), _create_http_session)
+
+def get_openai_client(base_url, api_key):
+    def factory():
+        limits = type(openai.DEFAULT_CONNECTION_LIMITS)(
+            max_connections=PROVIDER_POOL_MAXSIZE,
+            max_keepalive_connections=PROVIDER_POOL_MAXSIZE,
+            keepalive_expiry=PROVIDER_KEEPALIVE_EXPIRY
+        )
+        options = {}
+        if PROVIDER_MAX_RETRIES is not None:
+            options["max_retries"] = PROVIDER_MAX_RETRIES
+        return OpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            timeout=openai_timeout(get_request_timeout()),
+            http_client=openai.DefaultHttpxClient(limits=limits),
+            **options
+        )
+    return get_or_create(("openai", base_url, api_key), factory)
+
+def get_gemini_client(api_key):
+    def factory():
+        return genai.Client(
+            api_key=api_key,
+            http_options=gemini_http_options(get_request_timeout())
+        )
+    return get_or_create(("gemini", api_key), factory)
+
+def reset_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            close = getattr(client, "close", None)
+            if close:
+                try:
+                    close()
+                except Exception as e:
+                    logger.warning(f"Error closing provider client: {str(e)}")
+        _clients.clear()
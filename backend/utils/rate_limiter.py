@@ -0,0 +1,193 @@
+import os
+import math
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from utils.metrics import record_provider_rejection
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# per provider, overridable as <PROVIDER>_MAX_CONCURRENCY, <PROVIDER>_RPM, <PROVIDER>_TPM and <PROVIDER>_MAX_QUEUE;
+# a rate of 0 means the provider's own limit is not modelled
+PROVIDER_MAX_CONCURRENCY = int(os.getenv("PROVIDER_MAX_CONCURRENCY", "8"))
+PROVIDER_RPM = float(os.getenv("PROVIDER_RPM", "0"))
+PROVIDER_TPM = float(os.getenv("PROVIDER_TPM", "0"))
+# calls allowed to wait for a slot; the next one is refused at once
+PROVIDER_MAX_QUEUE = int(os.getenv("PROVIDER_MAX_QUEUE", "32"))
+# a call that would wait longer than this for a slot or for rate budget is refused instead
+PROVIDER_MAX_WAIT = float(os.getenv("PROVIDER_MAX_WAIT", "30"))
+
+class ProviderOverloaded(Exception):
+    def __init__(self, provider, retry_after, reason):
+        super().__init__(f"{provider} is at capacity ({reason}); retry in {retry_after}s")
+        self.provider = provider
+        self.retry_after = retry_after
+        self.reason = reason
+
+class TokenBucket:
+    # refills continuously at per_minute / 60 per second and holds at most a minute's worth;
+    # callers reserve ahead, so the level can go negative and the deficit is their wait
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount, now):
+        self._refill(now)
+        # a single call larger than the bucket waits for a full bucket rather than forever
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def reserve(self, amount, now):
+        wait = self.wait_for(amount, now)
+        self.level -= min(amount, self.capacity)
+        return wait
+
+    def refund(self, amount, now):
+        # gives back a reservation for a call that was refused after all
+        self._refill(now)
+        self.level = min(self.capacity, self.level + min(amount, self.capacity))
+
+def env_number(name, default, cast):
+    value = os.getenv(name)
+    return cast(value) if value else default
+
+class ProviderLimiter:
+    def __init__(self, name, max_concurrency, rpm=0, tpm=0, max_queue=PROVIDER_MAX_QUEUE, max_wait=PROVIDER_MAX_WAIT):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls, name):
+        prefix = name.upper()
+        return cls(
+            name,
+            env_number(f"{prefix}_MAX_CONCURRENCY", PROVIDER_MAX_CONCURRENCY, int),
+            rpm=env_number(f"{prefix}_RPM", PROVIDER_RPM, float),
+            tpm=env_number(f"{prefix}_TPM", PROVIDER_TPM, float),
+            max_queue=env_number(f"{prefix}_MAX_QUEUE", PROVIDER_MAX_QUEUE, int)
+        )
+
+    def _rate_wait(self, tokens, now):
+        waits = [0.0]
+        if self.requests:
+            waits.append(self.requests.wait_for(1, now))
+        if self.tokens:
+            waits.append(self.tokens.wait_for(tokens, now))
+        return max(waits)
+
+    def _queue_retry_after(self):
+        # roughly when the queue ahead will have drained
+        if self.requests:
+            return (self.waiting + 1) / self.requests.rate
+        return self.max_wait / 2
+
+    def _refuse(self, retry_after, reason):
+        self.rejected += 1
+        record_provider_rejection(self.name, reason)
+        logger.warning(f"Refusing {self.name} call: {reason} ({self.active} running, {self.waiting} waiting)")
+        raise ProviderOverloaded(self.name, max(1, math.ceil(retry_after)), reason)
+
+    def check(self, tokens=0):
+        # refuses up front, before extraction and prompt building, when a call could not be admitted now
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self._refuse(self._queue_retry_after(), "queue full")
+            wait = self._rate_wait(tokens, time.monotonic())
+            if wait > self.max_wait:
+                self._refuse(wait, "rate limit")
+
+    def _admit(self, tokens):
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self._refuse(self._queue_retry_after(), "queue full")
+            now = time.monotonic()
+            wait = self._rate_wait(tokens, now)
+            if wait > self.max_wait:
+                self._refuse(wait, "rate limit")
+            if self.requests:
+                self.requests.reserve(1, now)
+            if self.tokens:
+                self.tokens.reserve(tokens, now)
+            self.waiting += 1
+            return wait
+
+    @contextmanager
+    def slot(self, tokens=0):
+        wait = self._admit(tokens)
+        try:
+            if wait:
+                time.sleep(wait)
+            if self._slots is not None and not self._slots.acquire(timeout=self.max_wait):
+                with self._lock:
+                    # the call never reaches the provider, so its rate budget goes back
+                    now = time.monotonic()
+                    if self.requests:
+                        self.requests.refund(1, now)
+                    if self.tokens:
+                        self.tokens.refund(tokens, now)
+                    self._refuse(self.max_wait, "no free slot")
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+        with self._lock:
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
+            if self._slots is not None:
+                self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active": self.active,
+                "waiting": self.waiting,
+                "rejected": self.rejected,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue
+            }
+
+class ProviderLimits:
+    # one limiter per provider name, built from the environment on first use
+    def __init__(self):
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        limiter = self._limiters.get(name)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.get(name)
+                if limiter is None:
+                    limiter = ProviderLimiter.from_env(name)
+                    self._limiters[name] = limiter
+        return limiter
+
+    def set(self, name, limiter):
+        with self._lock:
+            self._limiters[name] = limiter
+
+    def stats(self):
+        return {name: limiter.stats() for name, limiter in list(self._limiters.items())}
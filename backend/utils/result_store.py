@@ -0,0 +1,174 @@
+import os
+import re
+import time
+import base64
+import logging
+import threading
+from datetime import datetime, timezone
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from dotenv import load_dotenv
+from utils.cache import hash_key
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RESULTS_STORE_ENABLED = os.getenv("RESULTS_STORE_ENABLED", "true").lower() == "true"
+# after MongoDB fails, analyses skip the store for this long instead of waiting on it each time
+RESULTS_RETRY_SECONDS = float(os.getenv("RESULTS_RETRY_SECONDS", "60"))
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+# the fields that decide an analysis; the unique index adds user_id so each user keeps a history entry
+KEY_FIELDS = ["paper_fingerprint", "syllabus_fingerprint", "objectives_fingerprint", "provider", "model", "chunked"]
+SUMMARY_FIELDS = ["paper_name", "syllabus_name", "provider", "model", "chunked", "total_questions", "difficulty_label", "created_at"]
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+def text_fingerprint(text):
+    # layout-only differences between two extractions of the same paper hash the same
+    return hash_key(WHITESPACE_PATTERN.sub(" ", text or "").strip())
+
+def result_key(paper_text, syllabus_text, objectives, provider, model, chunked):
+    return {
+        "paper_fingerprint": text_fingerprint(paper_text),
+        "syllabus_fingerprint": text_fingerprint(syllabus_text),
+        "objectives_fingerprint": text_fingerprint(objectives),
+        "provider": provider,
+        "model": model,
+        "chunked": bool(chunked)
+    }
+
+def encode_cursor(created_at, document_id):
+    millis = int(created_at.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    return base64.urlsafe_b64encode(f"{millis}:{document_id}".encode("ascii")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        millis, document_id = raw.split(":", 1)
+        return datetime.fromtimestamp(int(millis) / 1000, tz=timezone.utc).replace(tzinfo=None), ObjectId(document_id)
+    except (ValueError, InvalidId, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+class ResultStore:
+    # finished analyses in MongoDB: identical requests are served from here, and
+    # each user's entries form a history paged newest first
+    def __init__(self, collection, enabled=RESULTS_STORE_ENABLED, retry_seconds=RESULTS_RETRY_SECONDS):
+        self.collection = collection
+        self.enabled = enabled
+        self.retry_seconds = retry_seconds
+        self._indexes_ready = False
+        self._unavailable_until = 0.0
+        self._lock = threading.Lock()
+
+    def available(self):
+        return self.enabled and time.monotonic() >= self._unavailable_until and not self._known_down()
+
+    def _known_down(self):
+        # pymongo's monitor has already failed to reach every server, so a query would
+        # only wait out serverSelectionTimeoutMS before failing the same way
+        servers = self.collection.database.client.topology_description.server_descriptions().values()
+        return bool(servers) and all(server.error is not None for server in servers)
+
+    def _failed(self, action, error):
+        self._unavailable_until = time.monotonic() + self.retry_seconds
+        logger.warning(f"Result store {action} failed, skipping it for {self.retry_seconds:g}s: {str(error)}")
+
+    def ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        with self._lock:
+            if self._indexes_ready:
+                return
+            self.collection.create_index(
+                [(field, ASCENDING) for field in KEY_FIELDS] + [("user_id", ASCENDING)],
+                unique=True,
+                name="result_key_user"
+            )
+            self.collection.create_index(
+                [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="user_history"
+            )
+            self._indexes_ready = True
+
+    def find(self, key, user_id=None, paper_name=None, syllabus_name=None):
+        # any user's copy will do; the key fields are a prefix of the unique index
+        if not self.available():
+            return None
+        try:
+            self.ensure_indexes()
+            document = self.collection.find_one(key, {"result": 1, "user_id": 1})
+        except PyMongoError as e:
+            self._failed("lookup", e)
+            return None
+        if document is None:
+            return None
+        if document.get("user_id") != user_id:
+            # served from someone else's entry: still record it in this user's history
+            self.save(key, document["result"], user_id, paper_name, syllabus_name)
+        return document["result"]
+
+    def save(self, key, result, user_id=None, paper_name=None, syllabus_name=None):
+        if not self.available():
+            return
+        metrics = result.get("metrics") or {}
+        document = dict(
+            key,
+            user_id=user_id,
+            paper_name=paper_name,
+            syllabus_name=syllabus_name,
+            total_questions=result.get("total_questions_analyzed", 1),
+            difficulty_label=metrics.get("difficulty_label"),
+            result=result,
+            created_at=datetime.now(timezone.utc).replace(tzinfo=None)
+        )
+        try:
+            self.ensure_indexes()
+            self.collection.update_one(
+                dict(key, user_id=user_id),
+                {"$setOnInsert": document},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # a concurrent identical request stored it first
+            pass
+        except PyMongoError as e:
+            self._failed("save", e)
+
+    def history(self, user_id, limit=HISTORY_PAGE_SIZE, cursor=None):
+        # keyset pagination on (created_at, _id): every page is one index range scan
+        limit = max(1, min(int(limit), HISTORY_MAX_PAGE_SIZE))
+        query = {"user_id": user_id}
+        if cursor:
+            created_at, document_id = decode_cursor(cursor)
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": document_id}}
+            ]
+        documents = list(
+            self.collection.find(query, {field: 1 for field in SUMMARY_FIELDS})
+            .sort([("created_at", DESCENDING), ("_id", DESCENDING)])
+            .limit(limit + 1)
+        )
+        page = documents[:limit]
+        next_cursor = encode_cursor(page[-1]["created_at"], page[-1]["_id"]) if len(documents) > limit else None
+        for document in page:
+            document["id"] = str(document.pop("_id"))
+            document["created_at"] = document["created_at"].replace(tzinfo=timezone.utc).isoformat()
+        return page, next_cursor
+
+    def get(self, result_id, user_id=None):
+        try:
+            document_id = ObjectId(result_id)
+        except (InvalidId, TypeError):
+            return None
+        document = self.collection.find_one({"_id": document_id, "user_id": user_id})
+        if document is None:
+            return None
+        document["id"] = str(document.pop("_id"))
+        document["created_at"] = document["created_at"].replace(tzinfo=timezone.utc).isoformat()
+        return document
@@ -0,0 +1,103 @@
+import os
+import re
+import time
+import logging
+from dotenv import load_dotenv
+from utils.cache import DiskCache, LRUCache
+from utils.context_selector import SectionIndex, register_section_index
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# relative to the working directory, like LOG_FILE; the backend's data/ is gitignored
+SYLLABUS_STORE_DIR = os.getenv("SYLLABUS_STORE_DIR", "data/syllabi")
+# 0 keeps stored syllabi until they are deleted by hand
+SYLLABUS_STORE_TTL = int(os.getenv("SYLLABUS_STORE_TTL", "0"))
+SYLLABUS_MEMORY_SIZE = int(os.getenv("SYLLABUS_MEMORY_SIZE", "64"))
+
+# handles are the sha256 of the uploaded PDF, so re-uploading a file returns the same one
+HANDLE_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+class Syllabus:
+    def __init__(self, syllabus_id, filename, text, key_topics, index, created_at, owner_id=None):
+        self.id = syllabus_id
+        self.filename = filename
+        self.text = text
+        self.key_topics = key_topics
+        self.index = index
+        self.created_at = created_at
+        # the user who first stored it; None for an anonymous upload
+        self.owner_id = owner_id
+
+    def metadata(self):
+        return {
+            "syllabus_id": self.id,
+            "filename": self.filename,
+            "characters": len(self.text),
+            "sections": len(self.index.sections),
+            "key_topics": self.key_topics,
+            "created_at": self.created_at
+        }
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "text": self.text,
+            "key_topics": self.key_topics,
+            "index": self.index.to_dict(),
+            "created_at": self.created_at,
+            "owner_id": self.owner_id
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["id"],
+            data["filename"],
+            data["text"],
+            data["key_topics"],
+            SectionIndex.from_dict(data["index"]),
+            data["created_at"],
+            data.get("owner_id")
+        )
+
+class SyllabusStore:
+    # parsed syllabi on disk, with the most recently used kept decoded in memory
+    def __init__(self, directory=SYLLABUS_STORE_DIR, ttl=None, memory_size=SYLLABUS_MEMORY_SIZE):
+        self.disk = DiskCache(directory, ttl=ttl)
+        self.memory = LRUCache(max_size=memory_size, ttl=ttl)
+
+    def _activate(self, syllabus):
+        self.memory.set(syllabus.id, syllabus)
+        # prompt building finds the stored index instead of re-splitting the text
+        register_section_index(syllabus.text, syllabus.index)
+        return syllabus
+
+    def get(self, syllabus_id):
+        if not syllabus_id or not HANDLE_PATTERN.match(syllabus_id):
+            return None
+        syllabus = self.memory.get(syllabus_id)
+        if syllabus is not None:
+            register_section_index(syllabus.text, syllabus.index)
+            return syllabus
+
+        data = self.disk.get(syllabus_id)
+        if data is None:
+            return None
+        return self._activate(Syllabus.from_dict(data))
+
+    def create(self, syllabus_id, filename, text, key_topics, owner_id=None):
+        syllabus = Syllabus(syllabus_id, filename, text, key_topics, SectionIndex.from_text(text), time.time(), owner_id)
+        self.disk.set(syllabus_id, syllabus.to_dict())
+        logger.info(f"Stored syllabus {syllabus_id[:12]} ({len(text)} chars, {len(syllabus.index.sections)} sections)")
+        return self._activate(syllabus)
+
+    def delete(self, syllabus_id):
+        if not HANDLE_PATTERN.match(syllabus_id or ""):
+            return False
+        existed = self.get(syllabus_id) is not None
+        self.disk.delete(syllabus_id)
+        self.memory.delete(syllabus_id)
+        return existed
@@ -0,0 +1,157 @@
+import os
+import io
+import hashlib
+import logging
+import tempfile
+import weakref
+from flask import Request
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# whole request bodies above this are refused with 413 before they are read
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "32"))
+# uploads up to this size stay in memory; larger ones spill to a private temp file
+UPLOAD_SPOOL_MB = float(os.getenv("UPLOAD_SPOOL_MB", "8"))
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR", "") or None
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def max_content_length():
+    return int(MAX_UPLOAD_MB * 1024 * 1024) if MAX_UPLOAD_MB > 0 else None
+
+def spool_limit():
+    return int(UPLOAD_SPOOL_MB * 1024 * 1024)
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+class Upload:
+    # an uploaded file held as bytes, or as a uniquely named temp file for large
+    # uploads; close() (or leaving the with block) always removes the temp file
+    def __init__(self, filename, sha256, size, data=None, path=None):
+        self.filename = filename
+        self.sha256 = sha256
+        self.size = size
+        self.data = data
+        self.path = path
+        # also covers uploads that are dropped unused, e.g. a rejected or cancelled job
+        self._finalizer = weakref.finalize(self, remove_file, path) if path else None
+
+    @property
+    def source(self):
+        # what open_pdf() accepts: bytes, or a path pool workers can reopen
+        return self.data if self.data is not None else self.path
+
+    def read(self):
+        if self.data is not None:
+            return self.data
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def close(self):
+        if self._finalizer is not None:
+            self._finalizer()
+        self.path = None
+        self.data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class UploadSpool:
+    # the stream the form parser writes each uploaded file into: memory up to max_size, then
+    # a private temp file. It hashes as it goes, so receive_upload takes the bytes or the
+    # file as they are instead of reading and copying the upload a second time.
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.file = io.BytesIO()
+        self.path = None
+        self.adopted = False
+        self.size = 0
+        self.digest = hashlib.sha256()
+
+    def write(self, data):
+        if self.path is None and self.size + len(data) > self.max_size:
+            spill = tempfile.NamedTemporaryFile(prefix="upload-", suffix=".pdf", dir=UPLOAD_TMP_DIR, delete=False)
+            spill.write(self.file.getvalue())
+            self.file = spill
+            self.path = spill.name
+        self.size += len(data)
+        self.digest.update(data)
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+    def take(self, filename):
+        if self.path is None:
+            return Upload(filename, self.digest.hexdigest(), self.size, data=self.file.getvalue())
+        self.file.close()
+        self.adopted = True
+        logger.info(f"Upload {filename} ({self.size} bytes) spooled to disk")
+        return Upload(filename, self.digest.hexdigest(), self.size, path=self.path)
+
+    def discard(self):
+        self.file.close()
+        if self.path is not None and not self.adopted:
+            remove_file(self.path)
+
+class UploadRequest(Request):
+    # replaces werkzeug's default, which spools every file over 500 KB to disk before the view runs
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        spool = UploadSpool(spool_limit())
+        if not hasattr(self, "_upload_spools"):
+            self._upload_spools = []
+        self._upload_spools.append(spool)
+        return spool
+
+    def close(self):
+        super().close()
+        # files nobody called receive_upload on (a rejected request, say) are removed here
+        for spool in getattr(self, "_upload_spools", []):
+            spool.discard()
+
+def receive_upload(file_storage, spool_bytes=None):
+    if isinstance(file_storage.stream, UploadSpool):
+        return file_storage.stream.take(file_storage.filename)
+
+    if spool_bytes is None:
+        spool_bytes = spool_limit()
+
+    digest = hashlib.sha256()
+    buffer = io.BytesIO()
+    spill = None
+    size = 0
+    try:
+        while True:
+            chunk = file_storage.stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            if spill is None and size > spool_bytes:
+                spill = tempfile.NamedTemporaryFile(prefix="upload-", suffix=".pdf", dir=UPLOAD_TMP_DIR, delete=False)
+                spill.write(buffer.getvalue())
+                buffer = None
+            if spill is not None:
+                spill.write(chunk)
+            else:
+                buffer.write(chunk)
+    except BaseException:
+        if spill is not None:
+            spill.close()
+            remove_file(spill.name)
+        raise
+
+    if spill is not None:
+        spill.close()
+        logger.info(f"Upload {file_storage.filename} ({size} bytes) spooled to disk")
+        return Upload(file_storage.filename, digest.hexdigest(), size, path=spill.name)
+    return Upload(file_storage.filename, digest.hexdigest(), size, data=buffer.getvalue())